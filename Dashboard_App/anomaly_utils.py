@@ -0,0 +1,106 @@
+# anomaly_utils.py
+# Thresholds, anomaly detection and reading colours
+
+import numpy as np
+import pandas as pd
+
+
+# --------------------------------------------------
+# 1. DISPLAY NAME --> SENSOR COLUMN MAPPING
+# --------------------------------------------------
+
+DISPLAY_TO_SENSOR = {
+    "CO2 Levels (ppm)": "CO2_ppm",
+    "Temperature (°C)": "Temp_Comp_C",
+    "Humidity (%)": "Hum_Comp_pct",
+    "IAQ": "IAQ"
+}
+
+
+# --------------------------------------------------
+# 2. THRESHOLDS + ANOMALY DETECTION
+# --------------------------------------------------
+
+thresholds = {
+    "CO2_ppm": (600, 1200),
+    "VOC_ppm": (0, 5),
+    "Temp_Comp_C": (18, 26),
+    "Hum_Comp_pct": (30, 60),
+    "IAQ": (50, 150),
+}
+
+iaq_thresholds = (50, 100, 150, 200, 250, 300, 1000)
+
+
+def anomaly_range(var, thresholds=thresholds, iaq_thresholds=iaq_thresholds):
+    """
+    (low, high) limits outside which a reading is an anomaly, or None if the
+    variable is never flagged. IAQ is only flagged above its top band.
+    The chart markers, the statistics' time outside range and the logger's
+    session index (session_index.THRESHOLDS) all follow these limits.
+    """
+    sensor_key = DISPLAY_TO_SENSOR.get(var, var)
+    if sensor_key == "IAQ":
+        return -np.inf, iaq_thresholds[-1]
+    return thresholds.get(sensor_key)
+
+
+def anomaly_mask(var, values, thresholds=thresholds, iaq_thresholds=iaq_thresholds):
+    """
+    Vectorised anomaly test for one variable.
+    Accepts either display names or sensor keys, and a scalar or any array of
+    values. Returns a boolean array (True where the value is an anomaly),
+    computed with NumPy comparisons over the whole series at once.
+    """
+    limits = anomaly_range(var, thresholds, iaq_thresholds)
+    values = np.asarray(values, dtype=float)
+
+    if limits is None:
+        return np.zeros(values.shape, dtype=bool)
+    low, high = limits
+    return (values < low) | (values > high)
+
+
+def detect_anomalies(df):
+    """
+    Anomaly masks for every sensor column of a dataframe at once.
+    Returns a boolean dataframe with the same index and sensor columns.
+    """
+    sensor_cols = [c for c in df.columns if c not in ["Time (s)", "Location_Note"]]
+    return pd.DataFrame(
+        {col: anomaly_mask(col, df[col].to_numpy()) for col in sensor_cols},
+        index=df.index
+    )
+
+
+def is_anomaly(var, val):
+    """
+    Determine whether a value is an anomaly based on thresholds.
+    Accepts either display names or sensor keys.
+    """
+    return bool(anomaly_mask(var, val))
+
+
+# Same colours as the IAQ reference table, one per band of iaq_thresholds
+IAQ_COLORS = ("#66FF00", "#61E160", "#FFFF00", "#FFA500", "#FF0000", "#800080", "#A52A2A")
+IN_RANGE_COLOR = "#61E160"
+OUT_OF_RANGE_COLOR = "#FF0000"
+
+
+def get_color(var, val):
+    """
+    Display colour for a reading: its IAQ band colour, or green/red for
+    inside/outside the variable's threshold range. None if the variable has
+    no thresholds.
+    """
+    sensor_key = DISPLAY_TO_SENSOR.get(var, var)
+
+    if sensor_key == "IAQ":
+        band = np.searchsorted(iaq_thresholds, val, side="left")
+        return IAQ_COLORS[min(band, len(IAQ_COLORS) - 1)]
+
+    if sensor_key in thresholds:
+        low, high = thresholds[sensor_key]
+        return IN_RANGE_COLOR if low <= val <= high else OUT_OF_RANGE_COLOR
+
+    return None
@@ -17,11 +17,18 @@ Date: November 2025
 License: MIT
 """
 
+import os
+import sys
+
 import streamlit as st
 import pandas as pd
-from streamlit_autorefresh import st_autorefresh
 
 # Project Modules
+# Every module is imported through the Dashboard_App package, so each one is
+# loaded once and its process-wide caches are shared. `streamlit run` only puts
+# this folder on sys.path, so the project root is added here.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
 from Dashboard_App import data_utils
 from Dashboard_App import plot_utils
 from Dashboard_App import theme_toggle
@@ -70,14 +77,17 @@ theme_toggle.apply_theme(theme)
 
 st.sidebar.header("Data Source")
 
-use_live_csv = st.sidebar.checkbox("Use live sensor feed (CSV)")
+use_live_csv = st.sidebar.checkbox("Use live sensor feed (CSV or .bin)")
 
 csv_path = None
+live_window = None
 if use_live_csv:
     csv_path = st.sidebar.text_input(
-        "Live CSV file path",
+        "Live CSV or binary (.bin) file path",
         value="Stuffy_Study_YYYY-MM-DD_HH-MM-SS.csv"
     )
+    # Served from fixed-size ring buffers: 1 s rows up to 1 h, then 10 s / 1 min means
+    live_window = st.sidebar.selectbox("Live window", list(data_utils.LIVE_WINDOWS))
 
 st.sidebar.markdown("---")
 st.sidebar.subheader("Static CSV Input")
@@ -92,6 +102,180 @@ local_path = ""
 if use_local_path:
     local_path = st.sidebar.text_input("Enter local CSV path")
 
+st.sidebar.markdown("---")
+st.sidebar.subheader("Master Database Input")
+
+use_db = st.sidebar.checkbox("Load session from master database (SQLite)")
+db_path = ""
+db_query = None
+if use_db:
+    db_path = st.sidebar.text_input(
+        "Master database path",
+        value="Python_Data_Logger/Stuffy_Study_Master.db"
+    )
+    db_sessions = data_utils.list_db_sessions(db_path)
+
+    if db_sessions is None or db_sessions.empty:
+        st.sidebar.warning(
+            "No sessions found. Check the path "
+            "(older databases must be upgraded with db_schema.py first)."
+        )
+    else:
+        session_labels = {
+            row.session_id: f"#{row.session_id} {row.start_time} - {row.location}"
+            for row in db_sessions.itertuples()
+        }
+        db_session_id = st.sidebar.selectbox(
+            "Session",
+            list(session_labels.keys()),
+            format_func=session_labels.get
+        )
+
+        row_count, first_s, last_s = data_utils.get_db_session_span(db_path, db_session_id)
+        st.sidebar.caption(f"{row_count} rows recorded")
+
+        # Time window and columns are applied inside SQLite, not in pandas
+        window = (first_s, last_s)
+        if row_count and last_s > first_s:
+            window = st.sidebar.slider(
+                "Elapsed time window (s)",
+                min_value=int(first_s),
+                max_value=int(last_s),
+                value=(int(first_s), int(last_s)),
+                step=1
+            )
+
+        db_columns = st.sidebar.multiselect(
+            "Columns to load",
+            data_utils.DB_SENSOR_COLUMNS,
+            default=data_utils.DB_SENSOR_COLUMNS
+        )
+
+        # Long windows are read from the logger's rollup tables: the coarsest
+        # resolution that still fills the chart (raw rows for short windows)
+        rollups = data_utils.list_db_rollups(db_path)
+        resolution_options = ["Auto", "Raw"] + [data_utils.ROLLUP_LABELS[r] for r in rollups]
+        resolution_choice = st.sidebar.selectbox("Resolution", resolution_options)
+        if resolution_choice == "Auto":
+            span = (window[1] - window[0]) if row_count and window[0] is not None else 0
+            db_resolution = data_utils.choose_rollup_resolution(span, rollups)
+        elif resolution_choice == "Raw":
+            db_resolution = None
+        else:
+            db_resolution = {v: k for k, v in data_utils.ROLLUP_LABELS.items()}[resolution_choice]
+
+        if db_resolution is not None:
+            st.sidebar.caption(
+                f"Showing {data_utils.ROLLUP_LABELS[db_resolution]} means "
+                "(charts and statistics are of the bucket means)"
+            )
+
+        db_query = {
+            "session_id": db_session_id,
+            "start_s": window[0],
+            "end_s": window[1],
+            "columns": db_columns,
+            "resolution": db_resolution
+        }
+
+st.sidebar.subheader("Parquet Archive Input")
+
+use_archive = st.sidebar.checkbox("Load session from Parquet archive")
+archive_query = None
+if use_archive:
+    archive_dir = st.sidebar.text_input(
+        "Archive directory",
+        value="Python_Data_Logger/Stuffy_Study_Archive"
+    )
+    archive_sessions = data_utils.list_archive_sessions(archive_dir)
+
+    if archive_sessions is None or archive_sessions.empty:
+        st.sidebar.warning(
+            "No archived sessions found. Check the path "
+            "(sessions are archived with archive_export.py, which needs pyarrow)."
+        )
+    else:
+        archive_location = st.sidebar.selectbox(
+            "Location",
+            sorted(archive_sessions["location"].unique())
+        )
+        location_sessions = archive_sessions[archive_sessions["location"] == archive_location]
+        session_paths = dict(zip(location_sessions["path"], location_sessions["session"]))
+        archive_path = st.sidebar.selectbox(
+            "Session",
+            list(session_paths.keys()),
+            format_func=session_paths.get
+        )
+
+        row_count, first_s, last_s = data_utils.get_archive_session_span(archive_path)
+        st.sidebar.caption(f"{row_count} rows archived")
+
+        # Only the row groups overlapping the window and the chosen columns are read
+        window = (first_s, last_s)
+        if row_count and last_s > first_s:
+            window = st.sidebar.slider(
+                "Elapsed time window (s)",
+                min_value=int(first_s),
+                max_value=int(last_s),
+                value=(int(first_s), int(last_s)),
+                step=1,
+                key="archive_window"
+            )
+
+        archive_columns = st.sidebar.multiselect(
+            "Columns to load",
+            data_utils.DB_SENSOR_COLUMNS,
+            default=data_utils.DB_SENSOR_COLUMNS,
+            key="archive_columns"
+        )
+
+        archive_query = {
+            "path": archive_path,
+            "start_s": window[0],
+            "end_s": window[1],
+            "columns": archive_columns,
+            "location": archive_location
+        }
+
+st.sidebar.markdown("---")
+st.sidebar.subheader("Session Comparison (Data Catalog)")
+
+use_catalog = st.sidebar.checkbox("Compare sessions from the data catalog")
+catalog_sessions = []
+if use_catalog:
+    catalog_path = st.sidebar.text_input(
+        "Data catalog path",
+        value="Python_Data_Logger/_Experiment_Data_Catalog.csv"
+    )
+    catalog = data_utils.load_catalog(catalog_path)
+
+    if catalog is None or catalog.empty:
+        st.sidebar.warning("No sessions found. Check the path to _Experiment_Data_Catalog.csv.")
+    else:
+        catalog_variable = st.sidebar.selectbox("Variable to compare", data_utils.DB_SENSOR_COLUMNS)
+
+        # Rank and filter from the logger's session index (no session files are read)
+        if "Rows" in catalog:
+            catalog_ranking = st.sidebar.selectbox("Rank sessions by", list(data_utils.SESSION_RANKINGS))
+            breached_only = (
+                f"{catalog_variable}_above" in catalog
+                and st.sidebar.checkbox(f"Only sessions with {catalog_variable} outside its range")
+            )
+            catalog = data_utils.rank_sessions(catalog, catalog_variable, catalog_ranking, breached_only)
+        else:
+            st.sidebar.caption("No session index found: run session_index.py in the logger folder to rank sessions.")
+
+        catalog_labels = dict(zip(catalog["path"], catalog["label"]))
+        catalog_sessions = st.sidebar.multiselect(
+            "Sessions to compare",
+            list(catalog_labels.keys()),
+            default=list(catalog_labels.keys())[:3],
+            format_func=catalog_labels.get,
+            max_selections=data_utils.MAX_COMPARED_SESSIONS
+        )
+        catalog_align = st.sidebar.radio("Align sessions on", data_utils.ALIGN_MODES)
+        catalog_starts = dict(zip(catalog["path"], catalog["Session_Start_Time"]))
+
 # Adding a "LIVE" badge to show live data collection
 if use_live_csv:
     st.markdown(
@@ -113,43 +297,70 @@ if use_live_csv:
     )
 
 # --------------------------------------------------
-# Auto-refresh for live data
+# Live updates: rerun only when new rows arrive
 # --------------------------------------------------
 
-if use_live_csv:
-    st_autorefresh(
-        interval=2000,   # refresh every 2 seconds
-        key="live_csv_refresh"
-    )
+# A background watcher (data_utils.live_version) notices new rows in the live
+# file. This fragment only compares version numbers; the page itself reruns
+# (reloading data and redrawing charts) only when new data has arrived.
+LIVE_CHECK_INTERVAL_S = 0.5
+
+if use_live_csv and csv_path:
+    st.session_state["live_version_shown"] = data_utils.live_version(csv_path)
+
+    @st.fragment(run_every=LIVE_CHECK_INTERVAL_S)
+    def watch_live_feed():
+        if data_utils.live_version(csv_path) != st.session_state.get("live_version_shown"):
+            st.rerun()
+
+    watch_live_feed()
 
 # --------------------------------------------------
 # Load Data (one source only - from data_utils.py)
 # --------------------------------------------------
 
 csv_df = None
+data_dict = None
 
 if use_live_csv and csv_path:
-    csv_df = data_utils.read_latest_csv(csv_path)
+    # The logger's .bin record file is memory-mapped; a CSV is tailed and parsed.
+    # Either way only new rows are read, into the live window's ring buffers.
+    csv_df = data_utils.read_live_window(csv_path, data_utils.LIVE_WINDOWS[live_window])
 
-    if csv_df is None:
+    if csv_df is None or csv_df.empty:
         st.warning("Waiting for live data...")
         st.stop()
 
+# Static sources are parsed once and reused across reruns (cached in data_utils.py)
 elif uploaded_file is not None:
-    csv_df = data_utils.load_and_standardise_csv(uploaded_file)
+    csv_df, data_dict = data_utils.load_dataset(uploaded_file)
 
 elif use_local_path and local_path:
-    csv_df = data_utils.load_and_standardise_csv(local_path)
+    csv_df, data_dict = data_utils.load_dataset(local_path)
+
+elif db_query is not None:
+    csv_df, data_dict = data_utils.load_db_dataset(db_path, **db_query)
+
+    if csv_df.empty:
+        st.warning("No rows recorded for this session and time window.")
+        st.stop()
+
+elif archive_query is not None:
+    csv_df, data_dict = data_utils.load_archive_dataset(**archive_query)
+
+    if csv_df.empty:
+        st.warning("No rows archived for this session and time window.")
+        st.stop()
 
 # --------------------------------------------------
 # Build a Data Dictionary (from data_utils.py)
 # --------------------------------------------------
 
-if csv_df is not None:
-    data_dict = data_utils.build_data_dict_from_csv(csv_df)
-else:
+if csv_df is None:
     st.warning("No CSV provided. Using simulated data.")
     data_dict = data_utils.generate_data()
+elif data_dict is None:
+    data_dict = data_utils.build_data_dict_from_csv(csv_df)
 
 # --------------------------------------------------
 # Sidebar Controls (Depends on data_dict)
@@ -165,6 +376,10 @@ option = st.sidebar.selectbox(
 selected_data = data_dict[option]
 y_col = None if option == "Overview" else selected_data.columns[1]
 
+# Newest value of every sensor (from live_tracking.py, shared latest-reading cache)
+if use_live_csv and csv_path:
+    live_tracking.render_live_tracking(csv_path)
+
 st.write(f"Data for: {option}")
 
 # --------------------------------------------------
@@ -205,16 +420,15 @@ with tab2:
             step=1
         )
 
-    fig = plot_utils.plot_main_chart(
-        selected_data=selected_data,
-        option=option,
-        y_col=y_col,
-        thresholds=data_utils.thresholds,
-        iaq_thresholds=data_utils.iaq_thresholds,
-        time_point=time_point
-    )
+    # Rendered images are cached (plot_utils.py); the live chart reuses its artists
+    if use_live_csv:
+        chart_image = plot_utils.live_chart_image(
+            selected_data, option, y_col, theme, time_point, window=live_window
+        )
+    else:
+        chart_image = plot_utils.main_chart_image(selected_data, option, y_col, theme, time_point)
 
-    st.pyplot(fig)
+    st.image(chart_image, width="stretch")
 
     st.sidebar.subheader("Comparison Mode")
     enable_comparison = st.sidebar.checkbox("Enable Comparison Mode")
@@ -228,18 +442,53 @@ with tab2:
         )
 
         if compare_variables:
-            fig2 = plot_utils.plot_comparison(
+            comparison_image = plot_utils.comparison_image(
                 data_dict,
-                compare_variables
+                compare_variables,
+                theme
+            )
+            st.image(comparison_image, width="stretch")
+
+    # Session index: summaries of every listed session, in the ranked order
+    if use_catalog and catalog is not None and "Rows" in catalog:
+        with st.expander(f"Session index ({len(catalog)} sessions)"):
+            summary_cols = [c for c in catalog.columns
+                            if c in ("Rows", "Duration_s") or c.startswith(f"{catalog_variable}_")]
+            st.dataframe(catalog.set_index("label")[summary_cols], width="stretch")
+
+    # Sessions from the data catalog: each is parsed once (in parallel) and cached
+    if catalog_sessions:
+        st.subheader(f"Session Comparison: {catalog_variable}")
+        loaded = data_utils.load_sessions(catalog_sessions)
+        labels = {path: catalog_labels[path] for path in loaded}
+
+        wide = data_utils.align_sessions(
+            {labels[path]: csv_df_i for path, (csv_df_i, _) in loaded.items()},
+            catalog_variable,
+            align=catalog_align,
+            start_times={labels[path]: catalog_starts[path] for path in loaded}
+        )
+        if wide.empty:
+            st.info(f"None of the selected sessions recorded {catalog_variable}.")
+        else:
+            st.image(
+                plot_utils.session_overlay_image(wide, catalog_variable, theme),
+                width="stretch"
+            )
+            st.dataframe(
+                data_utils.compare_session_stats(
+                    {labels[path]: data_dict_i for path, (_, data_dict_i) in loaded.items()},
+                    catalog_variable
+                ).round(2),
+                width="stretch"
             )
-            st.pyplot(fig2)
 
 # -----------------------------------------------------
 # TAB 3 - Statistics Summary (from stats_util.py)
 # -----------------------------------------------------
 
 with tab3:
-    stats_util.render_statistics_tab(selected_data, option, y_col)
+    stats_util.render_statistics_tab(data_dict, option, live_path=csv_path if use_live_csv else None)
 
 # -----------------------------------------------------
 # TAB 4 - Reference Table (from reference_tables.py)
@@ -260,13 +509,43 @@ with tab5:
         [v for v in data_dict.keys() if v != "Overview"]
     )
 
-    df = data_dict[var].copy()
+    # data_dict views are shared: cleaning steps return new frames or work on copies
+    df = data_dict[var]
     y_col2 = df.columns[1]
 
+    df_clean = df
     if st.checkbox("Remove Outliers"):
-        df_clean = data_utils.remove_outliers(df, y_col2)
-    else:
-        df_clean = df.copy()
+        outlier_method = st.selectbox("Outlier method", data_utils.OUTLIER_METHODS)
+
+        outlier_window = 11
+        if outlier_method.startswith("Hampel"):
+            outlier_window = st.slider(
+                "Rolling window (samples)",
+                min_value=5,
+                max_value=61,
+                step=2,
+                value=11
+            )
+
+        outlier_threshold = st.slider(
+            "IQR multiplier" if outlier_method == "IQR" else "Threshold (standard deviations)",
+            min_value=0.5,
+            max_value=6.0,
+            step=0.5,
+            value=data_utils.OUTLIER_THRESHOLDS[outlier_method],
+            key=f"outlier_threshold_{outlier_method}"
+        )
+
+        if use_live_csv:
+            # Live feed: only readings that arrived since the last refresh are judged
+            df_clean = data_utils.remove_outliers_live(
+                df, y_col2, outlier_method, outlier_window, outlier_threshold, series_key=live_window
+            )
+        else:
+            df_clean = data_utils.remove_outliers(
+                df, y_col2, outlier_method, outlier_window, outlier_threshold
+            )
+        st.caption(f"{len(df) - len(df_clean)} of {len(df)} rows removed as outliers")
 
     smoothing_method = st.selectbox(
         "Smoothing Method",
@@ -282,13 +561,18 @@ with tab5:
         key=f"smoothing_window_{smoothing_method}"
     )
 
-    if smoothing_method == "Moving Average":
-        df_clean = data_utils.moving_average(df_clean, y_col2, window_size)
+    if smoothing_method != "None" and use_live_csv:
+        # Live feed: only rows that arrived since the last refresh are smoothed
+        df_clean = data_utils.smooth_live(
+            df_clean.copy(), y_col2, smoothing_method, window_size, series_key=live_window
+        )
+    elif smoothing_method == "Moving Average":
+        df_clean = data_utils.moving_average(df_clean.copy(), y_col2, window_size)
     elif smoothing_method == "Savitzky-Golay":
-        df_clean = data_utils.savgol_smoothing(df_clean, y_col2, window_size)
+        df_clean = data_utils.savgol_smoothing(df_clean.copy(), y_col2, window_size)
 
-    fig_clean = plot_utils.plot_raw_vs_cleaned(df, df_clean, y_col2)
-    st.pyplot(fig_clean)
+    clean_image = plot_utils.raw_vs_cleaned_image(df, df_clean, y_col2, theme)
+    st.image(clean_image, width="stretch")
 
 # --------------------------------------------------
 # TAB 6 - Download Data (from reporting_data.py)
@@ -0,0 +1,302 @@
+# data_sources.py
+# Master database (SQLite) and Parquet archive sources
+
+import os
+import sqlite3
+from contextlib import closing
+
+import pandas as pd
+
+
+# --------------------------------------------------
+# 1. MASTER DATABASE (SQLite) SOURCE
+# --------------------------------------------------
+
+# sensor_data column -> dashboard column name (same names as the session CSVs)
+DB_TO_CSV_COLUMNS = {
+    "elapsed_seconds": "Time (s)",
+    "location_note": "Location_Note",
+    "co2_ppm": "CO2_ppm",
+    "voc_ppm": "VOC_ppm",
+    "iaq": "IAQ",
+    "gas_res_ohms": "Gas_Res_Ohms",
+    "temp_raw_c": "Temp_Raw_C",
+    "temp_comp_c": "Temp_Comp_C",
+    "hum_raw_pct": "Hum_Raw_pct",
+    "hum_comp_pct": "Hum_Comp_pct",
+    "accuracy": "Accuracy"
+}
+
+DB_SENSOR_COLUMNS = [
+    c for c in DB_TO_CSV_COLUMNS.values() if c not in ("Time (s)", "Location_Note")
+]
+
+
+def _connect_db_readonly(db_path):
+    """
+    Open the master database read-only so the dashboard can never lock out
+    or modify the logger's writes.
+    """
+    return sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+
+
+def list_db_sessions(db_path):
+    """
+    List the sessions recorded in session_metadata (metadata only, no scan of
+    sensor_data). Returns None if the database cannot be read (missing file,
+    or an older schema without session_id - run db_schema.py first).
+    """
+    query = """
+        SELECT session_id, start_time, location
+        FROM session_metadata
+        ORDER BY session_id
+    """
+    try:
+        with closing(_connect_db_readonly(db_path)) as conn:
+            return pd.read_sql_query(query, conn)
+    except (sqlite3.Error, pd.errors.DatabaseError):
+        return None
+
+
+def get_db_session_span(db_path, session_id):
+    """
+    Return (row_count, first_elapsed_s, last_elapsed_s) for one session,
+    answered from the (session_id, elapsed_seconds) index.
+    """
+    query = """
+        SELECT COUNT(*), MIN(elapsed_seconds), MAX(elapsed_seconds)
+        FROM sensor_data
+        WHERE session_id = ?
+    """
+    with closing(_connect_db_readonly(db_path)) as conn:
+        return conn.execute(query, (int(session_id),)).fetchone()
+
+
+def load_db_session(db_path, session_id, start_s=None, end_s=None, columns=None, resolution=None):
+    """
+    Load one session from the master database, restricted to an elapsed-time
+    window and a subset of sensor columns. Filtering happens inside SQLite
+    (an index seek on session_id, elapsed_seconds), so only the requested
+    rows and columns ever reach pandas.
+    With a rollup resolution (seconds, see ROLLUP_RESOLUTIONS) one row per
+    bucket is read instead: the bucket's first elapsed second and the mean
+    of each column.
+    Returns a dataframe shaped like load_and_standardise_csv output.
+    """
+    csv_to_db = {v: k for k, v in DB_TO_CSV_COLUMNS.items()}
+    wanted = DB_SENSOR_COLUMNS if columns is None else [c for c in columns if c in DB_SENSOR_COLUMNS]
+
+    if resolution is not None:
+        select_sql = ", ".join(
+            ['elapsed_min AS "Time (s)"', 'location_note AS "Location_Note"'] +
+            [f'{csv_to_db[c]}_sum / row_count AS "{c}"' for c in wanted]
+        )
+        sql = f"SELECT {select_sql} FROM {rollup_table(resolution)} WHERE session_id = ?"
+        params = [int(session_id)]
+        # Buckets overlapping the window
+        if start_s is not None:
+            sql += " AND elapsed_max >= ?"
+            params.append(int(start_s))
+        if end_s is not None:
+            sql += " AND elapsed_min <= ?"
+            params.append(int(end_s))
+        sql += " ORDER BY elapsed_min"
+
+        with closing(_connect_db_readonly(db_path)) as conn:
+            return pd.read_sql_query(sql, conn, params=params)
+
+    # Column names come from the fixed mapping above, never from user input.
+    select_cols = ["Time (s)", "Location_Note"] + wanted
+    select_sql = ", ".join(f'{csv_to_db[c]} AS "{c}"' for c in select_cols)
+
+    sql = f"SELECT {select_sql} FROM sensor_data WHERE session_id = ?"
+    params = [int(session_id)]
+    if start_s is not None:
+        sql += " AND elapsed_seconds >= ?"
+        params.append(int(start_s))
+    if end_s is not None:
+        sql += " AND elapsed_seconds <= ?"
+        params.append(int(end_s))
+    sql += " ORDER BY elapsed_seconds"
+
+    with closing(_connect_db_readonly(db_path)) as conn:
+        return pd.read_sql_query(sql, conn, params=params)
+
+
+# Rollup tables kept by the logger (keep in step with db_schema.py):
+# per session and wall-clock bucket, the row count and min/max/sum of each column
+ROLLUP_RESOLUTIONS = (60, 900, 3600)
+ROLLUP_LABELS = {60: "1 min", 900: "15 min", 3600: "1 h"}
+# A chart is at most ~1000 px wide: coarser data than this no longer fills it
+ROLLUP_MIN_POINTS = 1000
+
+
+def rollup_table(resolution):
+    return f"sensor_rollup_{int(resolution)}s"
+
+
+def list_db_rollups(db_path):
+    """
+    Rollup resolutions (seconds) available in the database. Empty for
+    databases written before schema version 2 (run db_schema.py to add them).
+    """
+    try:
+        with closing(_connect_db_readonly(db_path)) as conn:
+            tables = {row[0] for row in conn.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    except sqlite3.Error:
+        return []
+    return [r for r in ROLLUP_RESOLUTIONS if rollup_table(r) in tables]
+
+
+def choose_rollup_resolution(span_s, available, min_points=ROLLUP_MIN_POINTS):
+    """
+    Coarsest available resolution that still gives at least min_points
+    buckets over span_s seconds, or None (raw rows) for shorter spans.
+    """
+    fitting = [r for r in available if span_s / r >= min_points]
+    return max(fitting) if fitting else None
+
+
+def load_db_rollup(db_path, resolution, columns=None, locations=None, start_time=None, end_time=None):
+    """
+    Pre-aggregated readings across sessions and pods (multi-day or multi-pod
+    views): one row per session and bucket, with the mean, min and max of
+    each column ("CO2_ppm", "CO2_ppm_min", "CO2_ppm_max"). Times are
+    wall-clock strings as in sensor_data.timestamp ("YYYY-MM-DD HH:MM:SS").
+    """
+    csv_to_db = {v: k for k, v in DB_TO_CSV_COLUMNS.items()}
+    wanted = DB_SENSOR_COLUMNS if columns is None else [c for c in columns if c in DB_SENSOR_COLUMNS]
+
+    select_sql = ", ".join(
+        ["session_id", 'location_note AS "location"', 'bucket_start AS "Timestamp"', "row_count"] +
+        [f'{csv_to_db[c]}_sum / row_count AS "{c}", {csv_to_db[c]}_min AS "{c}_min", '
+         f'{csv_to_db[c]}_max AS "{c}_max"' for c in wanted]
+    )
+    sql = f"SELECT {select_sql} FROM {rollup_table(resolution)} WHERE 1 = 1"
+    params = []
+    if locations:
+        sql += f" AND location_note IN ({', '.join('?' * len(locations))})"
+        params.extend(locations)
+    if start_time is not None:
+        sql += " AND bucket_start >= ?"
+        params.append(str(start_time))
+    if end_time is not None:
+        sql += " AND bucket_start <= ?"
+        params.append(str(end_time))
+    sql += " ORDER BY bucket_start, session_id"
+
+    with closing(_connect_db_readonly(db_path)) as conn:
+        df = pd.read_sql_query(sql, conn, params=params)
+    df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+    df["location"] = df["location"].astype("category")
+    return df
+
+
+# --------------------------------------------------
+# 2. PARQUET ARCHIVE SOURCE (written by archive_export.py)
+# --------------------------------------------------
+
+# Archive column -> dashboard column name
+ARCHIVE_TO_CSV_COLUMNS = {"Elapsed_Seconds": "Time (s)"}
+
+
+def list_archive_sessions(archive_dir):
+    """
+    List the session files in a location=/date= partitioned Parquet archive.
+    Row counts come from the file footers; no column data is read.
+    Returns None if the archive cannot be read (or pyarrow is not installed).
+    """
+    try:
+        import pyarrow.dataset as ds
+        dataset = ds.dataset(archive_dir, format="parquet", partitioning="hive")
+    except (ImportError, OSError, ValueError):
+        return None
+
+    rows = []
+    for fragment in dataset.get_fragments():
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        rows.append({
+            "session": os.path.splitext(os.path.basename(fragment.path))[0],
+            "location": keys.get("location"),
+            "date": keys.get("date"),
+            "rows": fragment.metadata.num_rows,
+            "path": fragment.path
+        })
+    return pd.DataFrame(rows, columns=["session", "location", "date", "rows", "path"])
+
+
+def get_archive_session_span(path):
+    """
+    Return (row_count, first_elapsed_s, last_elapsed_s) for one archived
+    session, taken from the row-group statistics in the file footer.
+    """
+    import pyarrow.parquet as pq
+
+    metadata = pq.ParquetFile(path).metadata
+    col = metadata.schema.names.index("Elapsed_Seconds")
+    stats = [metadata.row_group(i).column(col).statistics for i in range(metadata.num_row_groups)]
+    stats = [s for s in stats if s is not None and s.has_min_max]
+    if not stats:
+        return metadata.num_rows, None, None
+    return metadata.num_rows, min(s.min for s in stats), max(s.max for s in stats)
+
+
+def load_archive_session(path, start_s=None, end_s=None, columns=None, location=None):
+    """
+    Load one archived session, reading only the requested sensor columns and
+    only the row groups whose Elapsed_Seconds statistics overlap the window.
+    Returns a dataframe shaped like load_and_standardise_csv output.
+    """
+    import pyarrow.parquet as pq
+
+    wanted = DB_SENSOR_COLUMNS if columns is None else [c for c in columns if c in DB_SENSOR_COLUMNS]
+    filters = []
+    if start_s is not None:
+        filters.append(("Elapsed_Seconds", ">=", int(start_s)))
+    if end_s is not None:
+        filters.append(("Elapsed_Seconds", "<=", int(end_s)))
+
+    table = pq.read_table(path, columns=["Elapsed_Seconds"] + wanted, filters=filters or None)
+    df = table.to_pandas().rename(columns=ARCHIVE_TO_CSV_COLUMNS)
+    df.insert(1, "Location_Note", pd.Categorical([location] * len(df)))
+    return df
+
+
+def load_archive(archive_dir, columns=None, locations=None, start_date=None, end_date=None):
+    """
+    Read many archived sessions at once (e.g. one metric across every session
+    at a location). Location and date filters prune whole partitions before
+    any file is opened; columns prune within each file.
+    Returns one long dataframe with session, location and Timestamp columns.
+    """
+    import pyarrow.dataset as ds
+
+    dataset = ds.dataset(archive_dir, format="parquet", partitioning="hive")
+    wanted = DB_SENSOR_COLUMNS if columns is None else [c for c in columns if c in DB_SENSOR_COLUMNS]
+
+    partition_filter = None
+    conditions = []
+    if locations:
+        conditions.append(ds.field("location").isin(list(locations)))
+    if start_date is not None:
+        conditions.append(ds.field("date") >= str(start_date))
+    if end_date is not None:
+        conditions.append(ds.field("date") <= str(end_date))
+    for condition in conditions:
+        partition_filter = condition if partition_filter is None else partition_filter & condition
+
+    frames = []
+    for fragment in dataset.get_fragments(filter=partition_filter):
+        keys = ds.get_partition_keys(fragment.partition_expression)
+        df = fragment.to_table(columns=["Elapsed_Seconds", "Timestamp"] + wanted).to_pandas()
+        df.insert(0, "session", os.path.splitext(os.path.basename(fragment.path))[0])
+        df.insert(1, "location", keys.get("location"))
+        frames.append(df)
+
+    if not frames:
+        return pd.DataFrame(columns=["session", "location", "Elapsed_Seconds", "Timestamp"] + wanted)
+    df = pd.concat(frames, ignore_index=True)
+    df["session"] = df["session"].astype("category")
+    df["location"] = df["location"].astype("category")
+    return df.rename(columns=ARCHIVE_TO_CSV_COLUMNS)
@@ -1,148 +1,417 @@
 # data_utils.py
-# Data loading, cleaning, thresholds, anomaly detection
+# Data loading, cleaning, smoothing and the dataset caches.
+# The live feed, database/archive sources, thresholds and streaming
+# statistics have their own modules; their names are re-exported here so
+# the dashboard keeps importing everything from data_utils.
+
+import hashlib
+import io
+import os
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 
 import pandas as pd
 import numpy as np
 import streamlit as st
 
+from Dashboard_App.anomaly_utils import (
+    DISPLAY_TO_SENSOR,
+    thresholds,
+    iaq_thresholds,
+    anomaly_range,
+    anomaly_mask,
+    detect_anomalies,
+    is_anomaly,
+    IAQ_COLORS,
+    IN_RANGE_COLOR,
+    OUT_OF_RANGE_COLOR,
+    get_color,
+)
+from Dashboard_App.data_sources import (
+    DB_TO_CSV_COLUMNS,
+    DB_SENSOR_COLUMNS,
+    list_db_sessions,
+    get_db_session_span,
+    load_db_session,
+    ROLLUP_RESOLUTIONS,
+    ROLLUP_LABELS,
+    ROLLUP_MIN_POINTS,
+    rollup_table,
+    list_db_rollups,
+    choose_rollup_resolution,
+    load_db_rollup,
+    ARCHIVE_TO_CSV_COLUMNS,
+    list_archive_sessions,
+    get_archive_session_span,
+    load_archive_session,
+    load_archive,
+)
+from Dashboard_App.live_feed import (
+    CsvTailer,
+    read_latest_csv,
+    BIN_MAGIC,
+    BIN_FORMAT_VERSION,
+    BIN_HEADER_DTYPE,
+    BIN_RECORD_DTYPE,
+    BinaryTailer,
+    read_latest_binary,
+    LIVE_LEVELS,
+    LIVE_WINDOWS,
+    LIVE_WINDOW_MAX_ROWS,
+    RingBuffer,
+    LiveWindow,
+    read_live_window,
+    live_stats,
+    LIVE_POLL_INTERVAL_S,
+    LatestReadingCache,
+    latest_readings,
+    LIVE_WATCH_INTERVAL_S,
+    LIVE_WATCH_IDLE_S,
+    LiveFeedWatcher,
+    live_version,
+)
+from Dashboard_App.streaming_stats import (
+    SKETCH_COMPRESSION,
+    SAMPLE_GAP_LIMIT_S,
+    QuantileSketch,
+    RunningStats,
+    column_stats,
+    archive_stats,
+)
+
+
 # --------------------------------------------------
-# 1. DISPLAY NAME --> SENSOR COLUMN MAPPING
+# 1. CSV LOADING + STANDARDISATION
 # --------------------------------------------------
 
-DISPLAY_TO_SENSOR = {
-    "CO2 Levels (ppm)": "CO2_ppm",
-    "Temperature (°C)": "Temp_Comp_C",
-    "Humidity (%)": "Hum_Comp_pct",
-    "IAQ": "IAQ"
+# Column types written by the logger. Parsing straight into these avoids a
+# string round-trip per column and roughly halves memory versus int64/float64.
+CSV_DTYPES = {
+    "Elapsed_Seconds": "int32",
+    "Location_Note": "category",
+    "CO2_ppm": "int32",
+    "VOC_ppm": "float32",
+    "IAQ": "int32",
+    "Gas_Res_Ohms": "int32",
+    "Temp_Raw_C": "float32",
+    "Temp_Comp_C": "float32",
+    "Hum_Raw_pct": "float32",
+    "Hum_Comp_pct": "float32",
+    "Accuracy": "int32"
 }
 
+# pyarrow's multithreaded CSV reader is used when installed (optional dependency)
+try:
+    import pyarrow  # noqa: F401
+    CSV_ENGINE = "pyarrow"
+except ImportError:
+    CSV_ENGINE = "c"
 
-# --------------------------------------------------
-# 2. Adding Live Data Tracking from CSV file
-# ---------------------------------------------------
-def read_latest_csv(csv_path, tail=200):
+
+def read_csv_metadata(f):
     """
-    Read the most recent rows from a growing CSV file.
-    Skips metadata header automatically.
+    Read the '# Key,Value' session metadata block at the top of a logger CSV
+    from a binary file object. Leaves the file positioned at the data table
+    header and returns the metadata as a dict (e.g. Start Time, Location).
     """
-    try:
-        df = pd.read_csv(csv_path, skiprows=4)
-        if len(df) > tail:
-            df = df.tail(tail)
-        df = df.rename(columns={"Elapsed_Seconds": "Time (s)"})
-        return df
-    except Exception:
-        return None
+    metadata = {}
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            break
+        text = line.decode("utf-8").strip()
+        if text.startswith("#"):
+            key, _, value = text.lstrip("# ").partition(",")
+            if value:
+                metadata[key.strip()] = value.strip()
+        elif text:
+            # First non-comment, non-blank line is the column header
+            f.seek(pos)
+            break
+    return metadata
+
+
+def _coerce_numeric(df, dtypes):
+    """
+    Fallback for files with blanks or stray text in numeric columns:
+    coerce to numbers, then downcast (int columns holding NaN become float32).
+    """
+    for col, dtype in dtypes.items():
+        if col not in df.columns or dtype == "category":
+            continue
+        values = pd.to_numeric(df[col], errors="coerce")
+        if dtype == "int32" and values.notna().all():
+            df[col] = values.astype("int32")
+        else:
+            df[col] = values.astype("float32")
+    return df
 
-# --------------------------------------------------
-# 3. CSV LOADING + STANDARDISATION
-# --------------------------------------------------
 
 def load_and_standardise_csv(path_or_buffer):
     """
     Load CSV file and standardise column names and types.
+    The metadata block is parsed rather than skipped by line count and is kept
+    in df.attrs["metadata"]. Columns are parsed directly into the logger's
+    dtype schema (CSV_DTYPES), falling back to lenient numeric coercion only
+    if a file contains blanks or non-numeric values.
     """
-    df = pd.read_csv(path_or_buffer, skiprows=4)
-
-    expected_columns = [
-        "Elapsed_Seconds",
-        "Location_Note",
-        "CO2_ppm",
-        "VOC_ppm",
-        "IAQ",
-        "Gas_Res_Ohms",
-        "Temp_Raw_C",
-        "Temp_Comp_C",
-        "Hum_Raw_pct",
-        "Hum_Comp_pct",
-        "Accuracy"
-    ]
-
-    missing = [c for c in expected_columns if c not in df.columns]
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        f = open(path_or_buffer, "rb")
+    else:
+        f = path_or_buffer
+        f.seek(0)
+
+    try:
+        metadata = read_csv_metadata(f)
+        data_start = f.tell()
+        try:
+            df = pd.read_csv(f, dtype=CSV_DTYPES, engine=CSV_ENGINE)
+        except (ValueError, TypeError):
+            f.seek(data_start)
+            df = pd.read_csv(f, dtype={"Location_Note": "category"})
+            df = _coerce_numeric(df, CSV_DTYPES)
+    finally:
+        if f is not path_or_buffer:
+            f.close()
+
+    df.attrs["metadata"] = metadata
+
+    missing = [c for c in CSV_DTYPES if c not in df.columns]
     if missing:
         st.warning(f"Missing columns in CSV: {missing}")
 
     # Rename time column
     df = df.rename(columns={"Elapsed_Seconds": "Time (s)"})
 
-    numeric_cols = [
-        "Time (s)",
-        "CO2_ppm",
-        "VOC_ppm",
-        "IAQ",
-        "Gas_Res_Ohms",
-        "Temp_Raw_C",
-        "Temp_Comp_C",
-        "Hum_Raw_pct",
-        "Hum_Comp_pct",
-        "Accuracy"
-    ]
-
-    for col in numeric_cols:
-        if col in df.columns:
-            df[col] = (
-                df[col]
-                .astype(str)
-                .str.strip()
-                .replace("", pd.NA)
-            )
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
     return df
 
 
+class SessionDataDict(Mapping):
+    """
+    Read-only data_dict backed by a single standardised dataframe.
+    data_dict[var] returns a two-column ("Time (s)", var) frame and
+    data_dict["Overview"] a frame of every numeric column; both share the
+    underlying column arrays instead of copying them. Views are built on first
+    access and reused. Copy a view before mutating it.
+    """
+
+    def __init__(self, csv_df):
+        self.frame = csv_df
+        self.sensor_cols = [c for c in csv_df.columns if c not in ["Time (s)", "Location_Note"]]
+        self._views = {}
+        self._stats = {}
+
+    def _view(self, cols):
+        # copy=False: the new frame references the existing column arrays
+        return pd.DataFrame({c: self.frame[c] for c in cols}, copy=False)
+
+    def __getitem__(self, var):
+        if var not in self._views:
+            if var == "Overview":
+                self._views[var] = self._view(["Time (s)"] + self.sensor_cols)
+            elif var in self.sensor_cols:
+                self._views[var] = self._view(["Time (s)", var])
+            else:
+                raise KeyError(var)
+        return self._views[var]
+
+    def stats(self, var):
+        """RunningStats for one variable, computed on first use and kept with the data."""
+        if var not in self._stats:
+            self._stats[var] = column_stats(self[var], var)
+        return self._stats[var]
+
+    def __iter__(self):
+        return iter(self.sensor_cols + ["Overview"])
+
+    def __len__(self):
+        return len(self.sensor_cols) + 1
+
 
 def build_data_dict_from_csv(csv_df):
     """
     Convert CSV dataframe into the data_dict structure used by the dashboard.
+    Returns a SessionDataDict: same [var] access and column layout as a dict
+    of per-variable frames, without copying any column data.
     """
-    data_dict = {}
+    return SessionDataDict(csv_df)
 
-    for col in csv_df.columns:
-        if col not in ["Time (s)", "Location_Note"]:
-            data_dict[col] = csv_df[["Time (s)", col]].copy()
 
-    numeric_cols = [c for c in csv_df.columns if c not in ["Time (s)", "Location_Note"]]
-    data_dict["Overview"] = csv_df[["Time (s)"] + numeric_cols].copy()
+# -------------------------------
+# 2. Adding Moving Data Average
+# -------------------------------
 
-    return data_dict
 
+def moving_average_values(y, window=5):
+    """
+    Centred moving average (same as pandas rolling(window, center=True,
+    min_periods=1).mean()), computed from running sums in O(n) whatever the
+    window. Windows are truncated at the ends; NaNs are skipped.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    valid = ~np.isnan(y)
+    sums = np.concatenate(([0.0], np.cumsum(np.where(valid, y, 0.0))))
+    counts = np.concatenate(([0], np.cumsum(valid)))
 
-# -------------------------------
-# 4. Adding Moving Data Average
-# -------------------------------
+    # Point i averages y[i - window // 2 : i - window // 2 + window], clipped at the ends
+    n = len(y)
+    start = np.clip(np.arange(n) - window // 2, 0, n)
+    end = np.clip(np.arange(n) - window // 2 + window, 0, n)
+
+    count = counts[end] - counts[start]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(count > 0, (sums[end] - sums[start]) / count, np.nan)
 
 
 def moving_average(df, col, window=5):
-    df[col] = df[col].rolling(
-        window=window,
-        center=True,
-        min_periods=1
-    ).mean()
+    df[col] = moving_average_values(df[col].to_numpy(), window)
     return df
 
 # ------------------------------------------
-# 5. Adding Moving Savitzky-Golay Smoothing
+# 3. Adding Moving Savitzky-Golay Smoothing
 # ------------------------------------------
 
+
+@lru_cache(maxsize=32)
+def savgol_coefficients(window, polyorder):
+    """
+    Savitzky-Golay weights for one (window, polyorder), computed once.
+    Returns (centre, left_edge, right_edge): the convolution weights for the
+    centre of a full window, and the matrices that evaluate the polynomial
+    fitted to the first/last window at the first/last window // 2 points
+    (scipy's mode="interp").
+    """
+    half = window // 2
+    offsets = np.arange(window) - half
+    # Least-squares polynomial fit over one window: poly = fit @ y_window
+    fit = np.linalg.pinv(np.vander(offsets, polyorder + 1, increasing=True))
+    evaluate = np.vander(offsets, polyorder + 1, increasing=True) @ fit
+
+    centre = evaluate[half]
+    left_edge = evaluate[:half]
+    right_edge = evaluate[window - half:]
+    for weights in (centre, left_edge, right_edge):
+        weights.setflags(write=False)
+    return centre, left_edge, right_edge
+
+
+def savgol_values(y, window=5, polyorder=2):
+    """
+    Savitzky-Golay smoothing as one np.convolve with cached weights, matching
+    scipy.signal.savgol_filter(y, window, polyorder) for odd windows.
+    Series shorter than the window are returned unchanged.
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if len(y) < window:
+        return y.copy()
+
+    centre, left_edge, right_edge = savgol_coefficients(window, polyorder)
+    half = window // 2
+
+    out = np.empty_like(y)
+    # Weights are symmetric about the centre, so convolution needs no flip
+    out[half:len(y) - half] = np.convolve(y, centre[::-1], mode="valid")
+    out[:half] = left_edge @ y[:window]
+    out[len(y) - half:] = right_edge @ y[-window:]
+    return out
+
+
 def savgol_smoothing(df, col, window=5, polyorder=2):
     """
     Apply Savitzky-Golay smoothing to a dataframe column.
     """
-    from scipy.signal import savgol_filter
+    df[col] = savgol_values(df[col].to_numpy(), window, polyorder)
+    return df
+
+
+SMOOTHING_METHODS = {
+    "Moving Average": lambda y, window, polyorder: moving_average_values(y, window),
+    "Savitzky-Golay": savgol_values
+}
 
-    if len(df[col]) >= window:
-        df[col] = savgol_filter(
-            df[col],
-            window_length=window,
-            polyorder=polyorder
-        )
 
+class IncrementalSmoother:
+    """
+    Smoothing for a live series that only does work for new rows.
+    Points whose full window has arrived are smoothed once and kept; only the
+    last window // 2 points (still waiting for later samples) are recomputed
+    on each update. Results are identical to smoothing the whole series.
+    """
+
+    def __init__(self, method, window, polyorder=2, keep_rows=5000):
+        self.smooth = SMOOTHING_METHODS[method]
+        self.window = window
+        self.polyorder = polyorder
+        self.keep_rows = keep_rows
+        self._reset()
+
+    def _reset(self):
+        self.times = np.empty(0)
+        self.raw = np.empty(0)
+        self.final = np.empty(0)  # smoothed values that can no longer change
+
+    def update(self, times, values):
+        """
+        Feed the latest rows (times ascending) and return smoothed values for
+        them. Rows already seen are skipped; a series that does not continue
+        the previous one (new session, or a gap longer than the rows given)
+        starts the smoother again.
+        """
+        times = np.asarray(times)
+        values = np.asarray(values, dtype=np.float64)
+
+        if len(self.times) and not (len(times) and times[0] <= self.times[-1] <= times[-1]):
+            self._reset()
+        new = times > self.times[-1] if len(self.times) else np.ones(len(times), dtype=bool)
+        self.times = np.concatenate((self.times, times[new]))
+        self.raw = np.concatenate((self.raw, values[new]))
+
+        half = self.window // 2
+        n = len(self.raw)
+
+        # 1. Finalise every point that now has its full window
+        n_final = len(self.final)
+        ready = n - half if n >= self.window else 0
+        if ready > n_final:
+            start = max(0, n_final - half)
+            segment = self.smooth(self.raw[start:ready + half], self.window, self.polyorder)
+            self.final = np.concatenate((self.final, segment[n_final - start:ready - start]))
+            n_final = ready
+
+        # 2. The trailing points depend on the last window only
+        start = max(0, min(n_final - half, n - self.window))
+        pending = self.smooth(self.raw[start:], self.window, self.polyorder)[n_final - start:]
+        result = np.concatenate((self.final, pending))
+
+        # 3. Keep memory bounded (retain enough raw context for the next update)
+        drop = min(n - self.keep_rows, n_final - self.window)
+        if drop > 0:
+            self.times = self.times[drop:]
+            self.raw = self.raw[drop:]
+            self.final = self.final[drop:]
+
+        return result[len(result) - len(times):]
+
+
+def smooth_live(df, col, method, window, polyorder=2, series_key=""):
+    """
+    Smooth a live dataframe column incrementally. One IncrementalSmoother per
+    browser session, column, setting and series_key (e.g. the live window,
+    whose resolution differs) is kept in st.session_state.
+    """
+    key = f"smoother_{col}_{method}_{window}_{polyorder}_{series_key}"
+    smoother = st.session_state.get(key)
+    if smoother is None:
+        smoother = st.session_state[key] = IncrementalSmoother(method, window, polyorder)
+
+    df[col] = smoother.update(df["Time (s)"].to_numpy(), df[col].to_numpy())
     return df
 
 
 # -------------------------------------------------------------------
-# 6. SIMULATED DATA (fallback in case no CSV file has been uploaded) 
+# 4. SIMULATED DATA (fallback in case no CSV file has been uploaded) 
 # -------------------------------------------------------------------
 
 def generate_data():
@@ -174,35 +443,551 @@ def generate_data():
     }
     return data_dict
 
+
+# --------------------------------------------------
+# 5. DOWNSAMPLING FOR CHARTS
+# --------------------------------------------------
+
+def lttb_indices(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+    Returns the indices of n_out points (first and last always included)
+    that best preserve the visual shape of the series.
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # Bucket i covers [starts[i], ends[i]); the first and last points sit alone
+    every = (n - 2) / (n_out - 2)
+    starts = (np.floor(np.arange(n_out - 2) * every) + 1).astype(int)
+    ends = (np.floor(np.arange(1, n_out - 1) * every) + 1).astype(int)
+    ends[-1] = n - 1
+
+    # Mean of each "next" bucket, computed once for all buckets (the final
+    # bucket's successor is the last point)
+    counts = np.diff(np.append(ends, n))
+    avg_x = np.add.reduceat(x, ends) / counts
+    avg_y = np.add.reduceat(y, ends) / counts
+
+    out = np.empty(n_out, dtype=int)
+    out[0], out[-1] = 0, n - 1
+    a = 0
+
+    for i in range(n_out - 2):
+        s, e = starts[i], ends[i]
+
+        # Triangle area between the previous pick, each candidate and the next bucket's mean
+        area = np.abs(
+            (x[a] - avg_x[i]) * (y[s:e] - y[a])
+            - (x[a] - x[s:e]) * (avg_y[i] - y[a])
+        )
+        a = s + int(np.argmax(area))
+        out[i + 1] = a
+
+    return out
+
+
+def minmax_indices(y, n_buckets):
+    """
+    Min/max-preserving decimation: the indices of the minimum and maximum of
+    each of n_buckets equal buckets, so spikes are never lost.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+
+    if n <= 2 * n_buckets or n_buckets < 1:
+        return np.arange(n)
+
+    size = int(np.ceil(n / n_buckets))
+    n_buckets = int(np.ceil(n / size))
+    padded = np.full(n_buckets * size, np.nan)
+    padded[:n] = y
+    buckets = padded.reshape(n_buckets, size)
+
+    offsets = np.arange(n_buckets) * size
+    lo = offsets + np.argmin(np.where(np.isnan(buckets), np.inf, buckets), axis=1)
+    hi = offsets + np.argmax(np.where(np.isnan(buckets), -np.inf, buckets), axis=1)
+
+    idx = np.unique(np.concatenate([lo, hi, [0, n - 1]]))
+    return idx[idx < n]
+
+
+def decimate_indices(x, y, n_out, method="lttb", keep_mask=None):
+    """
+    Indices of the points to draw for a series, about n_out of them
+    (typically the chart's width in pixels). Points flagged in keep_mask
+    (e.g. anomalies) are always kept; if there are more of them than pixels,
+    the min and max of the flagged points in each pixel column are kept, so
+    every anomalous excursion stays visible. NaN values are left out of LTTB.
+    """
+    y = np.asarray(y, dtype=float)
+
+    if method == "minmax":
+        idx = minmax_indices(y, max(1, n_out // 2))
+    else:
+        finite = np.flatnonzero(np.isfinite(y))
+        idx = finite[lttb_indices(np.asarray(x, dtype=float)[finite], y[finite], n_out)]
+
+    if keep_mask is not None:
+        keep = np.flatnonzero(keep_mask)
+        if len(keep) > n_out:
+            keep = keep[minmax_indices(y[keep], max(1, n_out // 2))]
+        idx = np.union1d(idx, keep)
+
+    return idx
+
+
 # --------------------------------------------------
-# 7. THRESHOLDS + ANOMALY DETECTION
+# 6. PARSED DATASET CACHE (shared across reruns and users)
 # --------------------------------------------------
 
-thresholds = {
-    "CO2_ppm": (600, 1200),
-    "VOC_ppm": (0, 5),
-    "Temp_Comp_C": (18, 26),
-    "Hum_Comp_pct": (30, 60),
-    "IAQ": (50, 150),
+# Number of parsed datasets kept in memory; the least recently used is evicted.
+DATASET_CACHE_SIZE = 8
+
+
+@st.cache_resource(max_entries=DATASET_CACHE_SIZE, show_spinner=False)
+def _load_dataset(cache_key, _load):
+    """
+    Run a loader once per cache key and keep both the standardised dataframe
+    and its data_dict. The loader itself (underscore argument) is not hashed:
+    the key alone identifies the data. Results are shared, not copied, so
+    callers must .copy() before mutating (as the cleaning tab does).
+    """
+    csv_df = _load()
+    return csv_df, build_data_dict_from_csv(csv_df)
+
+
+def frame_fingerprint(*frames):
+    """
+    Content hash of one or more dataframes (values and column names), used to
+    key caches of things derived from the data - reports, exports, figures.
+    Vectorised: about a millisecond for a 30k-row session.
+    """
+    digest = hashlib.sha1()
+    for df in frames:
+        digest.update(repr(list(df.columns)).encode("utf-8"))
+        digest.update(pd.util.hash_pandas_object(df, index=False).values.tobytes())
+    return digest.hexdigest()
+
+
+def _file_cache_key(path):
+    """Cache key for a local file: path, modification time and size."""
+    stat = os.stat(path)
+    return ("path", path, stat.st_mtime_ns, stat.st_size)
+
+
+def load_dataset(path_or_buffer):
+    """
+    Cached load_and_standardise_csv + build_data_dict_from_csv.
+    Local files are keyed by path, modification time and size; uploaded files
+    by a hash of their content. Returns (csv_df, data_dict).
+    """
+    if isinstance(path_or_buffer, (str, os.PathLike)):
+        path = os.path.abspath(path_or_buffer)
+        return _load_dataset(_file_cache_key(path), lambda: load_and_standardise_csv(path))
+
+    content = path_or_buffer.getvalue()
+    cache_key = ("content", hashlib.sha1(content).hexdigest())
+    return _load_dataset(cache_key, lambda: load_and_standardise_csv(io.BytesIO(content)))
+
+
+def load_db_dataset(db_path, session_id, start_s=None, end_s=None, columns=None, resolution=None):
+    """
+    Cached load_db_session + build_data_dict_from_csv, keyed by the query and
+    the database file's modification time (so new logger writes are picked up).
+    Returns (csv_df, data_dict).
+    """
+    path = os.path.abspath(db_path)
+    stat = os.stat(path)
+    cache_key = (
+        "db", path, stat.st_mtime_ns, stat.st_size,
+        int(session_id), start_s, end_s, None if columns is None else tuple(columns), resolution
+    )
+    return _load_dataset(
+        cache_key,
+        lambda: load_db_session(path, session_id, start_s, end_s, columns, resolution)
+    )
+
+
+def load_archive_dataset(path, start_s=None, end_s=None, columns=None, location=None):
+    """
+    Cached load_archive_session + build_data_dict_from_csv, keyed by the file,
+    its modification time and the requested window/columns.
+    Returns (csv_df, data_dict).
+    """
+    path = os.path.abspath(path)
+    stat = os.stat(path)
+    cache_key = (
+        "parquet", path, stat.st_mtime_ns, stat.st_size,
+        start_s, end_s, None if columns is None else tuple(columns), location
+    )
+    return _load_dataset(
+        cache_key,
+        lambda: load_archive_session(path, start_s, end_s, columns, location)
+    )
+
+
+# --------------------------------------------------
+# 7. OUTLIER REMOVAL
+# --------------------------------------------------
+
+OUTLIER_METHODS = ["Hampel (rolling median/MAD)", "IQR", "Z-score"]
+# Default threshold per method: IQR multiplier, or number of (robust) standard deviations
+OUTLIER_THRESHOLDS = {"Hampel (rolling median/MAD)": 3.0, "IQR": 1.5, "Z-score": 3.0}
+# Scale a median / mean absolute deviation to a standard deviation (normal data)
+MAD_SCALE = 1.4826
+MEAN_AD_SCALE = 1.2533
+
+
+def hampel_mask(values, window=11, threshold=3.0):
+    """
+    Hampel filter flags: points further than `threshold` robust standard
+    deviations from the centred rolling median. The spread is the rolling
+    median of each point's absolute deviation from its own window median, or
+    their rolling mean where that median is zero (flat stretches of
+    whole-number readings). Rolling medians use pandas' skiplist, O(n log window).
+    """
+    y = pd.Series(np.asarray(values, dtype=np.float64))
+    deviation = (y - y.rolling(window, center=True, min_periods=1).median()).abs()
+    rolling_dev = deviation.rolling(window, center=True, min_periods=1)
+
+    mad = rolling_dev.median().to_numpy()
+    scale = np.where(mad > 0, MAD_SCALE * mad, MEAN_AD_SCALE * rolling_dev.mean().to_numpy())
+    with np.errstate(invalid="ignore"):
+        return (scale > 0) & (deviation.to_numpy() > threshold * scale)
+
+
+def outlier_mask(values, method="Hampel (rolling median/MAD)", window=11, threshold=None):
+    """
+    Vectorised outlier flags for a whole series (True = outlier).
+    Hampel: see hampel_mask.
+    IQR: outside [Q1 - k*IQR, Q3 + k*IQR] of the whole series.
+    Z-score: further than `threshold` standard deviations from the mean.
+    NaNs are never flagged.
+    """
+    y = np.asarray(values, dtype=np.float64)
+    threshold = OUTLIER_THRESHOLDS[method] if threshold is None else threshold
+    if len(y) == 0 or np.isnan(y).all():
+        return np.zeros(len(y), dtype=bool)
+
+    if method == "Hampel (rolling median/MAD)":
+        return hampel_mask(y, window, threshold)
+
+    with np.errstate(invalid="ignore"):
+        if method == "IQR":
+            q1, q3 = np.nanpercentile(y, [25, 75])
+            spread = threshold * (q3 - q1)
+            return (y < q1 - spread) | (y > q3 + spread)
+
+        if method == "Z-score":
+            std = np.nanstd(y)
+            if not std:
+                return np.zeros(len(y), dtype=bool)
+            return np.abs(y - np.nanmean(y)) > threshold * std
+
+    raise ValueError(f"Unknown outlier method: {method}")
+
+
+def remove_outliers(df, col, method="Hampel (rolling median/MAD)", window=11, threshold=None):
+    """
+    Drop the rows whose `col` value is an outlier (see outlier_mask).
+    """
+    mask = outlier_mask(df[col].to_numpy(), method, window, threshold)
+    return df[~mask].reset_index(drop=True)
+
+
+class OutlierStream:
+    """
+    Outlier detection for a live series, doing work only for new rows.
+    Hampel: like IncrementalSmoother, a point's flag is final once the
+        readings its windows depend on (2 * (window // 2) either side) have
+        arrived; only the newest points are re-judged on each update. Results
+        match hampel_mask on the whole series.
+    IQR / Z-score: the whole-session statistics keep changing, so each new
+        reading is judged once, on arrival, against the `window` readings
+        before it. A window with no spread flags nothing.
+    """
+
+    def __init__(self, method, window=11, threshold=None, keep_rows=5000):
+        self.method = method
+        self.window = window
+        self.threshold = OUTLIER_THRESHOLDS[method] if threshold is None else threshold
+        self.keep_rows = keep_rows
+        self._reset()
+
+    def _reset(self):
+        self.times = np.empty(0)
+        self.raw = np.empty(0)
+        self.flags = np.empty(0, dtype=bool)  # final flags
+
+    def _judge_trailing(self, new):
+        """IQR / Z-score flags for `new` readings, each against the `window` readings before it."""
+        # Row i of `windows` holds the readings before new[i] (NaN-padded at the start)
+        padded = np.concatenate((np.full(self.window, np.nan), self.raw[-self.window:], new))
+        windows = np.lib.stride_tricks.sliding_window_view(padded[:-1], self.window)[-len(new):]
+
+        flags = np.zeros(len(new), dtype=bool)
+        enough = np.sum(~np.isnan(windows), axis=1) >= 3
+        if not enough.any():
+            return flags
+        windows, values = windows[enough], new[enough]
+
+        with np.errstate(invalid="ignore"):
+            if self.method == "IQR":
+                q1, q3 = np.nanpercentile(windows, [25, 75], axis=1)
+                spread = self.threshold * (q3 - q1)
+                flags[enough] = (spread > 0) & ((values < q1 - spread) | (values > q3 + spread))
+            else:
+                std = np.nanstd(windows, axis=1)
+                flags[enough] = (std > 0) & (np.abs(values - np.nanmean(windows, axis=1)) > self.threshold * std)
+        return flags
+
+    def update(self, times, values):
+        """
+        Feed the latest rows (times ascending) and return their outlier flags.
+        A series that does not continue the previous one starts again.
+        """
+        times = np.asarray(times)
+        values = np.asarray(values, dtype=np.float64)
+
+        if len(self.times) and not (len(times) and times[0] <= self.times[-1] <= times[-1]):
+            self._reset()
+        new = times > self.times[-1] if len(self.times) else np.ones(len(times), dtype=bool)
+
+        if self.method != "Hampel (rolling median/MAD)":
+            if new.any():
+                self.flags = np.concatenate((self.flags, self._judge_trailing(values[new])))
+            result = self.flags
+        self.times = np.concatenate((self.times, times[new]))
+        self.raw = np.concatenate((self.raw, values[new]))
+
+        if self.method == "Hampel (rolling median/MAD)":
+            # Flags depend on readings up to `reach` samples either side
+            reach = 2 * (self.window // 2)
+            n, n_final = len(self.raw), len(self.flags)
+            start = max(0, n_final - reach)
+            segment = hampel_mask(self.raw[start:], self.window, self.threshold)
+            ready = max(n_final, n - reach)
+            self.flags = np.concatenate((self.flags, segment[n_final - start:ready - start]))
+            result = np.concatenate((self.flags, segment[ready - start:]))
+
+        # Keep memory bounded (with enough raw context for the next update)
+        self.keep_rows = max(self.keep_rows, len(times))
+        drop = min(len(self.raw) - self.keep_rows, len(self.flags) - 2 * self.window)
+        if drop > 0:
+            self.times = self.times[drop:]
+            self.raw = self.raw[drop:]
+            self.flags = self.flags[drop:]
+
+        return result[len(result) - len(times):]
+
+
+def remove_outliers_live(df, col, method="Hampel (rolling median/MAD)", window=11, threshold=None,
+                         series_key=""):
+    """
+    remove_outliers for the live feed. One OutlierStream per browser session,
+    column, setting and series_key (see smooth_live) is kept in st.session_state.
+    """
+    key = f"outliers_{col}_{method}_{window}_{threshold}_{series_key}"
+    stream = st.session_state.get(key)
+    if stream is None:
+        stream = st.session_state[key] = OutlierStream(method, window, threshold)
+
+    mask = stream.update(df["Time (s)"].to_numpy(), df[col].to_numpy())
+    return df[~mask].reset_index(drop=True)
+
+
+# --------------------------------------------------
+# 8. DATASET STATISTICS (accumulators in streaming_stats.py)
+# --------------------------------------------------
+
+def dataset_stats(data_dict, var):
+    """
+    Statistics for data_dict[var]. A SessionDataDict (every cached source)
+    computes them once and keeps them with the dataset, so reruns, users and
+    the PDF report share one result.
+    """
+    if isinstance(data_dict, SessionDataDict):
+        return data_dict.stats(var)
+    # Keys and value columns can differ (generate_data: "CO2 Levels (ppm)" holds "CO2 (ppm)")
+    df = data_dict[var]
+    return column_stats(df, df.columns[1], var)
+
+
+# --------------------------------------------------
+# 9. SESSION CATALOG + MULTI-SESSION COMPARISON
+# --------------------------------------------------
+
+# Threads used to parse sessions that are not cached yet (the C parser releases the GIL)
+SESSION_LOAD_WORKERS = 4
+# Compared sessions have their own cache, so loading other data never evicts
+# them; the dashboard lets at most this many be compared at once.
+MAX_COMPARED_SESSIONS = 24
+ALIGN_MODES = ["Elapsed time", "Wall clock"]
+
+# Per-session summaries kept by the logger next to the catalog (see Python_Data_Logger/session_index.py)
+SESSION_INDEX_FILENAME = "_Experiment_Session_Index.csv"
+
+# Ranking label -> (index column suffix, largest first); None keeps catalog (start time) order
+SESSION_RANKINGS = {
+    "Start time": None,
+    "Highest maximum": ("max", True),
+    "Highest mean": ("mean", True),
+    "Lowest minimum": ("min", False),
+    "Most readings above range": ("above", True),
+    "Most readings below range": ("below", True),
+    "Longest duration": ("Duration_s", True),
 }
 
-iaq_thresholds = (50, 100, 150, 200, 250, 300, 1000)
+
+def load_session_index(index_path):
+    """
+    Read the logger's session summary index: one row per session CSV with its
+    row count, duration, min/max/mean per metric ("<column>_min" ...),
+    readings below/above the thresholds ("<column>_below", "<column>_above")
+    and a content hash. Filters such as index[index["CO2_ppm_max"] > 1200]
+    need no raw data. Returns None if there is no index.
+    """
+    try:
+        return pd.read_csv(index_path)
+    except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        return None
 
 
-def is_anomaly(var, val):
+def load_catalog(catalog_path):
     """
-    Determine whether a value is an anomaly based on thresholds.
-    Accepts either display names or sensor keys.
+    Read the logger's _Experiment_Data_Catalog.csv. Session CSV paths are
+    resolved relative to the catalog's folder; sessions whose file is missing
+    are dropped. Summary columns from the session index in the same folder
+    are joined on when it exists. Returns None if the catalog cannot be read.
     """
-    from data_utils import DISPLAY_TO_SENSOR
+    try:
+        catalog = pd.read_csv(catalog_path)
+    except (OSError, pd.errors.ParserError, pd.errors.EmptyDataError):
+        return None
+
+    folder = os.path.dirname(os.path.abspath(catalog_path))
+    catalog["path"] = [os.path.join(folder, f) for f in catalog["CSV_Filename"].astype(str)]
+    catalog = catalog[[os.path.exists(p) for p in catalog["path"]]].reset_index(drop=True)
+
+    index = load_session_index(os.path.join(folder, SESSION_INDEX_FILENAME))
+    if index is not None:
+        summary_cols = [c for c in index.columns if c not in catalog.columns]
+        catalog = catalog.merge(index[["CSV_Filename"] + summary_cols], on="CSV_Filename", how="left")
+    catalog["Session_Start_Time"] = pd.to_datetime(catalog["Session_Start_Time"], errors="coerce")
+    catalog["label"] = (
+        catalog["Session_Start_Time"].dt.strftime("%Y-%m-%d %H:%M") + " - " + catalog["Location"].astype(str)
+    )
+    return catalog
+
+
+def rank_sessions(catalog, col, ranking="Start time", breached_only=False):
+    """
+    Order catalog sessions by a summary of one column (see SESSION_RANKINGS)
+    using only the index columns; breached_only keeps sessions with at least
+    one reading outside the threshold range. Sessions without a summary sort
+    last (and are dropped by breached_only).
+    """
+    if breached_only:
+        below = catalog.get(f"{col}_below", pd.Series(0, index=catalog.index))
+        above = catalog.get(f"{col}_above", pd.Series(0, index=catalog.index))
+        catalog = catalog[(below.fillna(0) + above.fillna(0)) > 0]
+
+    rank = SESSION_RANKINGS.get(ranking)
+    if rank is None:
+        return catalog
+    suffix, largest_first = rank
+    key = suffix if suffix in catalog else f"{col}_{suffix}"
+    if key not in catalog:
+        return catalog
+    return catalog.sort_values(key, ascending=not largest_first, na_position="last", kind="stable")
+
 
-    sensor_key = DISPLAY_TO_SENSOR.get(var, var)
+@st.cache_resource(max_entries=MAX_COMPARED_SESSIONS, show_spinner=False)
+def _load_compared_session(cache_key, _load):
+    """As _load_dataset, in the cache kept for session comparisons."""
+    csv_df = _load()
+    return csv_df, build_data_dict_from_csv(csv_df)
 
-    if sensor_key == "IAQ":
-        return val > iaq_thresholds[-1]
 
-    if sensor_key in thresholds:
-        low, high = thresholds[sensor_key]
-        return val < low or val > high
+def _load_session(path):
+    path = os.path.abspath(path)
+    return _load_compared_session(_file_cache_key(path), lambda: load_and_standardise_csv(path))
 
-    return False
+
+def load_sessions(paths, max_workers=SESSION_LOAD_WORKERS):
+    """
+    Load several session CSVs, in parallel, into the comparison cache (up to
+    MAX_COMPARED_SESSIONS files). Sessions already cached are returned
+    straight away, so adding a session to a comparison only parses the new one.
+    Returns {path: (csv_df, data_dict)} in the order given.
+    """
+    paths = list(dict.fromkeys(paths))
+    if len(paths) <= 1:
+        return {path: _load_session(path) for path in paths}
+
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as pool:
+        return dict(zip(paths, pool.map(_load_session, paths)))
+
+
+def align_sessions(sessions, col, align="Elapsed time", start_times=None, step_s=None):
+    """
+    One column from many sessions on a shared time axis, as a wide frame
+    (one column per session label). "Elapsed time" lines sessions up from
+    their own start; "Wall clock" places them at start time + elapsed, so
+    sessions recorded at the same time line up. step_s averages the values
+    into buckets of that many seconds.
+    sessions: {label: standardised dataframe}; start_times: {label: Timestamp}.
+    """
+    series = {}
+    for label, df in sessions.items():
+        if col not in df:
+            continue
+        t = df["Time (s)"].to_numpy(dtype=np.float64)
+        if step_s:
+            t = np.floor(t / step_s) * step_s
+        values = pd.Series(df[col].to_numpy(dtype=np.float64), index=t)
+        if step_s:
+            values = values.groupby(level=0).mean()
+        if align == "Wall clock":
+            values.index = start_times[label] + pd.to_timedelta(values.index, unit="s")
+        series[label] = values
+
+    if not series:
+        return pd.DataFrame()
+    # Outer join on the time index: sessions without a reading at a time get NaN
+    wide = pd.concat(series, axis=1).sort_index()
+    wide.index.name = "Time (s)" if align == "Elapsed time" else "Time"
+    return wide
+
+
+def compare_session_stats(sessions, col):
+    """
+    Side-by-side summary statistics of one column across sessions, one row
+    per session plus an "All sessions" row merged from the per-session
+    accumulators. Each session's statistics are computed once and kept with
+    its cached dataset (see SessionDataDict.stats).
+    sessions: {label: data_dict}.
+    """
+    rows = {}
+    merged = RunningStats(col)
+    for label, data_dict in sessions.items():
+        if col not in data_dict:
+            continue
+        stats = dataset_stats(data_dict, col)
+        rows[label] = stats.summary()
+        merged.merge(stats)
+    if len(rows) > 1:
+        rows["All sessions"] = merged.summary()
+
+    table = pd.DataFrame.from_dict(rows, orient="index")
+    if not table.empty:
+        observed = table["seconds_observed"].where(table["seconds_observed"] > 0)
+        table["% time below"] = 100 * table["seconds_below"] / observed
+        table["% time above"] = 100 * table["seconds_above"] / observed
+        table = table.drop(columns=["seconds_observed", "seconds_below", "seconds_above"])
+    return table
@@ -0,0 +1,551 @@
+# live_feed.py
+# Live data tracking: incremental CSV/.bin tailers, rolling windows,
+# the latest-reading cache and the background file watchers
+
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from Dashboard_App.anomaly_utils import get_color, is_anomaly
+from Dashboard_App.streaming_stats import RunningStats
+
+
+class CsvTailer:
+    """
+    Incremental reader for a session CSV that the logger is still appending to.
+    Remembers the byte offset and column header of the file, parses only the
+    bytes appended since the previous call and keeps the most recent rows, so
+    each refresh costs the same however long the session has been running.
+    A partial last line (logger mid-write) is left for the next call.
+    """
+
+    def __init__(self, csv_path, keep_rows):
+        self.csv_path = csv_path
+        self.keep_rows = keep_rows
+        # Streamlit serves each browser session on its own thread
+        self.lock = threading.Lock()
+        self._reset(None)
+
+    def _reset(self, file_id):
+        self.file_id = file_id
+        self.offset = 0
+        self.columns = None
+        self.frame = None
+        self.window = LiveWindow()
+
+    def read(self, tail):
+        """Return the last `tail` rows, or None if no data rows exist yet."""
+        with self.lock:
+            self.keep_rows = max(self.keep_rows, tail)
+
+            stat = os.stat(self.csv_path)
+            file_id = (stat.st_dev, stat.st_ino)
+            # Start again if the file was replaced or truncated
+            if file_id != self.file_id or stat.st_size < self.offset:
+                self._reset(file_id)
+
+            if stat.st_size > self.offset:
+                with open(self.csv_path, "rb") as f:
+                    f.seek(self.offset)
+                    new_bytes = f.read(stat.st_size - self.offset)
+
+                # Only consume up to the last complete line
+                end = new_bytes.rfind(b"\n") + 1
+                if end:
+                    self._consume(new_bytes[:end])
+                    self.offset += end
+
+            if self.frame is None or self.frame.empty:
+                return None
+            return self.frame.tail(tail).rename(columns={"Elapsed_Seconds": "Time (s)"})
+
+    def _consume(self, chunk):
+        # Skip the metadata block until the data table header is found
+        if self.columns is None:
+            lines = chunk.split(b"\n")
+            for i, line in enumerate(lines):
+                if line.startswith(b"Elapsed_Seconds"):
+                    self.columns = line.decode("utf-8").strip().split(",")
+                    chunk = b"\n".join(lines[i + 1:])
+                    break
+            else:
+                return
+
+        if not chunk.strip():
+            return
+
+        new_rows = pd.read_csv(io.BytesIO(chunk), header=None, names=self.columns)
+        self.window.append(new_rows.rename(columns={"Elapsed_Seconds": "Time (s)"}))
+        if self.frame is not None:
+            new_rows = pd.concat([self.frame, new_rows], ignore_index=True)
+        self.frame = new_rows.tail(self.keep_rows).reset_index(drop=True)
+
+
+# One tailer per file, shared by every browser session in this process
+_csv_tailers = {}
+_csv_tailers_lock = threading.Lock()
+
+
+def read_latest_csv(csv_path, tail=200):
+    """
+    Read the most recent rows from a growing CSV file.
+    Skips metadata header automatically. Only newly appended bytes are parsed
+    on each call (see CsvTailer).
+    """
+    try:
+        return _live_tailer(csv_path).read(tail)
+    except Exception:
+        return None
+
+# Binary record files (.bin) written next to each session CSV by the logger
+# (see Python_Data_Logger/binary_log.py). Fixed-width records are read straight
+# out of a memory map: no text parsing, and the cost depends only on `tail`.
+BIN_MAGIC = b"STUFFYB1"
+BIN_FORMAT_VERSION = 2
+BIN_HEADER_DTYPE = np.dtype([
+    ("magic", "S8"),
+    ("version", "<u2"),
+    ("record_size", "<u2"),
+    ("capacity", "<u4"),      # 0 = every row kept, otherwise ring-buffer slots
+    ("rows_written", "<u8"),  # updated after the records it counts
+    ("start_time", "<f8"),
+    ("location", "S96")
+])
+BIN_RECORD_DTYPE = np.dtype([
+    ("Elapsed_Seconds", "<i4"),
+    ("CO2_ppm", "<i4"),
+    ("VOC_ppm", "<f8"),
+    ("IAQ", "<i4"),
+    ("Gas_Res_Ohms", "<i4"),
+    ("Temp_Raw_C", "<f8"),
+    ("Temp_Comp_C", "<f8"),
+    ("Hum_Raw_pct", "<f8"),
+    ("Hum_Comp_pct", "<f8"),
+    ("Accuracy", "<i4")
+])
+
+
+class BinaryTailer:
+    """
+    Live reader for a session's binary record file. The header and records are
+    memory-mapped once; each read checks the rows-written counter and copies
+    out only the newest `tail` records. The records are re-mapped only when an
+    append-mode file has grown past the mapped length (or the file is replaced).
+    """
+
+    def __init__(self, bin_path):
+        self.bin_path = bin_path
+        self.lock = threading.Lock()
+        self.file_id = None
+        self.header = None
+        self.records = None
+        self.window = LiveWindow()
+        self.rows_fed = 0
+
+    def _map(self, stat):
+        header = np.memmap(self.bin_path, dtype=BIN_HEADER_DTYPE, mode="r", shape=(1,))
+        if (header["magic"][0], header["version"][0], header["record_size"][0]) != \
+                (BIN_MAGIC, BIN_FORMAT_VERSION, BIN_RECORD_DTYPE.itemsize):
+            raise ValueError(f"{self.bin_path} is not a version {BIN_FORMAT_VERSION} record file")
+
+        n_slots = (stat.st_size - BIN_HEADER_DTYPE.itemsize) // BIN_RECORD_DTYPE.itemsize
+        self.header = header
+        self.records = np.memmap(
+            self.bin_path, dtype=BIN_RECORD_DTYPE, mode="r",
+            offset=BIN_HEADER_DTYPE.itemsize, shape=(n_slots,)
+        ) if n_slots else None
+        file_id = (stat.st_dev, stat.st_ino)
+        if self.file_id is not None and file_id != self.file_id:
+            # A different file: its rows start a new window. Growth keeps the window.
+            self._reset_window()
+        self.file_id = file_id
+
+    def _reset_window(self):
+        self.window = LiveWindow()
+        self.rows_fed = 0
+
+    def _rows(self, first, last):
+        """Copies of records first..last-1 (by write order), or None."""
+        capacity = int(self.header["capacity"][0])
+        if last <= first:
+            return None
+        if capacity:
+            rows = self.records[np.arange(first, last) % capacity]
+            # Drop any rows the logger overwrote while they were being copied
+            overwritten = int(self.header["rows_written"][0]) - capacity - first
+            return rows[overwritten:] if overwritten > 0 else rows
+        return np.array(self.records[first:last])
+
+    def _frame(self, rows):
+        location = self.header["location"][0].decode("utf-8")
+        df = pd.DataFrame(rows)
+        df.insert(1, "Location_Note", pd.Categorical([location] * len(df)))
+        return df.rename(columns={"Elapsed_Seconds": "Time (s)"})
+
+    def read(self, tail):
+        """Return the last `tail` rows, or None if no rows have been written yet."""
+        with self.lock:
+            stat = os.stat(self.bin_path)
+            if (stat.st_dev, stat.st_ino) != self.file_id:
+                self._map(stat)
+
+            capacity = int(self.header["capacity"][0])
+            n_written = int(self.header["rows_written"][0])
+            n_mapped = 0 if self.records is None else len(self.records)
+            if not capacity and n_written > n_mapped:
+                self._map(os.stat(self.bin_path))
+                n_mapped = 0 if self.records is None else len(self.records)
+                n_written = min(n_written, n_mapped)
+
+            if n_written < self.rows_fed:
+                # Rewritten in place (fewer rows than already fed)
+                self._reset_window()
+            oldest = max(0, n_written - capacity) if capacity else 0
+
+            # Rows not yet seen go to the live window (at most its longest span)
+            fed = self._rows(max(self.rows_fed, oldest, n_written - LIVE_WINDOW_MAX_ROWS), n_written)
+            if fed is not None:
+                self.window.append(self._frame(fed))
+            self.rows_fed = n_written
+
+            rows = self._rows(max(oldest, n_written - tail), n_written)
+            if rows is None:
+                return None
+            return self._frame(rows)
+
+
+_bin_tailers = {}
+_bin_tailers_lock = threading.Lock()
+
+
+def read_latest_binary(bin_path, tail=200):
+    """
+    Read the most recent rows from a session's binary record file (.bin).
+    Same output as read_latest_csv, without parsing any text.
+    """
+    try:
+        return _live_tailer(bin_path).read(tail)
+    except Exception:
+        return None
+
+
+# Rolling live windows. Every row a tailer parses is also added to fixed-size
+# ring buffers at three resolutions: 1 s rows for the last hour, 10 s means for
+# the last 8 hours and 1 min means for the last day. Memory is fixed (about
+# 8,000 rows in all) however long a pod is monitored.
+LIVE_LEVELS = ((1, 3600), (10, 2880), (60, 1440))  # (resolution s, rows kept)
+LIVE_WINDOWS = {"5 min": 300, "1 h": 3600, "8 h": 8 * 3600, "24 h": 24 * 3600}
+LIVE_WINDOW_MAX_ROWS = max(res * rows for res, rows in LIVE_LEVELS)
+
+
+class RingBuffer:
+    """Fixed-capacity circular buffer of (time, values row) pairs."""
+
+    def __init__(self, capacity, n_cols):
+        self.capacity = capacity
+        self.times = np.empty(capacity)
+        self.values = np.empty((capacity, n_cols))
+        self.count = 0  # rows ever written; the newest is at (count - 1) % capacity
+
+    def extend(self, times, values):
+        if len(times) > self.capacity:
+            self.count += len(times) - self.capacity
+            times, values = times[-self.capacity:], values[-self.capacity:]
+        slots = (self.count + np.arange(len(times))) % self.capacity
+        self.times[slots] = times
+        self.values[slots] = values
+        self.count += len(times)
+
+    def last(self, n):
+        """The newest n rows, oldest first."""
+        n = min(n, self.count, self.capacity)
+        slots = (self.count - n + np.arange(n)) % self.capacity
+        return self.times[slots], self.values[slots]
+
+
+class LiveWindow:
+    """
+    Multi-resolution ring buffers for one live file, shared by every browser
+    session. Coarser levels store the mean of each completed bucket; the
+    readings of the bucket still filling are held until it completes. The
+    window also keeps a RunningStats per column covering every row added.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.columns = None
+        self.location = None
+        self.last_time = -np.inf
+        self.levels = []
+        self.stats = {}
+
+    def _start(self, columns):
+        self.columns = columns
+        self.levels = [
+            {"res": res, "ring": RingBuffer(rows, len(columns)),
+             "pending_t": np.empty(0), "pending_v": np.empty((0, len(columns)))}
+            for res, rows in LIVE_LEVELS
+        ]
+        self.stats = {col: RunningStats(col) for col in columns}
+
+    def append(self, df):
+        """Add newly parsed rows (standardised columns; rows already seen are skipped)."""
+        columns = [c for c in df.columns if c not in ["Time (s)", "Location_Note"]]
+        times = df["Time (s)"].to_numpy(dtype=np.float64)
+
+        with self.lock:
+            # A different layout or an elapsed counter that went back (new session) starts again
+            if columns != self.columns or (len(times) and times[0] < self.last_time):
+                self._start(columns)
+                self.last_time = -np.inf
+
+            new = times > self.last_time
+            if not new.any():
+                return
+            times = times[new]
+            values = df[columns].to_numpy(dtype=np.float64)[new]
+            self.last_time = times[-1]
+            if "Location_Note" in df:
+                self.location = df["Location_Note"].iloc[-1]
+
+            for col, column_values in zip(columns, values.T):
+                self.stats[col].update(column_values, times)
+
+            for level in self.levels:
+                if level["res"] == 1:
+                    level["ring"].extend(times, values)
+                else:
+                    self._add_buckets(level, times, values)
+
+    @staticmethod
+    def _add_buckets(level, times, values):
+        res = level["res"]
+        times = np.concatenate((level["pending_t"], times))
+        values = np.concatenate((level["pending_v"], values))
+        buckets = np.floor(times / res)
+
+        # Everything before the newest bucket is complete
+        done = buckets < buckets[-1]
+        level["pending_t"], level["pending_v"] = times[~done], values[~done]
+        if not done.any():
+            return
+
+        buckets, values = buckets[done], values[done]
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        valid = ~np.isnan(values)
+        counts = np.add.reduceat(valid, starts)
+        sums = np.add.reduceat(np.where(valid, values, 0.0), starts)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            means = sums / counts
+        level["ring"].extend(buckets[starts] * res, means)
+
+    def frame(self, window_s):
+        """
+        The last window_s seconds at the finest resolution that covers them,
+        as a standardised dataframe (None before any rows arrive).
+        """
+        with self.lock:
+            if not self.levels or self.last_time == -np.inf:
+                return None
+            level = next(
+                (lv for lv in self.levels if lv["res"] * lv["ring"].capacity >= window_s),
+                self.levels[-1]
+            )
+            times, values = level["ring"].last(int(np.ceil(window_s / level["res"])))
+            keep = times > self.last_time - window_s
+            columns, location = self.columns, self.location
+
+        df = pd.DataFrame(values[keep], columns=columns)
+        df.insert(0, "Time (s)", times[keep])
+        df.insert(1, "Location_Note", pd.Categorical([location] * len(df)))
+        return df
+
+
+def _live_tailer(path):
+    """The shared CsvTailer / BinaryTailer for a live file."""
+    key = os.path.abspath(path)
+    if key.endswith(".bin"):
+        registry, lock, make = _bin_tailers, _bin_tailers_lock, lambda: BinaryTailer(key)
+    else:
+        registry, lock, make = _csv_tailers, _csv_tailers_lock, lambda: CsvTailer(key, 200)
+    with lock:
+        tailer = registry.get(key)
+        if tailer is None:
+            tailer = registry[key] = make()
+    return tailer
+
+
+def read_live_window(path, window_s):
+    """
+    The last window_s seconds of a live .csv/.bin file (see LiveWindow):
+    1 s rows up to an hour, 10 s means up to 8 hours, 1 min means beyond.
+    Returns None if the file cannot be read yet.
+    """
+    try:
+        tailer = _live_tailer(path)
+        tailer.read(1)  # takes in any newly appended rows
+        return tailer.window.frame(window_s)
+    except Exception:
+        return None
+
+
+def live_stats(path, col):
+    """
+    RunningStats for one column of a live file, covering every row parsed
+    from it in this process (shared by every viewer), or None.
+    """
+    window = _live_tailer(path).window
+    with window.lock:
+        return window.stats.get(col)
+
+
+# Newest reading of each live source, shared by every browser session.
+# While a LiveFeedWatcher runs for the source it refreshes the reading as rows
+# arrive; otherwise the source is polled at most once per interval, however
+# many viewers refresh.
+LIVE_POLL_INTERVAL_S = 1.0
+
+
+class LatestReadingCache:
+    """
+    Process-wide latest-value service for one live file (.csv or .bin).
+    Reads only the newest row through the shared tailers, and works out each
+    sensor's colour and anomaly status once per new row. Every sidebar widget
+    and every viewer reads the same snapshot.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self.polled_at = None
+        self.row_key = None
+        self.snapshot = None
+
+    def get(self, max_age=LIVE_POLL_INTERVAL_S):
+        """The newest snapshot, re-reading the file if the last poll is older than max_age seconds."""
+        with self.lock:
+            now = time.monotonic()
+            if self.polled_at is not None and now - self.polled_at < max_age:
+                return self.snapshot
+            self.polled_at = now
+
+            # Same default tail as the dashboard's own read, so both share one tailer state
+            read = read_latest_binary if self.path.endswith(".bin") else read_latest_csv
+            df = read(self.path)
+            if df is None:
+                return self.snapshot
+
+            row = df.iloc[-1]
+            row_key = tuple(row)
+            if row_key != self.row_key:
+                self.row_key = row_key
+                self.snapshot = {
+                    "time": row["Time (s)"],
+                    "location": row.get("Location_Note"),
+                    "readings": {
+                        col: {
+                            "value": row[col],
+                            "color": get_color(col, row[col]),
+                            "anomaly": is_anomaly(col, row[col])
+                        }
+                        for col in df.columns if col not in ["Time (s)", "Location_Note"]
+                    }
+                }
+            return self.snapshot
+
+
+_latest_caches = {}
+_latest_caches_lock = threading.Lock()
+
+
+def _latest_cache(path):
+    key = os.path.abspath(path)
+    with _latest_caches_lock:
+        cache = _latest_caches.get(key)
+        if cache is None:
+            cache = _latest_caches[key] = LatestReadingCache(key)
+    return cache
+
+
+def latest_readings(path):
+    """
+    Newest row of a live .csv/.bin file as {"time", "location", "readings":
+    {sensor: {"value", "color", "anomaly"}}}, or None before any data arrives.
+    """
+    key = os.path.abspath(path)
+    # The file's watcher pushes new rows into the cache, so viewers never poll it
+    max_age = np.inf if key in _live_watchers else LIVE_POLL_INTERVAL_S
+    return _latest_cache(key).get(max_age)
+
+
+# Push-based live mode: one watcher thread per live file checks it for new
+# rows and publishes a version number that viewers compare against.
+LIVE_WATCH_INTERVAL_S = 0.25
+# A watcher nobody has asked about for this long stops (every viewer has left)
+LIVE_WATCH_IDLE_S = 60
+
+
+class LiveFeedWatcher:
+    """
+    Background watcher for one live .csv/.bin file, shared by every browser
+    session. It checks the file's size and modification time (a stat call,
+    no reading) every LIVE_WATCH_INTERVAL_S; when the file has changed it
+    parses the new rows once through the shared tailer, refreshes the latest
+    reading cache and bumps `version`. Pages rerun only when the version they
+    last showed is out of date, so an idle pod costs a stat call per interval.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.version = 0
+        self.last_wanted = time.monotonic()
+        # Rows already in the file do not bump the version: the page that started the watcher shows them
+        self._signature = self._file_signature()
+        self.thread = threading.Thread(target=self._run, name="LiveFeedWatcher", daemon=True)
+        self.thread.start()
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return None
+        return stat.st_ino, stat.st_size, stat.st_mtime_ns
+
+    def _run(self):
+        # Viewers stop polling while the watcher runs: start from the file as it is now
+        _latest_cache(self.path).get(max_age=0)
+
+        while time.monotonic() - self.last_wanted < LIVE_WATCH_IDLE_S:
+            signature = self._file_signature()
+            if signature != self._signature:
+                self._signature = signature
+                # Parse the new rows here, off the script threads
+                if signature is not None and _latest_cache(self.path).get(max_age=0) is not None:
+                    self.version += 1
+            time.sleep(LIVE_WATCH_INTERVAL_S)
+
+        with _live_watchers_lock:
+            if _live_watchers.get(self.path) is self:
+                del _live_watchers[self.path]
+
+
+_live_watchers = {}
+_live_watchers_lock = threading.Lock()
+
+
+def live_version(path):
+    """
+    Version number of a live file's data: changes whenever new rows have
+    arrived. Starts the file's watcher on first use.
+    """
+    key = os.path.abspath(path)
+    with _live_watchers_lock:
+        watcher = _live_watchers.get(key)
+        if watcher is None:
+            watcher = _live_watchers[key] = LiveFeedWatcher(key)
+        watcher.last_wanted = time.monotonic()
+    return watcher.version
@@ -2,61 +2,43 @@
 # Real-time live tracking widget for Streamlit
 
 import streamlit as st
-import numpy as np
-from streamlit_autorefresh import st_autorefresh
-import pandas as pd
 
-import data_utils
+from Dashboard_App import data_utils
 
 
-def render_live_tracking(data_dict):
+def render_live_tracking(live_path):
     """
     Render live tracking metrics in the sidebar with anomaly detection.
+    Values, colours and anomaly flags come from the process-wide latest
+    reading cache in live_feed: nothing is read or computed per metric or
+    per viewer. The dashboard reruns the page when new rows arrive.
     """
 
     st.sidebar.subheader("Live Tracking")
 
-    live_variables = [v for v in data_dict.keys() if v != "Overview"]
+    latest = data_utils.latest_readings(live_path)
+    if latest is None:
+        st.sidebar.info("Waiting for live data...")
+        return
 
-    # Create empty containers
-    containers = {
-        var: st.sidebar.empty() for var in live_variables
-    }
+    location = f" | {latest['location']}" if latest["location"] else ""
+    st.sidebar.caption(f"T = {latest['time']} s{location}")
 
-    # Initial display
-    for var, container in containers.items():
-        df = data_dict[var]
-        val = df.iloc[-1, 1]
-        container.metric(label=var, value=f"{val}")
-
-    # Auto refresh every 2 seconds
-    st_autorefresh(interval=2000, key="live_refresh")
-
-    # Update values
-    for var, container in containers.items():
-        df = data_dict[var]
-        last_val = df.iloc[-1, 1]
-
-        # Simulate new measurement from csv file
-        df = pd.read_csv("live_sensor_data.csv")
-        new_val = df.iloc[-1, 1]
-
-        # Determine colour
-        color = data_utils.get_color(var, new_val)
+    for var, reading in latest["readings"].items():
+        color = reading["color"] or "inherit"
 
         # Anomaly detection
-        anomaly = data_utils.is_anomaly(var, new_val)
         anomaly_flag = (
             "<div style='color:red; font-size:14px;'>Anomaly detected</div>"
-            if anomaly else ""
+            if reading["anomaly"] else ""
         )
 
-        container.markdown(
+        st.sidebar.markdown(
             f"""
             <div style="text-align:center;">
                 <div style="font-size:16px; font-weight:bold;">{var}</div>
                 <div style="font-size:36px; font-weight:bold; color:{color};">
-                    {new_val}
+                    {reading["value"]:g}
                 </div>
             </div>
             {anomaly_flag}
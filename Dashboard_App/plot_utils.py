@@ -2,10 +2,45 @@
 # All plotting logic for the dashboard
 
 from click import option
-import matplotlib.pyplot as plt
+import io
+
+import numpy as np
 import pandas as pd
+import streamlit as st
+from matplotlib.figure import Figure
+
+from Dashboard_App.data_utils import (
+    thresholds, iaq_thresholds, DISPLAY_TO_SENSOR, anomaly_mask, decimate_indices,
+    frame_fingerprint
+)
+from Dashboard_App.theme_toggle import mpl_theme
+
+# Rendered chart images kept in memory, keyed by data fingerprint, theme and chart options
+FIGURE_CACHE_SIZE = 32
+# Same resolution and cropping as st.pyplot
+RENDER_DPI = 200
 
-from data_utils import thresholds, iaq_thresholds, DISPLAY_TO_SENSOR, is_anomaly
+
+def _chart_points(fig, x, y, method="lttb", keep_mask=None):
+    """
+    Reduce a series to roughly one point per horizontal pixel of the figure
+    before plotting, so render time stays bounded however long the session.
+    Points in keep_mask (anomalies) are always kept.
+    """
+    x = np.asarray(x)
+    y = np.asarray(y)
+    n_px = int(fig.get_figwidth() * fig.dpi)
+    idx = decimate_indices(x, y, n_px, method=method, keep_mask=keep_mask)
+    return x[idx], y[idx]
+
+
+def _threshold_band(sensor_key, thresholds, iaq_thresholds):
+    """(low, high) reference lines for a sensor, or (None, None)."""
+    if sensor_key == "IAQ":
+        return iaq_thresholds[0], iaq_thresholds[2]
+    if sensor_key in thresholds:
+        return thresholds[sensor_key]
+    return None, None
 
 
 def plot_main_chart(
@@ -21,73 +56,65 @@ def plot_main_chart(
     Plot main time-series chart with anomaly detection, optional threshold
     line, and optional time-point marker.
     """
-    fig, ax = plt.subplots()
+    # Figure objects rather than pyplot: nothing is left registered in pyplot
+    # after a rerun, so figures are freed as soon as they are rendered
+    fig = Figure()
+    ax = fig.subplots()
     # Resolve sensor key
     sensor_key = DISPLAY_TO_SENSOR.get(option, option)
 
     # ---------------------------------------------
-    # Main plot of data
+    # Anomaly mask (vectorised, from data_utils.py)
+    # ---------------------------------------------
+    mask = None
+    if option != "Overview":
+        mask = anomaly_mask(
+            option,
+            selected_data[y_col].to_numpy(),
+            thresholds=thresholds,
+            iaq_thresholds=iaq_thresholds
+        )
+
+    # ---------------------------------------------
+    # Main plot of data (downsampled to the figure width)
     # ---------------------------------------------
     if option == "Overview":
         for col in selected_data.columns[1:]:
             ax.plot(
-                selected_data["Time (s)"],
-                selected_data[col],
+                *_chart_points(fig, selected_data["Time (s)"], selected_data[col], method="minmax"),
                 label=col,
                 markersize=2
             )
         ax.legend()
     else:
         ax.plot(
-            selected_data["Time (s)"],
-            selected_data[y_col],
+            *_chart_points(fig, selected_data["Time (s)"], selected_data[y_col], keep_mask=mask),
             linewidth=1.5
         )
 
 # --------------------------------------------------
 # Drawing both threshold lines
 # --------------------------------------------------
-    if sensor_key:
-        if sensor_key == "IAQ":
-            low, high = iaq_thresholds[0], iaq_thresholds[2]
-        elif sensor_key in thresholds:
-            low, high = thresholds[sensor_key]
-        else:
-            low, high = None, None
-
-        if low is not None and high is not None:
-            ax.axhline(low, linestyle="--", linewidth=1, color="gray")
-            ax.axhline(high, linestyle="--", linewidth=1, color="gray")
+    low, high = _threshold_band(sensor_key, thresholds, iaq_thresholds)
+    if low is not None and high is not None:
+        ax.axhline(low, linestyle="--", linewidth=1, color="gray")
+        ax.axhline(high, linestyle="--", linewidth=1, color="gray")
 
         # -----------------------------------------
-        # Anomaly detection
+        # Anomaly points
         # -----------------------------------------
     anomaly_x = []
     anomaly_y = []
 
-    if option != "Overview" and sensor_key in thresholds:
-
-        low, high = thresholds[sensor_key]
-
-        for _, row in selected_data.iterrows():
-            time = row["Time (s)"]
-            val = row[y_col]
-
-            if val < low or val > high:
-                anomaly_x.append(time)
-                anomaly_y.append(val)
-
-    elif option == "IAQ":
-
-        for _, row in selected_data.iterrows():
-            time = row["Time (s)"]
-            val = row[y_col]
-
-            if val > iaq_thresholds[-1]:
-                anomaly_x.append(time)
-                anomaly_y.append(val)
+    if mask is not None:
+        anomaly_x, anomaly_y = _chart_points(
+            fig,
+            selected_data["Time (s)"].to_numpy()[mask],
+            selected_data[y_col].to_numpy()[mask],
+            method="minmax"
+        )
 
-    if anomaly_x:
+    if len(anomaly_x):
         ax.scatter(
         anomaly_x,
         anomaly_y,
@@ -119,18 +146,6 @@ def plot_main_chart(
         size=15
     )
 
-    if option != "Overview" and sensor_key:
-        if sensor_key == "IAQ":
-            low, high = iaq_thresholds[0], iaq_thresholds[2]
-        elif sensor_key in thresholds:
-            low, high = thresholds[sensor_key]
-        else:
-            low, high = None, None
-
-        if low is not None and high is not None:
-            ax.axhline(low, linestyle="--", linewidth=1, color="gray")
-            ax.axhline(high, linestyle="--", linewidth=1, color="gray")
-
     return fig
 
 
@@ -138,15 +153,15 @@ def plot_comparison(data_dict, compare_variables):
     """
     Plot comparison chart for multiple variables.
     """
-    fig, ax = plt.subplots()
+    fig = Figure()
+    ax = fig.subplots()
 
     for var in compare_variables:
         df = data_dict[var]
         y_col = df.columns[1]
 
         ax.plot(
-            df["Time (s)"],
-            df[y_col],
+            *_chart_points(fig, df["Time (s)"], df[y_col]),
             label=var,
             marker="o",
             markersize=3
@@ -163,18 +178,17 @@ def plot_raw_vs_cleaned(df_raw, df_clean, y_col):
     """
     Plot raw vs cleaned data comparison.
     """
-    fig, ax = plt.subplots(figsize=(10, 5))
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
 
     ax.plot(
-        df_raw["Time (s)"],
-        df_raw[y_col],
+        *_chart_points(fig, df_raw["Time (s)"], df_raw[y_col], method="minmax"),
         label="Raw",
         marker="o",
         markersize=3
     )
     ax.plot(
-        df_clean["Time (s)"],
-        df_clean[y_col],
+        *_chart_points(fig, df_clean["Time (s)"], df_clean[y_col]),
         label="Cleaned",
         marker="o",
         markersize=3
@@ -185,3 +199,238 @@ def plot_raw_vs_cleaned(df_raw, df_clean, y_col):
     ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
 
     return fig
+
+
+def plot_session_overlay(wide, col):
+    """
+    Overlay one variable from several sessions (output of
+    data_utils.align_sessions: one column per session on a shared time axis).
+    """
+    fig = Figure(figsize=(10, 5))
+    ax = fig.subplots()
+    n_px = int(fig.get_figwidth() * fig.dpi)
+
+    wall_clock = isinstance(wide.index, pd.DatetimeIndex)
+    for label in wide.columns:
+        series = wide[label].dropna()
+        x = series.index.to_numpy()
+        # Decimate on a numeric axis (nanoseconds for wall-clock times)
+        x_num = x.astype("datetime64[ns]").astype(np.int64) if wall_clock else x
+        idx = decimate_indices(x_num.astype(np.float64), series.to_numpy(), n_px)
+        ax.plot(x[idx], series.to_numpy()[idx], label=label, linewidth=1)
+
+    low, high = _threshold_band(DISPLAY_TO_SENSOR.get(col, col), thresholds, iaq_thresholds)
+    if low is not None and high is not None:
+        ax.axhline(low, linestyle="--", linewidth=1, color="gray")
+        ax.axhline(high, linestyle="--", linewidth=1, color="gray")
+
+    ax.set_xlabel(wide.index.name or "Time (s)")
+    ax.set_ylabel(col)
+    ax.legend(loc="upper left", bbox_to_anchor=(1, 1))
+    if wall_clock:
+        fig.autofmt_xdate()
+
+    return fig
+
+
+# --------------------------------------------------
+# Rendering + image cache
+# --------------------------------------------------
+
+def render_figure(fig, fmt="png"):
+    """
+    Render a figure to PNG (or SVG) bytes and release its artists straight away.
+    """
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format=fmt, bbox_inches="tight", dpi=RENDER_DPI)
+    fig.clear()
+    return buffer.getvalue()
+
+
+@st.cache_data(max_entries=FIGURE_CACHE_SIZE, show_spinner=False)
+def _cached_render(cache_key, theme, fmt, _plot):
+    """
+    Build and render a chart once per cache key. The plotting callable
+    (underscore argument) is not hashed: cache_key identifies the chart.
+    """
+    with mpl_theme(theme):
+        return render_figure(_plot(), fmt)
+
+
+def main_chart_image(selected_data, option, y_col, theme, time_point=None, fmt="png"):
+    """Cached plot_main_chart image for the data, theme, variable and time point."""
+    cache_key = ("main", frame_fingerprint(selected_data), option, y_col, time_point)
+    return _cached_render(cache_key, theme, fmt, lambda: plot_main_chart(
+        selected_data=selected_data,
+        option=option,
+        y_col=y_col,
+        thresholds=thresholds,
+        iaq_thresholds=iaq_thresholds,
+        time_point=time_point
+    ))
+
+
+def comparison_image(data_dict, compare_variables, theme, fmt="png"):
+    """Cached plot_comparison image."""
+    cache_key = (
+        "comparison",
+        frame_fingerprint(*(data_dict[var] for var in compare_variables)),
+        tuple(compare_variables)
+    )
+    return _cached_render(cache_key, theme, fmt, lambda: plot_comparison(data_dict, compare_variables))
+
+
+def raw_vs_cleaned_image(df_raw, df_clean, y_col, theme, fmt="png"):
+    """Cached plot_raw_vs_cleaned image."""
+    cache_key = ("raw_vs_cleaned", frame_fingerprint(df_raw, df_clean), y_col)
+    return _cached_render(cache_key, theme, fmt, lambda: plot_raw_vs_cleaned(df_raw, df_clean, y_col))
+
+
+def session_overlay_image(wide, col, theme, fmt="png"):
+    """Cached plot_session_overlay image."""
+    cache_key = ("session_overlay", frame_fingerprint(wide.reset_index()), col)
+    return _cached_render(cache_key, theme, fmt, lambda: plot_session_overlay(wide, col))
+
+
+# --------------------------------------------------
+# Live chart (artists reused between refreshes)
+# --------------------------------------------------
+
+# The live chart's lines are decimated afresh once they hold this many points per pixel of width
+LIVE_REDECIMATE_FACTOR = 2
+
+
+class LiveChart:
+    """
+    Main chart for the live feed. The figure, lines, anomaly markers and
+    reference lines are created once per browser session. Each refresh
+    appends only the rows that arrived since the previous one and drops the
+    points that have scrolled out of the window. The whole window is
+    decimated again only when it does not continue what is drawn (a new
+    session) or the lines have grown to LIVE_REDECIMATE_FACTOR points per
+    pixel. Rebuilt when the variable, columns, theme or live window change.
+    The image itself is re-encoded on every refresh, as st.image shows a
+    static picture.
+    """
+
+    def __init__(self, option, y_col, columns, theme, window=None):
+        self.signature = (option, y_col, tuple(columns), theme, window)
+        self.option = option
+        self.y_col = y_col
+        self.theme = theme
+        # (time, values) of the newest row drawn
+        self.last_row = None
+
+        with mpl_theme(theme):
+            self.fig = Figure()
+            self.ax = self.fig.subplots()
+
+            if option == "Overview":
+                self.lines = {
+                    col: self.ax.plot([], [], label=col, markersize=2)[0]
+                    for col in columns[1:]
+                }
+                self.ax.legend()
+            else:
+                self.lines = {y_col: self.ax.plot([], [], linewidth=1.5)[0]}
+
+            low, high = _threshold_band(DISPLAY_TO_SENSOR.get(option, option), thresholds, iaq_thresholds)
+            if low is not None and high is not None:
+                self.ax.axhline(low, linestyle="--", linewidth=1, color="gray")
+                self.ax.axhline(high, linestyle="--", linewidth=1, color="gray")
+
+            self.anomalies = self.ax.scatter([], [], color="#9D00FF", s=5, zorder=10, label="Anomaly")
+            self.marker = self.ax.axvline(0, color="blue", linestyle="--", linewidth=1, visible=False)
+
+            self.ax.set_xlabel("Time (s)", weight="bold", size=15)
+            self.ax.set_ylabel("Values" if option == "Overview" else y_col, weight="bold", size=15)
+
+    def matches(self, option, y_col, columns, theme, window=None):
+        return self.signature == (option, y_col, tuple(columns), theme, window)
+
+    def _row(self, selected_data, i):
+        return selected_data[list(self.lines)].iloc[i].to_numpy(dtype=float)
+
+    def _first_new_row(self, selected_data, x):
+        """
+        Index of the first row not drawn yet, or None if the window has to be
+        drawn afresh (first refresh, a new session, or too many points drawn).
+        """
+        if self.last_row is None or not len(x):
+            return None
+        last_x, last_values = self.last_row
+        i = np.searchsorted(x, last_x)
+        if i == len(x) or x[i] != last_x or \
+                not np.array_equal(self._row(selected_data, i), last_values, equal_nan=True):
+            return None
+
+        n_drawn = len(next(iter(self.lines.values())).get_xdata()) + len(x) - (i + 1)
+        if n_drawn > LIVE_REDECIMATE_FACTOR * self.fig.get_figwidth() * self.fig.dpi:
+            return None
+        return i + 1
+
+    def _draw_all(self, selected_data, x):
+        if self.option == "Overview":
+            for col, line in self.lines.items():
+                line.set_data(*_chart_points(self.fig, x, selected_data[col], method="minmax"))
+            offsets = np.empty((0, 2))
+        else:
+            y = selected_data[self.y_col].to_numpy()
+            mask = anomaly_mask(self.option, y, thresholds=thresholds, iaq_thresholds=iaq_thresholds)
+            self.lines[self.y_col].set_data(*_chart_points(self.fig, x, y, keep_mask=mask))
+            offsets = np.column_stack(_chart_points(self.fig, x[mask], y[mask], method="minmax"))
+        self.anomalies.set_offsets(offsets)
+
+    def _append(self, selected_data, x, start):
+        """Add rows start: to the artists and drop points from before the window's first row."""
+        x_new = x[start:]
+        for col, line in self.lines.items():
+            drawn_x, drawn_y = np.asarray(line.get_xdata()), np.asarray(line.get_ydata())
+            keep = drawn_x >= x[0]
+            line.set_data(
+                np.concatenate((drawn_x[keep], x_new)),
+                np.concatenate((drawn_y[keep], selected_data[col].to_numpy()[start:]))
+            )
+
+        if self.option != "Overview":
+            y_new = selected_data[self.y_col].to_numpy()[start:]
+            mask = anomaly_mask(self.option, y_new, thresholds=thresholds, iaq_thresholds=iaq_thresholds)
+            offsets = np.asarray(self.anomalies.get_offsets())
+            offsets = offsets[offsets[:, 0] >= x[0]]
+            self.anomalies.set_offsets(np.vstack((offsets, np.column_stack((x_new[mask], y_new[mask])))))
+
+    def render(self, selected_data, time_point=None, fmt="png"):
+        """Update the artists with the rows that are new since the last refresh and return the image."""
+        x = selected_data["Time (s)"].to_numpy()
+
+        start = self._first_new_row(selected_data, x)
+        if start is None:
+            self._draw_all(selected_data, x)
+        elif start < len(x):
+            self._append(selected_data, x, start)
+        if len(x):
+            self.last_row = (x[-1], self._row(selected_data, -1))
+
+        self.marker.set_visible(time_point is not None)
+        if time_point is not None:
+            self.marker.set_xdata([time_point, time_point])
+
+        self.ax.relim(visible_only=True)
+        self.ax.autoscale_view()
+
+        with mpl_theme(self.theme):
+            buffer = io.BytesIO()
+            self.fig.savefig(buffer, format=fmt, bbox_inches="tight", dpi=RENDER_DPI)
+        return buffer.getvalue()
+
+
+def live_chart_image(selected_data, option, y_col, theme, time_point=None, fmt="png", window=None):
+    """
+    Live-feed main chart, reusing this browser session's LiveChart (kept in
+    st.session_state) while the variable, columns, theme and live window
+    (e.g. "1 h") stay the same.
+    """
+    chart = st.session_state.get("live_chart")
+    if chart is None or not chart.matches(option, y_col, selected_data.columns, theme, window):
+        chart = st.session_state["live_chart"] = LiveChart(option, y_col, selected_data.columns, theme, window)
+    return chart.render(selected_data, time_point, fmt)
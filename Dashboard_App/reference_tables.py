@@ -55,7 +55,7 @@ def render_iaq_reference_table():
 
     styled_table = IAQ_table.style.apply(highlight_rows, axis=1)
 
-    st.dataframe(styled_table, use_container_width=True)
+    st.dataframe(styled_table, width="stretch")
 
     st.write(
         "Source: Indoor Air Quality Index (IAQ) for HVAC applications "
@@ -1,27 +1,81 @@
 # reporting_data.py
 # PDF report generation and data export utilities
 
-import matplotlib.pyplot as plt
+import gzip
+import io
+import os
+import tempfile
+
+import fpdf
+import numpy as np
 from fpdf import FPDF
+from matplotlib.figure import Figure
 from PIL import Image
 import pandas as pd
-import io
 import streamlit as st
-import matplotlib as mt
 
+from Dashboard_App.data_utils import dataset_stats, decimate_indices, frame_fingerprint
+from Dashboard_App.theme_toggle import mpl_theme
 
-def generate_pdf_report(
-    option,
-    data_dict,
-    df_clean,
-    compare_variables=None
-):
+# Rows listed in the report's data table. Longer sessions are listed at an even
+# stride (every k-th row) so the PDF stays a few pages long.
+REPORT_TABLE_MAX_ROWS = 1000
+# Finished reports kept in memory, keyed by data fingerprint and report options
+REPORT_CACHE_SIZE = 16
+
+# fpdf2 can place images from memory; the original fpdf 1.7 only reads files
+FPDF_IMAGE_BUFFERS = int(fpdf.FPDF_VERSION.split(".")[0]) >= 2
+
+# Finished CSV/Excel/JSON exports kept in memory, keyed by data fingerprint and format
+EXPORT_CACHE_SIZE = 32
+# Rows serialised per step, so no single intermediate string holds the whole file
+EXPORT_CHUNK_ROWS = 20000
+
+# xlsxwriter writes workbooks several times faster than openpyxl (optional dependency)
+try:
+    import xlsxwriter  # noqa: F401
+    EXCEL_ENGINE = "xlsxwriter"
+except ImportError:
+    EXCEL_ENGINE = "openpyxl"
+
+
+def _figure_png(fig):
+    """Render a figure to PNG bytes in memory."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", bbox_inches="tight")
+    return buffer.getvalue()
+
+
+def _report_points(fig, x, y):
+    """Reduce a series to about one point per pixel of the report figure."""
+    x = np.asarray(x)
+    y = np.asarray(y)
+    idx = decimate_indices(x, y, int(fig.get_figwidth() * fig.dpi))
+    return x[idx], y[idx]
+
+
+def _table_rows(selected_data, col):
     """
-    Generate a PDF report and Streamlit download buttons.
+    The data table as one block of text ("time, value" per line), built with
+    vectorised string operations. Capped at REPORT_TABLE_MAX_ROWS rows.
     """
+    n_rows = len(selected_data)
+    stride = max(1, -(-n_rows // REPORT_TABLE_MAX_ROWS))
+    table = selected_data.iloc[::stride]
+
+    lines = table["Time (s)"].astype(str) + ", " + table[col].astype(str)
+    note = None
+    if stride > 1:
+        note = f"Showing every {stride}th row ({len(table)} of {n_rows} rows)"
+    return "\n".join(lines), note
 
-    mt.use("Agg")
 
+def build_pdf_report(option, data_dict, compare_variables=None):
+    """
+    Build the PDF report and return it as bytes. Figures are rendered in
+    memory (no files in the working directory), so concurrent users never
+    share state.
+    """
     selected_data = data_dict[option]
     col = selected_data.columns[1] if option != "Overview" else None
 
@@ -34,14 +88,13 @@ def generate_pdf_report(
     # Raw data table
     # --------------------------------------------------
     if option != "Overview":
+        table_text, note = _table_rows(selected_data, col)
         pdf.set_font("Times", "", 12)
         pdf.cell(0, 8, f"Time (s), {option}", ln=True)
-        for _, row in selected_data.iterrows():
-            pdf.cell(
-                0, 5,
-                f"{row['Time (s)']}, {row[col]}",
-                ln=True
-            )
+        if note:
+            pdf.cell(0, 5, note, ln=True)
+        # One multi_cell for the whole table; it breaks pages itself
+        pdf.multi_cell(0, 5, table_text)
 
     # --------------------------------------------------
     # Summary statistics
@@ -51,117 +104,135 @@ def generate_pdf_report(
         pdf.set_font("Times", "B", 14)
         pdf.cell(0, 8, "Summary Statistics", ln=True)
         pdf.set_font("Times", "", 12)
-        pdf.cell(0, 5, f"Mean: {selected_data[col].mean():.2f}", ln=True)
-        pdf.cell(0, 5, f"Max: {selected_data[col].max():.2f}", ln=True)
-        pdf.cell(0, 5, f"Min: {selected_data[col].min():.2f}", ln=True)
+        # Shared with the Statistics tab: computed once per dataset
+        stats = dataset_stats(data_dict, option)
+        pdf.cell(0, 5, f"Mean: {stats.mean:.2f}", ln=True)
+        pdf.cell(0, 5, f"Max: {stats.max:.2f}", ln=True)
+        pdf.cell(0, 5, f"Min: {stats.min:.2f}", ln=True)
+        pdf.cell(0, 5, f"Median: {stats.quantile(0.5):.2f}", ln=True)
+        if stats.range is not None and stats.seconds_observed:
+            low, high = stats.range
+            if low > float("-inf"):
+                pdf.cell(0, 5, f"Time below {low}: {stats.seconds_below / stats.seconds_observed:.1%}", ln=True)
+            pdf.cell(0, 5, f"Time above {high}: {stats.seconds_above / stats.seconds_observed:.1%}", ln=True)
 
     # --------------------------------------------------
     # Main plot
     # --------------------------------------------------
-    fig, ax = plt.subplots()
-
-    if option == "Overview":
-        for c in selected_data.columns[1:]:
-            ax.plot(selected_data["Time (s)"], selected_data[c], label=c)
-        ax.legend()
-    else:
-        ax.plot(
-            selected_data["Time (s)"],
-            selected_data[col],
-            marker="o",
-            markersize=3
-        )
+    # Figure objects rather than pyplot; printed reports always use the light theme
+    with mpl_theme("Light"):
+        fig = Figure()
+        ax = fig.subplots()
 
-    ax.set_xlabel("Time (s)")
-    ax.set_ylabel("Values" if option == "Overview" else col)
+        if option == "Overview":
+            for c in selected_data.columns[1:]:
+                ax.plot(*_report_points(fig, selected_data["Time (s)"], selected_data[c]), label=c)
+            ax.legend()
+        else:
+            ax.plot(
+                *_report_points(fig, selected_data["Time (s)"], selected_data[col]),
+                marker="o",
+                markersize=3
+            )
 
-    fig.savefig("main_plot.png", bbox_inches="tight")
-    plt.close(fig)
+        ax.set_xlabel("Time (s)")
+        ax.set_ylabel("Values" if option == "Overview" else col)
+        png_bytes = _figure_png(fig)
 
-    _add_image_to_pdf(pdf, "main_plot.png")
+    _add_image_to_pdf(pdf, png_bytes)
 
     # --------------------------------------------------
     # Comparison plot
     # --------------------------------------------------
     if compare_variables:
-        fig2, ax2 = plt.subplots()
-        for var in compare_variables:
-            df = data_dict[var]
-            y_col2 = df.columns[1]
-            ax2.plot(
-                df["Time (s)"],
-                df[y_col2],
-                label=var,
-                marker="o",
-                markersize=3
-            )
-        ax2.set_xlabel("Time (s)")
-        ax2.set_ylabel("Values")
-        ax2.legend()
-
-        fig2.savefig("comparison_plot.png", bbox_inches="tight")
-        plt.close(fig2)
+        with mpl_theme("Light"):
+            fig2 = Figure()
+            ax2 = fig2.subplots()
+            for var in compare_variables:
+                df = data_dict[var]
+                y_col2 = df.columns[1]
+                ax2.plot(
+                    *_report_points(fig2, df["Time (s)"], df[y_col2]),
+                    label=var,
+                    marker="o",
+                    markersize=3
+                )
+            ax2.set_xlabel("Time (s)")
+            ax2.set_ylabel("Values")
+            ax2.legend()
+            png_bytes = _figure_png(fig2)
 
         pdf.add_page()
-        _add_image_to_pdf(pdf, "comparison_plot.png")
+        _add_image_to_pdf(pdf, png_bytes)
 
-    # --------------------------------------------------
-    # PDF download
-    # --------------------------------------------------
-    pdf_bytes = pdf.output(dest="S").encode("latin-1")
-    pdf_buffer = io.BytesIO(pdf_bytes)
+    pdf_bytes = pdf.output(dest="S")
+    # fpdf 1.7 returns a latin-1 str, fpdf2 a bytearray
+    if isinstance(pdf_bytes, str):
+        return pdf_bytes.encode("latin-1")
+    return bytes(pdf_bytes)
 
-    st.download_button(
-        "Download PDF Report",
-        data=pdf_buffer,
-        file_name=f"{option}_report.pdf",
-        mime="application/pdf"
-    )
 
-    # --------------------------------------------------
-    # CSV
-    # --------------------------------------------------
-    csv_data = df_clean.to_csv(index=False).encode("utf-8")
-    st.download_button(
-        "Download CSV",
-        data=csv_data,
-        file_name=f"{option}_cleaned.csv",
-        mime="text/csv"
+@st.cache_data(max_entries=REPORT_CACHE_SIZE, show_spinner=False)
+def _cached_pdf_report(data_key, option, compare_variables, _data_dict):
+    """
+    build_pdf_report, memoised by data fingerprint and report options.
+    The data itself (underscore argument) is not hashed: data_key identifies it.
+    """
+    return build_pdf_report(option, _data_dict, list(compare_variables))
+
+
+def generate_pdf_report(
+    option,
+    data_dict,
+    df_clean,
+    compare_variables=None
+):
+    """
+    Generate a PDF report and Streamlit download buttons.
+    The PDF is only built when its download button is clicked.
+    """
+
+    compare_variables = tuple(compare_variables or ())
+    data_key = frame_fingerprint(
+        data_dict[option], *(data_dict[var] for var in compare_variables)
     )
 
     # --------------------------------------------------
-    # Excel
+    # PDF download (built on click, then cached)
     # --------------------------------------------------
-    excel_buffer = io.BytesIO()
-    with pd.ExcelWriter(excel_buffer, engine="openpyxl") as writer:
-        df_clean.to_excel(writer, index=False)
-    excel_buffer.seek(0)
-
     st.download_button(
-        "Download Excel",
-        data=excel_buffer,
-        file_name=f"{option}_cleaned.xlsx",
-        mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        "Download PDF Report",
+        data=lambda: _cached_pdf_report(data_key, option, compare_variables, data_dict),
+        file_name=f"{option}_report.pdf",
+        mime="application/pdf"
     )
 
     # --------------------------------------------------
-    # JSON
+    # CSV / Excel / JSON (each built on click, then cached)
     # --------------------------------------------------
-    json_data = df_clean.to_json(orient="records")
-    st.download_button(
-        "Download JSON",
-        data=json_data,
-        file_name=f"{option}_cleaned.json",
-        mime="application/json"
-    )
+    # The fingerprint of the cleaned data covers both the dataset and the
+    # cleaning options that produced it
+    export_key = frame_fingerprint(df_clean)
+
+    for label, fmt in [
+        ("Download CSV", "csv"),
+        ("Download CSV (gzip)", "csv.gz"),
+        ("Download Excel", "xlsx"),
+        ("Download JSON", "json")
+    ]:
+        st.download_button(
+            label,
+            data=lambda fmt=fmt: _cached_export(export_key, fmt, df_clean),
+            file_name=f"{option}_cleaned.{fmt}",
+            mime=EXPORT_FORMATS[fmt][1]
+        )
 
 
-def _add_image_to_pdf(pdf, image_path):
+def _add_image_to_pdf(pdf, png_bytes):
     """
-    Helper function to scale and add an image to a PDF page.
+    Helper function to scale and add an in-memory PNG to a PDF page.
     """
-    im = Image.open(image_path)
-    img_width, img_height = im.size
+    img_width, img_height = Image.open(io.BytesIO(png_bytes)).size
 
     max_width = 190
     scale = max_width / img_width
@@ -170,10 +241,93 @@ def _add_image_to_pdf(pdf, image_path):
     if scaled_height > 277:
         pdf.add_page()
 
-    pdf.image(
-        image_path,
-        x=10,
-        y=pdf.get_y() + 5,
-        w=max_width,
-        h=scaled_height
-    )
+    position = dict(x=10, y=pdf.get_y() + 5, w=max_width, h=scaled_height)
+
+    if FPDF_IMAGE_BUFFERS:
+        pdf.image(io.BytesIO(png_bytes), **position)
+        return
+
+    # fpdf 1.7 reads images from disk: use a private temporary directory so
+    # concurrent reports never share a file name
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        image_path = os.path.join(tmp_dir, "figure.png")
+        with open(image_path, "wb") as f:
+            f.write(png_bytes)
+        pdf.image(image_path, **position)
+
+
+# --------------------------------------------------
+# Data exports
+# --------------------------------------------------
+
+def _csv_chunks(df):
+    """Encode a dataframe as CSV, EXPORT_CHUNK_ROWS rows at a time."""
+    yield df.iloc[:0].to_csv(index=False).encode("utf-8")
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+        yield chunk.to_csv(index=False, header=False).encode("utf-8")
+
+
+def export_csv(df):
+    """CSV bytes, written chunk by chunk."""
+    buffer = io.BytesIO()
+    for chunk in _csv_chunks(df):
+        buffer.write(chunk)
+    return buffer.getvalue()
+
+
+def export_csv_gzip(df):
+    """Gzip-compressed CSV bytes; chunks are compressed as they are produced."""
+    buffer = io.BytesIO()
+    # mtime=0 keeps the output identical for identical data
+    with gzip.GzipFile(fileobj=buffer, mode="wb", compresslevel=6, mtime=0) as gz:
+        for chunk in _csv_chunks(df):
+            gz.write(chunk)
+    return buffer.getvalue()
+
+
+def export_excel(df):
+    """Excel workbook bytes (xlsxwriter when installed, otherwise openpyxl)."""
+    excel_buffer = io.BytesIO()
+    with pd.ExcelWriter(excel_buffer, engine=EXCEL_ENGINE) as writer:
+        df.to_excel(writer, index=False)
+    return excel_buffer.getvalue()
+
+
+def export_json(df):
+    """
+    JSON records, written chunk by chunk. float32 sensor columns are written
+    at their own precision (21.97, not 21.9699993134).
+    """
+    float32_cols = df.select_dtypes("float32").columns
+    buffer = io.BytesIO()
+    buffer.write(b"[")
+    for start in range(0, len(df), EXPORT_CHUNK_ROWS):
+        chunk = df.iloc[start:start + EXPORT_CHUNK_ROWS]
+        if len(float32_cols):
+            # The shortest repr of a float32 value, read back as float64
+            chunk = chunk.astype({c: str for c in float32_cols}).astype({c: "float64" for c in float32_cols})
+        if start:
+            buffer.write(b",")
+        buffer.write(chunk.to_json(orient="records")[1:-1].encode("utf-8"))
+    buffer.write(b"]")
+    return buffer.getvalue()
+
+
+# format -> (exporter, MIME type)
+EXPORT_FORMATS = {
+    "csv": (export_csv, "text/csv"),
+    "csv.gz": (export_csv_gzip, "application/gzip"),
+    "xlsx": (export_excel, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "json": (export_json, "application/json")
+}
+
+
+@st.cache_data(max_entries=EXPORT_CACHE_SIZE, show_spinner=False)
+def _cached_export(data_key, fmt, _df):
+    """
+    One export format, memoised by data fingerprint and format; the least
+    recently used entries are evicted beyond EXPORT_CACHE_SIZE.
+    """
+    exporter, _ = EXPORT_FORMATS[fmt]
+    return exporter(_df)
@@ -1,13 +1,53 @@
 # statistics tab
 import streamlit as st
 
-def render_statistics_tab(selected_data, option, y_col):
+from Dashboard_App.data_utils import dataset_stats, live_stats
+
+
+def _duration(seconds):
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m {seconds:02d}s"
+
+
+def render_statistics_tab(data_dict, option, live_path=None):
     if option == "Overview":
         st.info("Summary statistics not available for Overview mode.")
         return
 
+    # One pass over the data, kept with the dataset (or updated with new rows when live)
+    stats = live_stats(live_path, option) if live_path else None
+    if stats is not None:
+        st.caption(f"Live: all {stats.count} readings received, not only the window shown")
+    else:
+        stats = dataset_stats(data_dict, option)
+
+    col1, col2, col3, col4 = st.columns(4)
+    col1.metric("Mean", f"{stats.mean:.2f}")
+    col2.metric("Max", f"{stats.max:g}")
+    col3.metric("Min", f"{stats.min:g}")
+    col4.metric("Std Dev", f"{stats.std:.3f}")
+
+    p5, median, p95 = stats.quantile([0.05, 0.5, 0.95])
     col1, col2, col3, col4 = st.columns(4)
-    col1.metric("Mean", selected_data[y_col].mean())
-    col2.metric("Max", selected_data[y_col].max())
-    col3.metric("Min", selected_data[y_col].min())
-    col4.metric("Std Dev", f"{selected_data[y_col].std():.3f}")
+    col1.metric("5th Percentile", f"{p5:.2f}")
+    col2.metric("Median", f"{median:.2f}")
+    col3.metric("95th Percentile", f"{p95:.2f}")
+
+    if stats.range is not None and stats.seconds_observed:
+        low, high = stats.range
+        outside = stats.seconds_below + stats.seconds_above
+        col4.metric(
+            "Time Outside Range",
+            _duration(outside),
+            f"{100 * outside / stats.seconds_observed:.1f}% of time",
+            delta_color="off"
+        )
+        if low == float("-inf"):
+            # Only high readings are anomalies (IAQ)
+            st.caption(f"Above {high}: {_duration(stats.seconds_above)}.")
+        else:
+            st.caption(
+                f"Range {low}–{high}: {_duration(stats.seconds_below)} below, "
+                f"{_duration(stats.seconds_above)} above."
+            )
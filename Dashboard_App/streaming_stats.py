@@ -0,0 +1,226 @@
+# streaming_stats.py
+# Single-pass, mergeable statistics: percentile sketch, running summaries
+
+import os
+from functools import lru_cache
+
+import numpy as np
+
+from Dashboard_App.anomaly_utils import anomaly_range
+from Dashboard_App.data_sources import list_archive_sessions, load_archive_session
+
+
+# Centroid budget of the percentile sketch (~compression / 2 centroids are kept)
+SKETCH_COMPRESSION = 200
+# Readings further apart than this are a logger gap: the time in between is
+# not counted towards time above/below the threshold range
+SAMPLE_GAP_LIMIT_S = 60
+
+
+class QuantileSketch:
+    """
+    Mergeable percentile sketch (a merging t-digest). Values are kept as
+    weighted centroids, small near the tails and large near the median, so a
+    whole year of readings fits in about a hundred centroids and percentiles
+    stay accurate where they matter. Adding a batch and merging two sketches
+    are the same vectorised sort-and-bin step.
+    """
+
+    def __init__(self, compression=SKETCH_COMPRESSION):
+        self.compression = compression
+        self.means = np.empty(0)
+        self.weights = np.empty(0)
+        self.min = np.inf
+        self.max = -np.inf
+
+    def update(self, values):
+        values = np.sort(np.asarray(values, dtype=np.float64))
+        values = values[~np.isnan(values)]  # NaNs sort last
+        if len(values):
+            self.min = min(self.min, values[0])
+            self.max = max(self.max, values[-1])
+            # Condense the batch on its own (already sorted), then fold it in
+            batch_means, batch_weights = self._bin(values, np.ones(len(values)))
+            self._fold(batch_means, batch_weights)
+        return self
+
+    def merge(self, other):
+        if len(other.means):
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._fold(other.means, other.weights)
+        return self
+
+    def _fold(self, means, weights):
+        means = np.concatenate((self.means, means))
+        weights = np.concatenate((self.weights, weights))
+        order = np.argsort(means, kind="stable")
+        self.means, self.weights = self._bin(means[order], weights[order])
+
+    def _bin(self, means, weights):
+        """Group sorted centroids into at most one centroid per unit of k."""
+        # k1 scale function: centroids shrink towards both tails. Binning on
+        # k keeps centroids in value order.
+        cumulative = np.cumsum(weights)
+        q_mid = (cumulative - weights / 2) / cumulative[-1]
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q_mid - 1) + self.compression / 4
+        cluster = np.floor(k).astype(np.int64)
+
+        starts = np.flatnonzero(np.r_[True, cluster[1:] != cluster[:-1]])
+        binned_weights = np.add.reduceat(weights, starts)
+        return np.add.reduceat(means * weights, starts) / binned_weights, binned_weights
+
+    def quantile(self, q):
+        """Estimated quantile(s), q in [0, 1]; NaN while empty."""
+        if not len(self.means):
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else np.nan
+        centres = np.cumsum(self.weights) - self.weights / 2
+        total = self.weights.sum()
+        return np.interp(
+            np.asarray(q) * total,
+            np.r_[0, centres, total],
+            np.r_[self.min, self.means, self.max]
+        )
+
+
+class RunningStats:
+    """
+    Single-pass summary statistics for one variable: count, mean and
+    variance (Welford / Chan et al. parallel merge), min, max, percentiles
+    (QuantileSketch) and time spent below/above its anomaly_range.
+    Accumulators can be updated with new rows as they arrive and merged across
+    sessions, so a summary over many sessions costs one merge per session
+    rather than a rescan of every reading.
+    """
+
+    def __init__(self, var=None):
+        self.var = var
+        self.range = anomaly_range(var)
+        self.count = 0
+        self.mean = np.nan
+        self.m2 = 0.0  # sum of squared deviations from the mean
+        self.min = np.nan
+        self.max = np.nan
+        self.sketch = QuantileSketch()
+        self.seconds_observed = 0.0
+        self.seconds_below = 0.0
+        self.seconds_above = 0.0
+        # The newest reading's duration is only known once the next one arrives
+        self._last_time = None
+        self._last_state = None
+
+    def _add_moments(self, count, mean, m2, vmin, vmax):
+        """Chan et al. combination of two (count, mean, M2) partial results."""
+        if not count:
+            return
+        if not self.count:
+            self.count, self.mean, self.m2, self.min, self.max = count, mean, m2, vmin, vmax
+            return
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.min = min(self.min, vmin)
+        self.max = max(self.max, vmax)
+
+    def update(self, values, times=None):
+        """
+        Add a batch of readings (times ascending, in seconds, for the
+        time-in-range totals). NaNs are skipped.
+        """
+        values = np.asarray(values, dtype=np.float64)
+        valid = ~np.isnan(values)
+        x = values[valid]
+
+        if len(x):
+            batch_mean = x.mean()
+            self._add_moments(len(x), batch_mean, float(((x - batch_mean) ** 2).sum()), x.min(), x.max())
+            self.sketch.update(x)
+
+        if times is not None and len(x):
+            t = np.asarray(times, dtype=np.float64)[valid]
+            state = np.zeros(len(x), dtype=np.int8)  # -1 below, 0 in range, 1 above
+            if self.range is not None:
+                low, high = self.range
+                state[x < low] = -1
+                state[x > high] = 1
+
+            # Each reading lasts until the next one (gaps longer than the limit count as unobserved)
+            if self._last_time is not None:
+                t = np.r_[self._last_time, t]
+                state = np.r_[self._last_state, state]
+            duration = np.diff(t)
+            duration[(duration < 0) | (duration > SAMPLE_GAP_LIMIT_S)] = 0
+            self.seconds_observed += duration.sum()
+            self.seconds_below += duration[state[:-1] == -1].sum()
+            self.seconds_above += duration[state[:-1] == 1].sum()
+            self._last_time, self._last_state = t[-1], state[-1]
+        return self
+
+    def merge(self, other):
+        """Fold another accumulator (e.g. a different session) into this one."""
+        self._add_moments(other.count, other.mean, other.m2, other.min, other.max)
+        self.sketch.merge(other.sketch)
+        self.seconds_observed += other.seconds_observed
+        self.seconds_below += other.seconds_below
+        self.seconds_above += other.seconds_above
+        self._last_time = self._last_state = None
+        return self
+
+    @property
+    def std(self):
+        """Sample standard deviation (ddof=1, as pandas .std())."""
+        return np.sqrt(self.m2 / (self.count - 1)) if self.count > 1 else np.nan
+
+    def quantile(self, q):
+        return self.sketch.quantile(q)
+
+    def summary(self):
+        p5, median, p95 = self.quantile([0.05, 0.5, 0.95])
+        return {
+            "count": self.count, "mean": self.mean, "std": self.std,
+            "min": self.min, "max": self.max,
+            "p5": p5, "median": median, "p95": p95,
+            "seconds_observed": self.seconds_observed,
+            "seconds_below": self.seconds_below,
+            "seconds_above": self.seconds_above,
+        }
+
+
+def column_stats(df, col, var=None):
+    """
+    RunningStats over one column of a dataframe (a single pass). var names
+    the variable whose range applies (default: the column name).
+    """
+    return RunningStats(col if var is None else var).update(df[col].to_numpy(), df["Time (s)"].to_numpy())
+
+
+@lru_cache(maxsize=4096)
+def _archive_session_stats(path, mtime_ns, col):
+    """Per-file statistics, recomputed only when the file changes."""
+    df = load_archive_session(path, columns=[col])
+    return column_stats(df, col)
+
+
+def archive_stats(archive_dir, col, locations=None, start_date=None, end_date=None):
+    """
+    Statistics for one metric across many archived sessions, merged from
+    per-session accumulators: after the first call a year of sessions is a
+    few hundred merges instead of a rescan. Filters as in load_archive.
+    """
+    sessions = list_archive_sessions(archive_dir)
+    stats = RunningStats(col)
+    if sessions is None:
+        return stats
+
+    if locations:
+        sessions = sessions[sessions["location"].isin(list(locations))]
+    if start_date is not None:
+        sessions = sessions[sessions["date"] >= str(start_date)]
+    if end_date is not None:
+        sessions = sessions[sessions["date"] <= str(end_date)]
+
+    for path in sessions["path"]:
+        stats.merge(_archive_session_stats(path, os.stat(path).st_mtime_ns, col))
+    return stats
@@ -1,9 +1,57 @@
 # theme_toggle.py
 # Handles light/dark theme switching for Streamlit + matplotlib
 
+import threading
+from contextlib import contextmanager
+
 import streamlit as st
 import matplotlib as mt
 
+# Matplotlib styling per theme, applied only while a chart is drawn (mpl_theme)
+MPL_THEMES = {
+    "Dark": {
+        "axes.facecolor": "#222222",
+        "figure.facecolor": "#222222",
+        "savefig.facecolor": "#222222",
+        "axes.edgecolor": "#E7E8CB",
+        "axes.labelcolor": "#E7E8CB",
+        "xtick.color": "#E7E8CB",
+        "ytick.color": "#E7E8CB",
+        "text.color": "#E7E8CB",
+        "legend.facecolor": "#333333",
+        "grid.color": "#444444"
+    },
+    "Light": {
+        "axes.facecolor": "white",
+        "figure.facecolor": "white",
+        "savefig.facecolor": "white",
+        "axes.edgecolor": "black",
+        "axes.labelcolor": "black",
+        "xtick.color": "black",
+        "ytick.color": "black",
+        "text.color": "black",
+        "legend.facecolor": "#FFFFFF",
+        "grid.color": "#DDDDDD"
+    }
+}
+
+
+# rcParams are global to the process, and every browser session's script runs
+# on its own thread: one chart at a time is drawn with its theme applied
+_render_lock = threading.Lock()
+
+
+@contextmanager
+def mpl_theme(theme):
+    """
+    Draw matplotlib figures in the given theme. Holds the render lock while
+    the theme's rcParams are in force, so charts rendered at the same time
+    for users with different themes never see each other's settings.
+    """
+    with _render_lock, mt.rc_context(MPL_THEMES[theme]):
+        yield
+
+
 def theme_selector():
     """
     Render theme selector in sidebar and return selected theme.
@@ -17,23 +65,10 @@ def theme_selector():
 
 def apply_theme(theme):
     """
-    Apply theme styles to matplotlib and Streamlit via CSS.
+    Apply theme styles to Streamlit via CSS. Charts take the theme from
+    mpl_theme when they are drawn; the global rcParams are left alone.
     """
     if theme == "Dark":
-        # Matplotlib dark styling
-        mt.rcParams.update({
-            "axes.facecolor": "#222222",
-            "figure.facecolor": "#222222",
-            "savefig.facecolor": "#222222",
-            "axes.edgecolor": "#E7E8CB",
-            "axes.labelcolor": "#E7E8CB",
-            "xtick.color": "#E7E8CB",
-            "ytick.color": "#E7E8CB",
-            "text.color": "#E7E8CB",
-            "legend.facecolor": "#333333",
-            "grid.color": "#444444"
-        })
-
         # Streamlit dark CSS
         st.markdown(
             """
@@ -52,20 +87,6 @@ def apply_theme(theme):
         )
 
     else:
-        # Matplotlib light styling
-        mt.rcParams.update({
-            "axes.facecolor": "white",
-            "figure.facecolor": "white",
-            "savefig.facecolor": "white",
-            "axes.edgecolor": "black",
-            "axes.labelcolor": "black",
-            "xtick.color": "black",
-            "ytick.color": "black",
-            "text.color": "black",
-            "legend.facecolor": "#FFFFFF",
-            "grid.color": "#DDDDDD"
-        })
-
         # HARD reset to override config.toml dark theme
         st.markdown(
             """
@@ -5,9 +5,17 @@ Module: Python Data Acquisition Monitor | Role: Real-Time Monitor, CSV Logger &
 Description:
     This script acts as the main receiver for the wireless sensor system.
     It connects to the project's cloud data stream, buffers incoming sensor readings
-    from the MKR WiFi 1010, displays live metrics to the console, and persists 
-    the full dataset to both a session-specific CSV file and a cumulative master SQLite database.
-    Session metadata (Start Time, Location) is stored efficiently in headers and 
+    from every MKR WiFi 1010 pod publishing under the subscribed topics, displays live
+    metrics to the console, and persists the full dataset to both a device-specific
+    session CSV file and a cumulative master SQLite database. Each session is also
+    written as a fixed-width binary record file for the live dashboard (binary_log.py).
+    Each database flush also updates the 1 min / 15 min / 1 h rollup tables (db_schema.py).
+    Every CSV write also updates that session's summary (row count, duration,
+    min/max/mean, threshold breaches, content hash) in the session index (session_index.py).
+    A single running logger serves any number of pods: each device keeps its own
+    reassembly buffer, elapsed counter and session file, and its location label is
+    read from the device configuration file (see DEVICE_CONFIG_FILENAME).
+    Session metadata (Start Time, Location) is stored efficiently in headers and
     tables, not repeated on every row. It also maintains a master 'Data Catalog' log.
 System Requirements:
     1. NETWORK: Active internet connection (Mobile Hotspot recommended)
@@ -18,235 +26,663 @@ License: MIT
 """
 
 import paho.mqtt.client as mqtt
+import argparse
 import csv
+import io
+import json
 import os
-import sqlite3 
+import queue
+import re
+import sqlite3
+import threading
+import time
 from datetime import datetime
 
+import binary_log
+import db_schema
+import session_index
+
 # SYSTEM CONFIGURATION
 
 # Server address for the project's dedicated cloud instance (Cedalo).
-MQTT_SERVER = "pf-uyp85ksb0tbt7jocc1qo.cedalo.cloud" 
+MQTT_SERVER = "pf-uyp85ksb0tbt7jocc1qo.cedalo.cloud"
 MQTT_PORT = 1883
 
-# Topic hierarchy matches the structure defined in the Arduino firmware.
+# Topic hierarchy matches the structure defined in the Arduino firmware:
+# chem501/<device>/stuffy_study/<metric>. The '+' level identifies the pod.
 TOPIC_BASE = "chem501/josh_kinga/stuffy_study"
+DEFAULT_TOPICS = ["chem501/+/stuffy_study/#"]
+
+# Device configuration: topics to subscribe to and the location label of each pod.
+# Example:
+#   {"topics": ["chem501/+/stuffy_study/#"],
+#    "locations": {"josh_kinga": "MIF Pod 1"}}
+DEVICE_CONFIG_FILENAME = "stuffy_study_devices.json"
 
-# Capture precise start time once at the beginning of the session.
-SESSION_START_DT = datetime.now()
-SESSION_START_STR = SESSION_START_DT.strftime('%Y-%m-%d %H:%M:%S')
-FILE_DATE_STR = SESSION_START_DT.strftime('%Y-%m-%d_%H-%M-%S')
+# A device that has been silent for longer than this starts a new session
+# (new CSV file, elapsed counter reset) when it next reports.
+SESSION_GAP_SECONDS = 300
 
-# Dynamic Filenames: CSV is unique per session. DB is a single master file.
-CSV_FILENAME = f"Stuffy_Study_{FILE_DATE_STR}.csv"
+# Filenames: CSV is unique per device session. DB is a single master file.
 DB_FILENAME = "Stuffy_Study_Master.db"
-CATALOG_FILENAME = "_Experiment_Data_Catalog.csv"
+CATALOG_FILENAME = db_schema.CATALOG_FILENAME
+
+CSV_HEADER = [
+    "Elapsed_Seconds", "Location_Note",
+    "CO2_ppm", "VOC_ppm", "IAQ", "Gas_Res_Ohms",
+    "Temp_Raw_C", "Temp_Comp_C", "Hum_Raw_pct", "Hum_Comp_pct", "Accuracy"
+]
+
+# Write-behind buffering: readings are grouped and written in one CSV write and
+# one SQL transaction, rather than one commit (and one disk sync) per reading.
+FLUSH_EVERY_ROWS = 50        # Flush once this many readings are waiting...
+FLUSH_INTERVAL_MS = 2000     # ...or once this long has passed since the last flush.
+MAX_QUEUED_ROWS = 10000      # Bounded hand-off queue between the MQTT thread and the writer.
+ENQUEUE_TIMEOUT_MS = 50      # How long the MQTT thread may wait on a full queue before dropping a row.
+STATS_INTERVAL_S = 60        # How often the writer prints pipeline counters to the console.
+
+# Each session is also written as a fixed-width binary record file (.bin) that the
+# dashboard memory-maps for live views (see binary_log.py). 0 keeps every row;
+# otherwise only the last BINARY_RING_HOURS hours (at 1 Hz) are kept, in a fixed-size ring.
+BINARY_RING_HOURS = 0
+
+SENSOR_DATA_INSERT = '''
+    INSERT INTO sensor_data (
+        session_id, timestamp,
+        elapsed_seconds, location_note,
+        co2_ppm, voc_ppm, iaq, gas_res_ohms,
+        temp_raw_c, temp_comp_c, hum_raw_pct, hum_comp_pct, accuracy
+    ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def load_device_config(config_path):
+    """
+    Reads the topic list and device location labels from the JSON config file.
+    A missing file falls back to the default wildcard subscription.
+    """
+    config = {"topics": list(DEFAULT_TOPICS), "locations": {}}
+
+    if os.path.exists(config_path):
+        with open(config_path) as f:
+            user_config = json.load(f)
+        config["topics"] = user_config.get("topics") or config["topics"]
+        config["locations"] = user_config.get("locations", {})
+
+    return config
+
+
+def device_id_from_topic(topic, subscriptions):
+    """
+    Identifies the publishing pod from a telemetry topic.
+    The device is the level matched by the first '+' wildcard of the subscription
+    (e.g. 'josh_kinga' in chem501/josh_kinga/stuffy_study/co2). Subscriptions
+    without a '+' fall back to the topic minus its metric suffix.
+    """
+    levels = topic.split("/")
+
+    for sub in subscriptions:
+        if not mqtt.topic_matches_sub(sub, topic):
+            continue
+        sub_levels = sub.split("/")
+        if "+" in sub_levels:
+            return levels[sub_levels.index("+")]
+        break
+
+    return "/".join(levels[:-1])
+
+
+class DeviceSession:
+    """
+    Per-device acquisition state: the packet reassembly buffer, the sequential
+    elapsed counter and the session file names for one pod.
+    """
+
+    def __init__(self, device_id, location_label):
+        self.device_id = device_id
+        self.location_label = location_label
+
+        # Capture precise start time once at the beginning of the session.
+        self.start_dt = datetime.now()
+        self.start_str = self.start_dt.strftime('%Y-%m-%d %H:%M:%S')
+        file_date_str = self.start_dt.strftime('%Y-%m-%d_%H-%M-%S')
+        safe_device = re.sub(r'[^A-Za-z0-9_-]', '_', device_id)
+        self.csv_filename = f"Stuffy_Study_{file_date_str}_{safe_device}.csv"
+        self.bin_filename = f"Stuffy_Study_{file_date_str}_{safe_device}.bin"
+
+        # Temporary buffer for assembling fragmented sensor packets
+        self.current_reading = {}
+        # Internal sequential counter for elapsed session seconds
+        self.elapsed_seconds = 0
+        # Receipt time of the latest packet, used to detect the end of a session
+        self.last_seen = time.monotonic()
+        # Primary key in session_metadata, assigned by the writer thread on registration
+        self.session_id = None
+
+
+class IngestStats:
+    """
+    Thread-safe counters for the ingest pipeline: rows received, queued,
+    dropped (queue full) and committed, plus receipt-to-commit latency.
+    """
+
+    def __init__(self, write_queue):
+        self.queue = write_queue
+        self.lock = threading.Lock()
+        self.received = 0
+        self.dropped = 0
+        self.committed = 0
+        self.latency_last_ms = 0.0
+        self.latency_max_ms = 0.0
+        self.latency_total_ms = 0.0
+
+    def record_received(self, accepted):
+        with self.lock:
+            self.received += 1
+            if not accepted:
+                self.dropped += 1
+
+    def record_committed(self, received_times):
+        """Records a committed batch, given the monotonic receipt time of each row."""
+        now = time.monotonic()
+        latencies = [(now - t) * 1000.0 for t in received_times]
+        with self.lock:
+            self.committed += len(latencies)
+            self.latency_last_ms = latencies[-1]
+            self.latency_max_ms = max(self.latency_max_ms, max(latencies))
+            self.latency_total_ms += sum(latencies)
+
+    def snapshot(self):
+        """Returns a consistent copy of all counters."""
+        with self.lock:
+            return {
+                "queue_depth": self.queue.qsize(),
+                "received": self.received,
+                "dropped": self.dropped,
+                "committed": self.committed,
+                "latency_last_ms": self.latency_last_ms,
+                "latency_mean_ms": self.latency_total_ms / self.committed if self.committed else 0.0,
+                "latency_max_ms": self.latency_max_ms,
+            }
+
+    def summary(self):
+        s = self.snapshot()
+        return (f"Queue: {s['queue_depth']} | Received: {s['received']} | Dropped: {s['dropped']} | "
+                f"Committed: {s['committed']} | Latency ms (last/mean/max): "
+                f"{s['latency_last_ms']:.0f}/{s['latency_mean_ms']:.0f}/{s['latency_max_ms']:.0f}")
+
+
+class BufferedSessionWriter:
+    """
+    Dedicated writer thread for the session CSVs and the master database.
+    The MQTT callback only enqueues: session set-up, CSV writes, SQL inserts
+    and console output all happen here, in batches, so a slow disk or a
+    locked database never stalls the network loop or its keepalive.
+    The writer owns the CSV handles (one per device session), the session
+    summary index and the only SQLite connection used while logging. A
+    session's files are closed once a newer session of the same device
+    replaces it.
+    """
+
+    _STOP = object()
+    _WAKE = object()
+
+    def __init__(self, db_filename, on_session_open,
+                 flush_every_rows=FLUSH_EVERY_ROWS,
+                 flush_interval_ms=FLUSH_INTERVAL_MS,
+                 max_queued_rows=MAX_QUEUED_ROWS,
+                 enqueue_timeout_ms=ENQUEUE_TIMEOUT_MS,
+                 ring_hours=BINARY_RING_HOURS,
+                 index_filename=session_index.INDEX_FILENAME):
+        self.db_filename = db_filename
+        # Called on the writer thread as on_session_open(conn, session)
+        self.on_session_open = on_session_open
+        self.flush_every_rows = flush_every_rows
+        self.flush_interval_s = flush_interval_ms / 1000.0
+        self.enqueue_timeout_s = enqueue_timeout_ms / 1000.0
+        self.ring_rows = int(ring_hours * 3600)
+        # Summaries are updated from the rows as they are written, never by re-reading files
+        self.index = session_index.SessionIndex(index_filename)
+
+        # Bounded: a slow disk applies brief backpressure, then rows are dropped and counted
+        self.queue = queue.Queue(maxsize=max_queued_rows)
+        # Session set-up and stop requests bypass the row queue, so they never block
+        # the MQTT thread (or close()) when it is full. Drained before every row.
+        self.control = queue.SimpleQueue()
+        self.stats = IngestStats(self.queue)
+        # Writer thread only: the latest session of each device, and replaced
+        # sessions whose files are still to be closed
+        self.current = {}
+        self.ended = []
+
+        self.thread = threading.Thread(target=self._run, name="SessionWriter", daemon=True)
+        self.thread.start()
+
+    @property
+    def rows_written(self):
+        return self.stats.snapshot()["committed"]
+
+    def open_session(self, session):
+        """Queues the storage set-up (CSV header, metadata, catalog) for a new session."""
+        # Never dropped: the session's rows depend on it. Queued before any of its
+        # rows, so the writer always sees it before the first one.
+        self.control.put(("session", session))
+        self._wake()
+
+    def submit(self, session, row, received_at, timestamp):
+        """Queues one row for writing. Returns False if it was dropped because the queue is full."""
+        try:
+            self.queue.put(("row", session, row, received_at, timestamp), timeout=self.enqueue_timeout_s)
+            accepted = True
+        except queue.Full:
+            accepted = False
+        self.stats.record_received(accepted)
+        return accepted
+
+    def close(self):
+        """Flushes everything still queued and closes the CSV and database handles."""
+        self.control.put(self._STOP)
+        self._wake()
+        self.thread.join()
+
+    def _wake(self):
+        """Wakes the writer if it is waiting on an empty row queue (a full queue needs no wake-up)."""
+        try:
+            self.queue.put_nowait(self._WAKE)
+        except queue.Full:
+            pass
+
+    def _run(self):
+        """Writer thread: owns the file handles and database connection."""
+        # SQLite connections may only be used by the thread that created them.
+        conn = sqlite3.connect(self.db_filename)
+        csv_files = {}
+        bin_files = {}
+
+        batch = []
+        db_backlog = []
+        next_flush = time.monotonic() + self.flush_interval_s
+        next_stats = time.monotonic() + STATS_INTERVAL_S
+        stopping = False
+
+        while not stopping:
+            try:
+                item = self.queue.get(timeout=max(0.0, next_flush - time.monotonic()))
+            except queue.Empty:
+                item = None
+
+            if item is not None and item is not self._WAKE:
+                batch.append(item[1:])
+
+            stopping = self._run_control(conn)
+            if stopping:
+                # Rows queued before the stop request are still written
+                while not self.queue.empty():
+                    item = self.queue.get_nowait()
+                    if item is not self._WAKE:
+                        batch.append(item[1:])
+
+            if stopping or len(batch) >= self.flush_every_rows or time.monotonic() >= next_flush:
+                try:
+                    db_backlog = self._flush(conn, csv_files, bin_files, batch, db_backlog)
+                except Exception as e:
+                    # Keep the writer alive: a dead writer would leave the queue to fill up
+                    print(f"ERROR: Flush failed, {len(batch)} rows not written: {e}")
+                batch = []
+                next_flush = time.monotonic() + self.flush_interval_s
+
+            if time.monotonic() >= next_stats:
+                print(f"STATS: {self.stats.summary()}")
+                next_stats = time.monotonic() + STATS_INTERVAL_S
+
+        if db_backlog:
+            print(f"ERROR: {len(db_backlog)} rows could not be written to the database")
+        for csv_file in csv_files.values():
+            csv_file.close()
+        for bin_file in bin_files.values():
+            bin_file.close()
+        self._save_index(force=True)
+        conn.close()
+
+    def _run_control(self, conn):
+        """Carries out queued session set-ups. Returns True once close() has been called."""
+        stopping = False
+        while True:
+            try:
+                item = self.control.get_nowait()
+            except queue.Empty:
+                return stopping
+            if item is self._STOP:
+                stopping = True
+            else:
+                self._open_session(conn, item[1])
+
+    def _open_session(self, conn, session):
+        previous = self.current.get(session.device_id)
+        if previous is not None:
+            self.ended.append(previous)
+        self.current[session.device_id] = session
+        self._setup_session(conn, session)
+
+    def _setup_session(self, conn, session):
+        try:
+            self.on_session_open(conn, session)
+        except (OSError, sqlite3.Error) as e:
+            print(f"ERROR: Session set-up failed for {session.device_id}: {e}")
+
+    def _close_session_files(self, session, csv_files, bin_files):
+        for files, filename in ((csv_files, session.csv_filename), (bin_files, session.bin_filename)):
+            handle = files.pop(filename, None)
+            if handle is not None:
+                try:
+                    handle.close()
+                except OSError as e:
+                    print(f"ERROR: Could not close {filename}: {e}")
+
+    def _flush(self, conn, csv_files, bin_files, batch, db_backlog):
+        """
+        Writes one batch to CSV, the binary record files and SQL. Returns the entries that could not be
+        committed (e.g. database locked) so they are retried on the next flush.
+        """
+        rows_by_session = {}
+        for session, row, _, _ in batch:
+            rows_by_session.setdefault(session, []).append(row)
+
+        for session, rows in rows_by_session.items():
+            # Formatted once: the same text is written to the CSV and added to its content hash
+            text = io.StringIO()
+            csv.writer(text).writerows(rows)
+            data = text.getvalue()
+
+            if session.csv_filename not in self.index:
+                try:
+                    # Picks up the header (or rows from before a restart) already in the file
+                    self.index.open_session(session.csv_filename)
+                except OSError as e:
+                    print(f"ERROR: Session index update failed for {session.csv_filename}: {e}")
+
+            try:
+                if session.csv_filename not in csv_files:
+                    csv_files[session.csv_filename] = open(session.csv_filename, mode='a', newline='')
+                csv_files[session.csv_filename].write(data)
+                csv_files[session.csv_filename].flush()
+                if session.csv_filename in self.index:
+                    self.index.update(session.csv_filename, rows, data.encode('utf-8'))
+            except OSError as e:
+                # The database remains the record of the session; the file is reopened next flush
+                print(f"ERROR: CSV write failed for {session.csv_filename}, {len(rows)} rows not in the CSV: {e}")
+                csv_file = csv_files.pop(session.csv_filename, None)
+                if csv_file is not None:
+                    try:
+                        csv_file.close()
+                    except OSError:
+                        pass
+
+            try:
+                if session.bin_filename not in bin_files:
+                    bin_files[session.bin_filename] = binary_log.BinaryRecordWriter(
+                        session.bin_filename, session.start_dt.timestamp(),
+                        session.location_label, self.ring_rows
+                    )
+                bin_files[session.bin_filename].append(rows)
+            except (OSError, ValueError) as e:
+                # The CSV and database remain the record of the session
+                print(f"ERROR: Binary log write failed for {session.bin_filename}: {e}")
+
+        # Replaced sessions (and any late rows of theirs) keep no files open
+        ended, self.ended = self.ended, []
+        ended += [s for s in rows_by_session if self.current.get(s.device_id) is not s]
+        for session in ended:
+            self._close_session_files(session, csv_files, bin_files)
+            self.index.close_session(session.csv_filename)
+
+        self._save_index()
+
+        entries = db_backlog + batch
+        # A session whose set-up failed has no session_id yet: retry it, and keep
+        # its rows back until it is registered rather than insert them unkeyed
+        for session in {s for s, _, _, _ in entries if s.session_id is None}:
+            self._setup_session(conn, session)
+        pending = [e for e in entries if e[0].session_id is not None]
+        waiting = [e for e in entries if e[0].session_id is None]
+        if not pending:
+            return waiting
+
+        try:
+            with conn:
+                # Rows and their rollup buckets are committed together
+                after_id = db_schema.last_row_id(conn)
+                conn.executemany(SENSOR_DATA_INSERT, [
+                    (session.session_id, timestamp) + row
+                    for session, row, _, timestamp in pending
+                ])
+                db_schema.update_rollups(conn, after_id)
+        except sqlite3.Error as e:
+            print(f"ERROR: Database flush failed, retrying {len(entries)} rows later: {e}")
+            return entries
+
+        self.stats.record_committed([received_at for _, _, received_at, _ in pending])
+
+        # Console Output (row layout: elapsed, location, co2, voc, iaq, ..., accuracy)
+        for session, row, _, _ in pending:
+            print(f"[{session.device_id}] T={row[0]}s | CO2: {row[2]} ppm | IAQ: {row[4]} | Acc: {row[10]} | SQL: Saved")
+        return waiting
+
+    def _save_index(self, force=False):
+        try:
+            self.index.save(force)
+        except OSError as e:
+            print(f"ERROR: Could not save {self.index.index_path}: {e}")
 
 class StudySpaceLogger:
     """
     Manages the network interface, data aggregation, and structured logging.
-    Ensures asynchronous MQTT payloads are synchronised into coherent 
-    time-series data points using a sequential counter before display and storage.
+    Ensures asynchronous MQTT payloads are synchronised into coherent
+    time-series data points using a sequential counter per device before
+    display and storage.
     """
-    
-    def __init__(self):
-        # Client initialised with CallbackAPIVersion.VERSION2 to ensure 
+
+    def __init__(self, config_path=DEVICE_CONFIG_FILENAME, ring_hours=BINARY_RING_HOURS):
+        # Client initialised with CallbackAPIVersion.VERSION2 to ensure
         # compatibility with modern paho-mqtt library standards.
         self.client = mqtt.Client(mqtt.CallbackAPIVersion.VERSION2)
-        
+
         # Bind event handlers
         self.client.on_connect = self.on_connect
         self.client.on_message = self.on_message
-        
-        # Temporary buffer for assembling fragmented sensor packets
-        self.current_reading = {}
-        # Internal sequential counter for elapsed session seconds
-        self.elapsed_seconds = 0
-        
-        # SESSION SETUP (Blocking Input)
+
+        # Device configuration (topics + location labels), re-read for unknown pods
+        self.config_path = config_path
+        self.config = load_device_config(config_path)
+        # Active acquisition state, keyed by device id
+        self.sessions = {}
+
         print("\n========================================")
         print("      THE STUFFY STUDY: DATA LOGGER      ")
-        print(f"   Session Start: {SESSION_START_STR}")
+        print(f"   Logger Start: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
         print("========================================")
-        user_input = input("ENTER LOCATION NAME (e.g. 'POD_1'): ")
-        
-        if user_input.strip() == "":
-            self.location_label = "Unspecified"
-        else:
-            self.location_label = user_input.strip()
-            
-        print("----------------------------------------")
-        print(f"LOCATION SET: {self.location_label}")
-        print(f"LOGGING CSV: {CSV_FILENAME}")
+        print(f"DEVICE CONFIG: {config_path}")
+        for device_id, location in self.config["locations"].items():
+            print(f"  {device_id} -> {location}")
         print(f"MASTER DB:   {DB_FILENAME}")
+        print(f"INDEX:       {session_index.INDEX_FILENAME}")
         print("----------------------------------------\n")
-        
+
         # Initialise Storage Systems
-        self.init_csv()
         self.init_db()
-        self.update_catalog()
 
-    def init_csv(self):
+        # The writer thread owns the CSV handles and database connection from here on
+        self.writer = BufferedSessionWriter(DB_FILENAME, on_session_open=self.open_session_storage,
+                                            ring_hours=ring_hours)
+
+    def init_csv(self, session):
         """Creates the new CSV log file and writes session metadata headers."""
-        if not os.path.exists(CSV_FILENAME):
-            with open(CSV_FILENAME, mode='w', newline='') as f:
+        if not os.path.exists(session.csv_filename):
+            with open(session.csv_filename, mode='w', newline='') as f:
                 writer = csv.writer(f)
                 # Write metadata header
                 writer.writerow(["# SESSION METADATA"])
-                writer.writerow(["# Start Time", SESSION_START_STR])
-                writer.writerow(["# Location", self.location_label])
+                writer.writerow(["# Start Time", session.start_str])
+                writer.writerow(["# Location", session.location_label])
                 writer.writerow([]) # Blank line for readability before data table
-                
+
                 # Write data table header
-                writer.writerow([
-                    "Elapsed_Seconds", "Location_Note",
-                    "CO2_ppm", "VOC_ppm", "IAQ", "Gas_Res_Ohms", 
-                    "Temp_Raw_C", "Temp_Comp_C", "Hum_Raw_pct", "Hum_Comp_pct", "Accuracy"
-                ])
+                writer.writerow(CSV_HEADER)
 
     def init_db(self):
         """Connects to the master SQLite database and ensures tables exist."""
         # Connects to existing file or creates it if it's the first run ever.
-        self.conn = sqlite3.connect(DB_FILENAME)
-        self.cursor = self.conn.cursor()
-        
-        # 1. Metadata Table: Stores single-entry session details
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS session_metadata (
-                start_time TEXT,
-                location TEXT
-            )
-        ''')
-        # Append this new session's details to the metadata table
-        self.cursor.execute('INSERT INTO session_metadata VALUES (?, ?)', 
-                            (SESSION_START_STR, self.location_label))
-        
-        # 2. Sensor Data Table: Optimised schema for time-series data
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS sensor_data (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                elapsed_seconds INTEGER,
-                location_note TEXT,
-                co2_ppm INTEGER,
-                voc_ppm REAL,
-                iaq INTEGER,
-                gas_res_ohms INTEGER,
-                temp_raw_c REAL,
-                temp_comp_c REAL,
-                hum_raw_pct REAL,
-                hum_comp_pct REAL,
-                accuracy INTEGER
-            )
-        ''')
-        self.conn.commit()
-
-    def update_catalog(self):
+        # Databases from earlier logger versions are upgraded in place (see db_schema.py).
+        # This connection is only used for setup; rows are written by BufferedSessionWriter.
+        conn = sqlite3.connect(DB_FILENAME)
+        found_version = db_schema.ensure_schema(conn)
+        conn.close()
+
+        if found_version != db_schema.SCHEMA_VERSION:
+            print(f"STATUS: Upgraded {DB_FILENAME} to schema version {db_schema.SCHEMA_VERSION}")
+
+    def register_session_db(self, conn, session):
+        """Appends a new device session's details to the metadata table and records its key."""
+        with conn:
+            cur = conn.execute('''
+                INSERT INTO session_metadata (start_time, location, device_id, csv_filename)
+                VALUES (?, ?, ?, ?)
+            ''', (session.start_str, session.location_label, session.device_id, session.csv_filename))
+        session.session_id = cur.lastrowid
+
+    def update_catalog(self, session):
         """Appends this session's metadata to the Master Data Catalog file."""
         file_exists = os.path.exists(CATALOG_FILENAME)
-        
+
         with open(CATALOG_FILENAME, mode='a', newline='') as f:
             writer = csv.writer(f)
             # Write header only if file is new
             if not file_exists:
                 writer.writerow(["Session_Start_Time", "Location", "CSV_Filename", "Master_Database"])
-            
+
             # Write the session log entry
             writer.writerow([
-                SESSION_START_STR,
-                self.location_label,
-                CSV_FILENAME,
+                session.start_str,
+                session.location_label,
+                session.csv_filename,
                 DB_FILENAME
             ])
 
+    def get_session(self, device_id):
+        """
+        Returns the active session for a device, starting a new one the first
+        time a pod reports or when it comes back after a long silence.
+        """
+        session = self.sessions.get(device_id)
+        now = time.monotonic()
+
+        if session is not None and now - session.last_seen <= SESSION_GAP_SECONDS:
+            session.last_seen = now
+            return session
+
+        # Pick up pods added to the config file without restarting the logger
+        if device_id not in self.config["locations"]:
+            self.config = load_device_config(self.config_path)
+        location_label = self.config["locations"].get(device_id, "Unspecified")
+
+        session = DeviceSession(device_id, location_label)
+        self.writer.open_session(session)
+        self.sessions[device_id] = session
+        return session
+
+    def open_session_storage(self, conn, session):
+        """Runs on the writer thread: creates the metadata row, session CSV and catalog entry."""
+        # Registered first: the session_id keys its rows even if the CSV cannot be created
+        self.register_session_db(conn, session)
+        self.init_csv(session)
+        self.update_catalog(session)
+
+        print("----------------------------------------")
+        print(f"NEW SESSION: {session.device_id} @ {session.start_str}")
+        print(f"LOCATION:    {session.location_label}")
+        print(f"LOGGING CSV: {session.csv_filename}")
+        print(f"LOGGING BIN: {session.bin_filename}")
+        print("----------------------------------------")
+
     def on_connect(self, client, userdata, flags, rc, properties=None):
         """Event handler for connection acknowledgement from the server."""
         if rc == 0:
             print(f"STATUS: Connected to Server: {MQTT_SERVER}")
-            
-            # Subscribe to the project wildcard topic to capture all sensor streams
-            full_topic = f"{TOPIC_BASE}/#"
-            client.subscribe(full_topic)
-            print(f"STATUS: Listening on topic tree: {full_topic}")
+
+            # Subscribe to every configured topic tree to capture all sensor streams
+            for topic in self.config["topics"]:
+                client.subscribe(topic)
+                print(f"STATUS: Listening on topic tree: {topic}")
         else:
             print(f"ERROR: Connection failed. Return Code: {rc}")
 
     def on_message(self, client, userdata, msg):
         """
-        Event handler for incoming telemetry.
-        Buffers data until the 'accuracy' metric is received, which serves as the 
-        synchronisation trigger for the current second's data point.
+        Event handler for incoming telemetry (runs on the MQTT network thread).
+        Buffers data per device until the 'accuracy' metric is received, which
+        serves as the synchronisation trigger for that pod's current data point.
+        Only parses and enqueues: all disk I/O happens on the writer thread.
         """
         try:
             # 1. Extract metric type from the topic suffix (e.g., .../co2)
+            received_at = time.monotonic()
+            received_ts = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
             metric = msg.topic.split("/")[-1]
             value = float(msg.payload.decode('utf-8'))
-            
-            # 2. Update buffer with the received value
-            self.current_reading[metric] = value
-            
+            session = self.get_session(device_id_from_topic(msg.topic, self.config["topics"]))
+
+            # 2. Update the device's buffer with the received value
+            session.current_reading[metric] = value
+
             # 3. Synchronisation Trigger (Resilient Logic)
             # The Arduino sends 'accuracy' last in its cycle. Use receipt of this
             # metric to trigger the save operation for the current second.
             if metric == 'accuracy':
-                self.save_and_display()
+                self.enqueue_reading(session, received_at, received_ts)
 
         except Exception as e:
             print(f"ERROR: Parsing payload failed: {e}")
 
-    def save_and_display(self):
-        """Writes the buffered dataset to CSV, SQL, and renders to console."""
-        
-        # 1. Define timebase for this row using internal sequential counter
-        current_time_seq = self.elapsed_seconds
-        
+    def enqueue_reading(self, session, received_at, received_ts):
+        """Assembles the buffered dataset into a row and hands it to the writer thread."""
+
+        # 1. Define timebase for this row using the device's sequential counter
+        current_time_seq = session.elapsed_seconds
+        reading = session.current_reading
+
         # 2. Data Extraction from Buffer
         # Defaulting to 0 ensures log integrity if specific packets are lost in transit
-        co2 = int(self.current_reading.get('co2', 0))
-        voc = self.current_reading.get('voc', 0)
-        iaq = int(self.current_reading.get('iaq', 0))
-        gas = int(self.current_reading.get('gas_raw', 0))
-        
+        co2 = int(reading.get('co2', 0))
+        voc = reading.get('voc', 0)
+        iaq = int(reading.get('iaq', 0))
+        gas = int(reading.get('gas_raw', 0))
+
         # Physical Sensors
-        t_raw = self.current_reading.get('temp_raw', 0)
-        t_comp = self.current_reading.get('comp_t', 0)
-        h_raw = self.current_reading.get('hum_raw', 0)
-        h_comp = self.current_reading.get('hum_comp', 0)
-        
-        acc = int(self.current_reading.get('accuracy', 0))
-        
-        # Use the fixed location label set at startup
-        location_note = self.location_label
-
-        # 3. Save to CSV Row (Unique file per session)
-        with open(CSV_FILENAME, mode='a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                current_time_seq, location_note, 
-                co2, voc, iaq, gas, 
-                t_raw, t_comp, h_raw, h_comp, acc
-            ])
+        t_raw = reading.get('temp_raw', 0)
+        t_comp = reading.get('comp_t', 0)
+        h_raw = reading.get('hum_raw', 0)
+        h_comp = reading.get('hum_comp', 0)
 
-        # 4. Save to SQL DB Row (Appends to the master database)
-        self.cursor.execute('''
-            INSERT INTO sensor_data (
-                elapsed_seconds, location_note,
-                co2_ppm, voc_ppm, iaq, gas_res_ohms,
-                temp_raw_c, temp_comp_c, hum_raw_pct, hum_comp_pct, accuracy
-            ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (current_time_seq, location_note, co2, voc, iaq, gas, t_raw, t_comp, h_raw, h_comp, acc))
-        self.conn.commit()
-
-        # 5. Console Output & Counter Increment
-        print(f"T={current_time_seq}s | CO2: {co2} ppm | IAQ: {iaq} | Acc: {acc} | SQL: Saved")
-        
-        # Reset buffer and advance time counter for the next sampling interval
-        self.current_reading = {}
-        self.elapsed_seconds += 1
+        acc = int(reading.get('accuracy', 0))
+
+        # Use the location label configured for this device
+        location_note = session.location_label
+
+        # 3. Queue the row for the writer thread (CSV + SQL + console output)
+        self.writer.submit(session, (
+            current_time_seq, location_note,
+            co2, voc, iaq, gas,
+            t_raw, t_comp, h_raw, h_comp, acc
+        ), received_at, received_ts)
+
+        # 4. Reset buffer and advance time counter for the next sampling interval
+        session.current_reading = {}
+        session.elapsed_seconds += 1
 
     def start(self):
         """Establishes the connection and begins the blocking listening loop."""
         print(f"STATUS: Connecting to {MQTT_SERVER}...")
-        
+
         try:
             self.client.connect(MQTT_SERVER, MQTT_PORT, 60)
             self.client.loop_forever()
@@ -254,13 +690,24 @@ class StudySpaceLogger:
             print(f"CRITICAL ERROR: {e}")
         except KeyboardInterrupt:
             print("\nSTATUS: Monitor Stopped by User.")
-            self.conn.close() # Ensure clean database closure
+        finally:
+            # Flush any readings still buffered and close the CSV/database cleanly
+            self.writer.close()
+            print(f"STATUS: {self.writer.rows_written} rows saved to {DB_FILENAME}")
+            print(f"STATS: {self.writer.stats.summary()}")
 
 # MAIN EXECUTION BLOCK
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="The Stuffy Study multi-device data logger")
+    parser.add_argument("--config", default=DEVICE_CONFIG_FILENAME,
+                        help="JSON file with the topics to subscribe to and each device's location label")
+    parser.add_argument("--ring-hours", type=float, default=BINARY_RING_HOURS,
+                        help="Keep only the last N hours in each binary record file (0 keeps every row)")
+    args = parser.parse_args()
+
     # Initialise acquisition engine
-    logger = StudySpaceLogger()
-    
+    logger = StudySpaceLogger(args.config, args.ring_hours)
+
     # Begin monitoring
-    logger.start()
\ No newline at end of file
+    logger.start()
@@ -0,0 +1,213 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: Columnar Archive Export | Role: Compaction of Finished Sessions into Parquet
+Description:
+    Converts finished sessions - either the per-session Stuffy_Study_*.csv files
+    or the sensor_data table of the master database - into compressed Parquet
+    files, partitioned by location and date:
+        Stuffy_Study_Archive/location=<location>/date=<YYYY-MM-DD>/<session>.parquet
+    Columns are stored typed and zstd-compressed, with one row group per hour
+    of data, so readers (see the dashboard's archive source) only touch the
+    columns, partitions and row groups they need.
+    Usage:
+        python archive_export.py csv [files...]     (default: all session CSVs here)
+        python archive_export.py db [Stuffy_Study_Master.db]
+System Requirements:
+    pip install pandas pyarrow
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import argparse
+import glob
+import os
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime
+from urllib.parse import quote
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+ARCHIVE_DIR = "Stuffy_Study_Archive"
+DB_FILENAME = "Stuffy_Study_Master.db"
+
+# Sessions touched more recently than this are assumed to still be recording
+# (matches SESSION_GAP_SECONDS in Stuffy_Study_Data_Logger.py).
+FINISHED_AFTER_SECONDS = 300
+
+# One row group per hour of 1 Hz data: time-window reads skip whole row groups.
+ROW_GROUP_SIZE = 3600
+COMPRESSION = "zstd"
+
+ARCHIVE_SCHEMA = pa.schema([
+    ("Elapsed_Seconds", pa.int32()),
+    ("Timestamp", pa.timestamp("s")),
+    ("CO2_ppm", pa.int32()),
+    ("VOC_ppm", pa.float32()),
+    ("IAQ", pa.int32()),
+    ("Gas_Res_Ohms", pa.int32()),
+    ("Temp_Raw_C", pa.float32()),
+    ("Temp_Comp_C", pa.float32()),
+    ("Hum_Raw_pct", pa.float32()),
+    ("Hum_Comp_pct", pa.float32()),
+    ("Accuracy", pa.int32()),
+])
+
+# Data table columns of a session CSV (CSV_HEADER in Stuffy_Study_Data_Logger.py)
+CSV_COLUMNS = [
+    "Elapsed_Seconds", "Location_Note",
+    "CO2_ppm", "VOC_ppm", "IAQ", "Gas_Res_Ohms",
+    "Temp_Raw_C", "Temp_Comp_C", "Hum_Raw_pct", "Hum_Comp_pct", "Accuracy"
+]
+
+# sensor_data column -> archive column
+DB_COLUMNS = {
+    "elapsed_seconds": "Elapsed_Seconds",
+    "timestamp": "Timestamp",
+    "co2_ppm": "CO2_ppm",
+    "voc_ppm": "VOC_ppm",
+    "iaq": "IAQ",
+    "gas_res_ohms": "Gas_Res_Ohms",
+    "temp_raw_c": "Temp_Raw_C",
+    "temp_comp_c": "Temp_Comp_C",
+    "hum_raw_pct": "Hum_Raw_pct",
+    "hum_comp_pct": "Hum_Comp_pct",
+    "accuracy": "Accuracy",
+}
+
+
+def archive_path(archive_dir, location, start_dt, session_name):
+    """Hive-style partition path; partition values are URI-encoded."""
+    return os.path.join(
+        archive_dir,
+        f"location={quote(location or 'Unspecified', safe='')}",
+        f"date={start_dt:%Y-%m-%d}",
+        f"{session_name}.parquet",
+    )
+
+
+def write_session(df, path):
+    """Writes one session's rows (archive column names) as a compressed Parquet file."""
+    table = pa.Table.from_pandas(df[ARCHIVE_SCHEMA.names], schema=ARCHIVE_SCHEMA, preserve_index=False)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    # Write to a temporary name first so readers never see a half-written file
+    tmp_path = path + ".tmp"
+    pq.write_table(table, tmp_path, compression=COMPRESSION, row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp_path, path)
+
+
+def read_session_csv(csv_path):
+    """Reads a session CSV and its metadata block (Start Time, Location)."""
+    metadata = {}
+    # Line of the data table header; None if the file has none
+    header_line = None
+    with open(csv_path, newline='') as f:
+        for i, line in enumerate(f):
+            if line.startswith("Elapsed_Seconds"):
+                header_line = i
+                break
+            if line.startswith("#"):
+                key, _, value = line.strip().lstrip("# ").partition(",")
+                if value:
+                    metadata[key.strip()] = value.strip()
+
+    if header_line is None:
+        # No header row: the data lines are in CSV_COLUMNS order, after any metadata
+        df = pd.read_csv(csv_path, header=None, names=CSV_COLUMNS, comment="#")
+    else:
+        df = pd.read_csv(csv_path, skiprows=header_line)
+    return df, metadata
+
+
+def export_csv_sessions(csv_paths, archive_dir=ARCHIVE_DIR):
+    """Compacts finished session CSVs. Sessions already archived and unchanged are skipped."""
+    written = 0
+    for csv_path in csv_paths:
+        mtime = os.path.getmtime(csv_path)
+        if time.time() - mtime < FINISHED_AFTER_SECONDS:
+            print(f"SKIP: {csv_path} is still being written")
+            continue
+
+        df, metadata = read_session_csv(csv_path)
+        if "Start Time" not in metadata:
+            print(f"SKIP: {csv_path} has no session start time")
+            continue
+        start_dt = datetime.strptime(metadata["Start Time"], '%Y-%m-%d %H:%M:%S')
+        location = metadata.get("Location")
+        session_name = os.path.splitext(os.path.basename(csv_path))[0]
+
+        path = archive_path(archive_dir, location, start_dt, session_name)
+        if os.path.exists(path) and os.path.getmtime(path) >= mtime:
+            continue
+
+        df["Timestamp"] = start_dt + pd.to_timedelta(df["Elapsed_Seconds"], unit="s")
+        write_session(df, path)
+        written += 1
+        print(f"ARCHIVED: {csv_path} -> {path} ({len(df)} rows)")
+
+    return written
+
+
+def export_db_sessions(db_filename=DB_FILENAME, archive_dir=ARCHIVE_DIR):
+    """
+    Compacts finished sessions from the master database (schema version 1,
+    see db_schema.py), one Parquet file per session_id. Sessions already
+    archived with the same number of rows are skipped.
+    """
+    select_cols = ", ".join(DB_COLUMNS)
+    cutoff = datetime.fromtimestamp(time.time() - FINISHED_AFTER_SECONDS).strftime('%Y-%m-%d %H:%M:%S')
+    written = 0
+
+    with closing(sqlite3.connect(f"file:{db_filename}?mode=ro", uri=True)) as conn:
+        sessions = conn.execute('''
+            SELECT m.session_id, m.start_time, m.location, m.csv_filename, MAX(d.timestamp), COUNT(*)
+            FROM session_metadata AS m
+            JOIN sensor_data AS d ON d.session_id = m.session_id
+            GROUP BY m.session_id
+        ''').fetchall()
+
+        for session_id, start_time, location, csv_filename, last_ts, n_rows in sessions:
+            if last_ts is None or start_time is None or last_ts >= cutoff:
+                print(f"SKIP: session {session_id} is still recording or has no timestamps")
+                continue
+
+            start_dt = datetime.strptime(start_time, '%Y-%m-%d %H:%M:%S')
+            # Same file name as a CSV export of this session, so the two never duplicate
+            session_name = (os.path.splitext(csv_filename)[0] if csv_filename
+                            else f"Stuffy_Study_{start_dt:%Y-%m-%d_%H-%M-%S}")
+
+            path = archive_path(archive_dir, location, start_dt, session_name)
+            if os.path.exists(path) and pq.read_metadata(path).num_rows == n_rows:
+                continue
+
+            df = pd.read_sql_query(
+                f"SELECT {select_cols} FROM sensor_data WHERE session_id = ? ORDER BY elapsed_seconds",
+                conn, params=(session_id,)
+            ).rename(columns=DB_COLUMNS)
+            df["Timestamp"] = pd.to_datetime(df["Timestamp"])
+
+            write_session(df, path)
+            written += 1
+            print(f"ARCHIVED: session {session_id} -> {path} ({len(df)} rows)")
+
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compact finished Stuffy Study sessions into Parquet")
+    parser.add_argument("source", choices=["csv", "db"], help="Convert session CSV files or the master database")
+    parser.add_argument("paths", nargs="*", help="CSV files (csv) or database file (db)")
+    parser.add_argument("--archive", default=ARCHIVE_DIR, help="Output directory for the Parquet archive")
+    args = parser.parse_args()
+
+    if args.source == "csv":
+        csv_paths = args.paths or sorted(glob.glob("Stuffy_Study_*.csv"))
+        count = export_csv_sessions(csv_paths, args.archive)
+    else:
+        count = export_db_sessions(args.paths[0] if args.paths else DB_FILENAME, args.archive)
+
+    print(f"STATUS: {count} sessions written to {args.archive}")
@@ -0,0 +1,111 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: Binary Session Log | Role: Fixed-Width Record File for the Live Dashboard
+Description:
+    Alongside each session CSV the logger writes a .bin file of fixed-width
+    little-endian records, so the dashboard can map it with numpy.memmap and
+    read the newest rows without parsing any text.
+    Layout:
+        Header (128 bytes): magic, format version, record size, ring capacity
+            (0 = keep every row), rows written, session start (Unix time),
+            location label (UTF-8, zero padded).
+        Records (60 bytes each): elapsed seconds, CO2, VOC, IAQ, gas resistance,
+            raw/compensated temperature, raw/compensated humidity, accuracy.
+            Fractional readings are float64, so they read back exactly as the
+            CSV writes them (float32 turned a humidity of 40.1 into 40.099998).
+    Records are written before the rows-written counter is updated, and the
+    counter is a single aligned 8-byte write, so a reader never sees a row
+    that is counted but not yet written. In ring-buffer mode record i is stored
+    in slot i % capacity and only the newest `capacity` rows are kept.
+    Keep in step with BIN_HEADER_DTYPE / BIN_RECORD_DTYPE in Dashboard_App/live_feed.py.
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import os
+import struct
+
+MAGIC = b"STUFFYB1"
+FORMAT_VERSION = 2
+
+# magic, version, record_size, capacity, rows_written, start_time, location
+LOCATION_BYTES = 96
+HEADER = struct.Struct(f"<8sHHIQd{LOCATION_BYTES}s")
+ROWS_WRITTEN_OFFSET = 16
+
+# elapsed, co2, voc, iaq, gas, temp_raw, temp_comp, hum_raw, hum_comp, accuracy
+RECORD = struct.Struct("<iidiiddddi")
+COUNTER = struct.Struct("<Q")
+
+
+class BinaryRecordWriter:
+    """
+    Appends logger rows to a session's binary record file. Only used from the
+    writer thread. Re-opening an existing file resumes from its rows-written
+    counter, so a restarted logger keeps adding to the same session file.
+    """
+
+    def __init__(self, path, start_time, location, ring_rows=0):
+        self.path = path
+        self.capacity = ring_rows
+
+        if os.path.exists(path) and os.path.getsize(path) >= HEADER.size:
+            self.file = open(path, "r+b")
+            magic, version, record_size, capacity, rows_written, _, _ = HEADER.unpack(
+                self.file.read(HEADER.size))
+            if (magic, version, record_size) != (MAGIC, FORMAT_VERSION, RECORD.size):
+                self.file.close()
+                raise ValueError(f"{path} is not a version {FORMAT_VERSION} Stuffy Study record file")
+            self.capacity = capacity
+            self.rows_written = rows_written
+        else:
+            self.file = open(path, "w+b")
+            self.rows_written = 0
+            self.file.write(HEADER.pack(
+                MAGIC, FORMAT_VERSION, RECORD.size, self.capacity, 0,
+                start_time, location.encode("utf-8")[:LOCATION_BYTES]
+            ))
+            if self.capacity:
+                # Ring files have a fixed size from the start
+                self.file.truncate(HEADER.size + self.capacity * RECORD.size)
+            self.file.flush()
+
+    def append(self, rows):
+        """
+        Writes logger rows (elapsed, location, co2, voc, iaq, gas, t_raw,
+        t_comp, h_raw, h_comp, acc), then publishes the new row count.
+        """
+        if not rows:
+            return
+
+        if self.capacity and len(rows) > self.capacity:
+            # Older rows in this batch would be overwritten straight away
+            self.rows_written += len(rows) - self.capacity
+            rows = rows[-self.capacity:]
+
+        # One record per row; the location lives in the header, not in every record
+        records = [RECORD.pack(row[0], *row[2:]) for row in rows]
+
+        start = self.rows_written
+        if self.capacity:
+            slot = start % self.capacity
+            # A batch that reaches the end of the ring wraps round to slot 0
+            split = min(len(records), self.capacity - slot)
+            self._write_at(slot, b"".join(records[:split]))
+            if split < len(records):
+                self._write_at(0, b"".join(records[split:]))
+        else:
+            self._write_at(start, b"".join(records))
+        self.file.flush()
+
+        self.rows_written = start + len(records)
+        self.file.seek(ROWS_WRITTEN_OFFSET)
+        self.file.write(COUNTER.pack(self.rows_written))
+        self.file.flush()
+
+    def _write_at(self, slot, data):
+        self.file.seek(HEADER.size + slot * RECORD.size)
+        self.file.write(data)
+
+    def close(self):
+        self.file.close()
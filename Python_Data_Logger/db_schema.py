@@ -0,0 +1,326 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: Master Database Schema | Role: Table Definitions, Indexes & In-Place Migration
+Description:
+    Defines the session-keyed schema of Stuffy_Study_Master.db and upgrades
+    databases written by earlier versions of the logger in place.
+    Every sensor row carries the session_id of its session_metadata entry and a
+    wall-clock timestamp, and composite indexes on (session_id, elapsed_seconds)
+    and (location_note, timestamp) turn session and time-range queries into
+    index seeks rather than full table scans.
+    Rollup tables (sensor_rollup_60s / _900s / _3600s) hold the row count and
+    min/max/sum of every metric per session and wall-clock bucket of 1 min,
+    15 min and 1 h. The logger updates them in the same transaction as each
+    batch of inserts, so long and multi-pod views read a few thousand
+    pre-aggregated rows instead of millions of 1 Hz readings.
+    Run directly to migrate an existing database (or to rebuild the rollups):
+        python db_schema.py [path/to/Stuffy_Study_Master.db] [--rebuild-rollups]
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import argparse
+import csv
+import os
+import sqlite3
+
+# Bumped whenever the schema changes; stored in the database's PRAGMA user_version.
+# Version 0 is the original layout (no session_id, no timestamps, no indexes).
+# Version 2 adds the rollup tables.
+SCHEMA_VERSION = 2
+
+# The Data Catalog the logger appends each session to, kept next to the database.
+# Sessions recorded before session_metadata had a csv_filename column take it from here.
+CATALOG_FILENAME = "_Experiment_Data_Catalog.csv"
+
+SESSION_METADATA_TABLE = '''
+    CREATE TABLE IF NOT EXISTS session_metadata (
+        session_id INTEGER PRIMARY KEY AUTOINCREMENT,
+        start_time TEXT,
+        location TEXT,
+        device_id TEXT,
+        csv_filename TEXT
+    )
+'''
+
+SENSOR_DATA_TABLE = '''
+    CREATE TABLE IF NOT EXISTS sensor_data (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        session_id INTEGER REFERENCES session_metadata(session_id),
+        timestamp TEXT,
+        elapsed_seconds INTEGER,
+        location_note TEXT,
+        co2_ppm INTEGER,
+        voc_ppm REAL,
+        iaq INTEGER,
+        gas_res_ohms INTEGER,
+        temp_raw_c REAL,
+        temp_comp_c REAL,
+        hum_raw_pct REAL,
+        hum_comp_pct REAL,
+        accuracy INTEGER
+    )
+'''
+
+INDEXES = [
+    'CREATE INDEX IF NOT EXISTS idx_sensor_data_session_elapsed '
+    'ON sensor_data (session_id, elapsed_seconds)',
+    'CREATE INDEX IF NOT EXISTS idx_sensor_data_location_timestamp '
+    'ON sensor_data (location_note, timestamp)',
+]
+
+
+# Rollup bucket sizes in seconds (1 min, 15 min, 1 h)
+ROLLUP_RESOLUTIONS = (60, 900, 3600)
+ROLLUP_METRICS = [
+    "co2_ppm", "voc_ppm", "iaq", "gas_res_ohms",
+    "temp_raw_c", "temp_comp_c", "hum_raw_pct", "hum_comp_pct", "accuracy",
+]
+
+
+def rollup_table(resolution):
+    return f"sensor_rollup_{resolution}s"
+
+
+def _rollup_table_sql(resolution):
+    metric_columns = "".join(
+        f"        {m}_min REAL,\n        {m}_max REAL,\n        {m}_sum REAL,\n" for m in ROLLUP_METRICS
+    )
+    # bucket_start: wall-clock start of the bucket, same text format as sensor_data.timestamp
+    return f'''
+    CREATE TABLE IF NOT EXISTS {rollup_table(resolution)} (
+        session_id INTEGER NOT NULL,
+        bucket_start TEXT NOT NULL,
+        location_note TEXT,
+        elapsed_min INTEGER,
+        elapsed_max INTEGER,
+        row_count INTEGER NOT NULL,
+{metric_columns}        PRIMARY KEY (session_id, bucket_start)
+    ) WITHOUT ROWID
+'''
+
+
+def _rollup_upsert_sql(resolution):
+    """
+    Aggregates the sensor_data rows with id > ? into the rollup table, adding
+    to buckets that already exist (counts and sums add, min/max combine).
+    """
+    bucket = f"datetime(CAST(strftime('%s', timestamp) AS INTEGER) / {resolution} * {resolution}, 'unixepoch')"
+    aggregates = ", ".join(f"MIN({m}), MAX({m}), SUM({m})" for m in ROLLUP_METRICS)
+    metric_names = ", ".join(f"{m}_min, {m}_max, {m}_sum" for m in ROLLUP_METRICS)
+    updates = ",\n            ".join(
+        f"{m}_min = MIN(COALESCE({m}_min, excluded.{m}_min), COALESCE(excluded.{m}_min, {m}_min)), "
+        f"{m}_max = MAX(COALESCE({m}_max, excluded.{m}_max), COALESCE(excluded.{m}_max, {m}_max)), "
+        f"{m}_sum = COALESCE({m}_sum, 0) + COALESCE(excluded.{m}_sum, 0)"
+        for m in ROLLUP_METRICS
+    )
+    return f'''
+        INSERT INTO {rollup_table(resolution)} (
+            session_id, bucket_start, location_note, elapsed_min, elapsed_max, row_count, {metric_names}
+        )
+        SELECT session_id, {bucket}, MAX(location_note), MIN(elapsed_seconds), MAX(elapsed_seconds),
+               COUNT(*), {aggregates}
+        FROM sensor_data NOT INDEXED  -- new rows are a rowid range; the session index would scan more
+        WHERE id > ? AND session_id IS NOT NULL AND timestamp IS NOT NULL
+        GROUP BY session_id, {bucket}
+        ON CONFLICT (session_id, bucket_start) DO UPDATE SET
+            elapsed_min = MIN(elapsed_min, excluded.elapsed_min),
+            elapsed_max = MAX(elapsed_max, excluded.elapsed_max),
+            row_count = row_count + excluded.row_count,
+            {updates}
+    '''
+
+
+ROLLUP_TABLES = [_rollup_table_sql(r) for r in ROLLUP_RESOLUTIONS]
+ROLLUP_UPSERTS = [_rollup_upsert_sql(r) for r in ROLLUP_RESOLUTIONS]
+# Multi-pod views select by location and time range
+ROLLUP_INDEXES = [
+    f'CREATE INDEX IF NOT EXISTS idx_{rollup_table(r)}_location_bucket '
+    f'ON {rollup_table(r)} (location_note, bucket_start)'
+    for r in ROLLUP_RESOLUTIONS
+]
+
+
+def last_row_id(conn):
+    """Highest sensor_data id (0 if empty): rows inserted after this are not yet rolled up."""
+    return conn.execute('SELECT COALESCE(MAX(id), 0) FROM sensor_data').fetchone()[0]
+
+
+def update_rollups(conn, after_id):
+    """
+    Folds the sensor_data rows with id > after_id into every rollup table.
+    Call inside the transaction that inserted them, so rows and rollups are
+    committed together. Only the new rows are read (a rowid range seek).
+    """
+    for statement in ROLLUP_UPSERTS:
+        conn.execute(statement, (after_id,))
+
+
+def rebuild_rollups(conn):
+    """Recomputes every rollup table from sensor_data, in one transaction."""
+    with conn:
+        for resolution in ROLLUP_RESOLUTIONS:
+            conn.execute(f'DELETE FROM {rollup_table(resolution)}')
+        update_rollups(conn, 0)
+
+
+def _columns(conn, table):
+    return [row[1] for row in conn.execute(f'PRAGMA table_info({table})')]
+
+
+def _catalog_path(conn):
+    """The Data Catalog next to the connection's database file (None for an in-memory database)."""
+    db_path = next(row[2] for row in conn.execute('PRAGMA database_list') if row[1] == 'main')
+    return os.path.join(os.path.dirname(db_path), CATALOG_FILENAME) if db_path else None
+
+
+def fill_csv_filenames(conn, catalog_path):
+    """
+    Sets the missing csv_filename of each session from the Data Catalog,
+    matching sessions by start time and location. Returns the number filled.
+    """
+    if not catalog_path or not os.path.exists(catalog_path):
+        return 0
+    with open(catalog_path, newline='') as f:
+        entries = [(row['CSV_Filename'], row['Session_Start_Time'], row['Location'])
+                   for row in csv.DictReader(f) if row.get('CSV_Filename')]
+    return sum(conn.execute('''
+        UPDATE session_metadata SET csv_filename = ?
+        WHERE csv_filename IS NULL AND start_time = ? AND location = ?
+    ''', entry).rowcount for entry in entries)
+
+
+def ensure_schema(conn, catalog_path=None):
+    """
+    Creates the tables and indexes if missing, migrating an older database
+    first. Safe to call on every start-up. Returns the schema version found
+    before any changes were made. catalog_path defaults to the Data Catalog
+    next to the database file.
+    """
+    found_version = conn.execute('PRAGMA user_version').fetchone()[0]
+    catalog_path = catalog_path or _catalog_path(conn)
+
+    if 'session_id' not in _columns(conn, 'session_metadata') and _columns(conn, 'session_metadata'):
+        migrate_v0_to_v1(conn, catalog_path)
+    elif found_version == 1:
+        # Databases migrated before session file names were taken from the catalog
+        with conn:
+            fill_csv_filenames(conn, catalog_path)
+
+    with conn:
+        conn.execute(SESSION_METADATA_TABLE)
+        conn.execute(SENSOR_DATA_TABLE)
+        for statement in INDEXES + ROLLUP_TABLES + ROLLUP_INDEXES:
+            conn.execute(statement)
+        conn.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+
+    if found_version < 2:
+        # Back-fill the rollups for rows written before they existed
+        rebuild_rollups(conn)
+
+    return found_version
+
+
+def migrate_v0_to_v1(conn, catalog_path=None):
+    """
+    Upgrades the original schema in place, in a single transaction.
+    session_metadata is rebuilt with a session_id primary key (ids follow the
+    original insertion order) and each session's csv_filename is filled from
+    the Data Catalog at catalog_path, when given. sensor_data gains session_id and timestamp
+    columns, back-filled by splitting the rows into sessions wherever
+    elapsed_seconds restarts and matching each run to the next metadata entry
+    with the same location. Timestamps are the session start plus elapsed seconds.
+    """
+    with conn:
+        # DDL does not open a transaction implicitly; start one so a failed
+        # migration rolls back completely.
+        conn.execute('BEGIN')
+
+        # 1. Rebuild the metadata table with a real primary key
+        conn.execute('ALTER TABLE session_metadata RENAME TO session_metadata_v0')
+        conn.execute(SESSION_METADATA_TABLE)
+        conn.execute('''
+            INSERT INTO session_metadata (start_time, location)
+            SELECT start_time, location FROM session_metadata_v0 ORDER BY rowid
+        ''')
+        conn.execute('DROP TABLE session_metadata_v0')
+        fill_csv_filenames(conn, catalog_path)
+
+        # 2. Add the session key and wall-clock columns to the data table
+        sensor_columns = _columns(conn, 'sensor_data')
+        if not sensor_columns:
+            return
+        if 'session_id' not in sensor_columns:
+            conn.execute('ALTER TABLE sensor_data ADD COLUMN session_id INTEGER '
+                         'REFERENCES session_metadata(session_id)')
+        if 'timestamp' not in sensor_columns:
+            conn.execute('ALTER TABLE sensor_data ADD COLUMN timestamp TEXT')
+
+        # 3. Split rows into runs wherever the elapsed counter restarts
+        runs = []
+        previous = None
+        for row_id, elapsed, location in conn.execute(
+                'SELECT id, elapsed_seconds, location_note FROM sensor_data ORDER BY id'):
+            if previous is None or elapsed is None or elapsed <= previous:
+                runs.append([row_id, row_id, location])
+            runs[-1][1] = row_id
+            previous = elapsed
+
+        # 4. Match each run to the next session recorded for its location
+        sessions = conn.execute(
+            'SELECT session_id, start_time, location FROM session_metadata ORDER BY session_id'
+        ).fetchall()
+        next_session = 0
+        for first_id, last_id, location in runs:
+            match = next(
+                (i for i in range(next_session, len(sessions)) if sessions[i][2] == location),
+                None
+            )
+            if match is None:
+                # Rows with no recorded session get one of their own (start time unknown)
+                cur = conn.execute('INSERT INTO session_metadata (location) VALUES (?)', (location,))
+                session_id, start_time = cur.lastrowid, None
+            else:
+                session_id, start_time, _ = sessions[match]
+                next_session = match + 1
+
+            conn.execute('''
+                UPDATE sensor_data
+                SET session_id = ?,
+                    timestamp = datetime(?, '+' || elapsed_seconds || ' seconds')
+                WHERE id BETWEEN ? AND ?
+            ''', (session_id, start_time, first_id, last_id))
+
+
+def migrate(db_filename, rebuild=False):
+    """Upgrades a master database file in place and reports what was done."""
+    conn = sqlite3.connect(db_filename)
+    try:
+        found_version = ensure_schema(conn)
+        if rebuild and found_version >= 2:
+            rebuild_rollups(conn)
+        sessions = conn.execute('SELECT COUNT(*) FROM session_metadata').fetchone()[0]
+        rows = conn.execute('SELECT COUNT(*) FROM sensor_data').fetchone()[0]
+        buckets = [
+            conn.execute(f'SELECT COUNT(*) FROM {rollup_table(r)}').fetchone()[0]
+            for r in ROLLUP_RESOLUTIONS
+        ]
+    finally:
+        conn.close()
+
+    if found_version == SCHEMA_VERSION:
+        print(f"STATUS: {db_filename} already at schema version {SCHEMA_VERSION}")
+    else:
+        print(f"STATUS: Migrated {db_filename} from schema version {found_version} to {SCHEMA_VERSION}")
+    print(f"STATUS: {sessions} sessions, {rows} sensor rows")
+    print("STATUS: Rollup buckets " + ", ".join(
+        f"{r}s: {n}" for r, n in zip(ROLLUP_RESOLUTIONS, buckets)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create or upgrade the Stuffy Study master database")
+    parser.add_argument("db", nargs="?", default="Stuffy_Study_Master.db", help="Master database file")
+    parser.add_argument("--rebuild-rollups", action="store_true",
+                        help="Recompute the rollup tables from sensor_data")
+    args = parser.parse_args()
+    migrate(args.db, rebuild=args.rebuild_rollups)
@@ -0,0 +1,240 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: Session Summary Index | Role: Per-Session Metadata for Browsing the Catalog
+Description:
+    Keeps one summary row per session CSV in _Experiment_Session_Index.csv, next
+    to the Data Catalog: row count, duration, min/max/mean of each metric, how
+    many readings fell below/above the range the dashboard flags as anomalies,
+    and a SHA-256 hash of the session file. The dashboard and analysis scripts filter and rank
+    sessions from this file without opening any raw data.
+    The logger updates each session's summary with every batch it writes (only
+    the new rows are added) and saves the index at most every
+    INDEX_WRITE_INTERVAL_S seconds and at shutdown.
+    Usage (rebuilds the summaries of existing sessions):
+        python session_index.py [files...]     (default: all session CSVs here)
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import argparse
+import csv
+import glob
+import hashlib
+import io
+import math
+import os
+import time
+
+INDEX_FILENAME = "_Experiment_Session_Index.csv"
+INDEX_WRITE_INTERVAL_S = 10
+
+# Metric columns of the session CSV and their position in a logger row
+# (elapsed, location, co2, voc, iaq, gas, t_raw, t_comp, h_raw, h_comp, accuracy).
+METRICS = [
+    "CO2_ppm", "VOC_ppm", "IAQ", "Gas_Res_Ohms",
+    "Temp_Raw_C", "Temp_Comp_C", "Hum_Raw_pct", "Hum_Comp_pct",
+]
+FIRST_METRIC = 2
+
+# (low, high) limits: a reading outside them is a breach. Keep in step with
+# anomaly_range in Dashboard_App/anomaly_utils.py, which the dashboard's anomaly
+# markers and statistics use (IAQ is flagged only above its top band).
+# tests/test_session_index.py checks they agree.
+THRESHOLDS = {
+    "CO2_ppm": (600, 1200),
+    "VOC_ppm": (0, 5),
+    "Temp_Comp_C": (18, 26),
+    "Hum_Comp_pct": (30, 60),
+    "IAQ": (-math.inf, 1000),
+}
+
+INDEX_COLUMNS = (
+    ["Session_Start_Time", "Location", "CSV_Filename", "Rows", "Duration_s"]
+    + [f"{m}_{s}" for m in METRICS for s in ("min", "max", "mean")]
+    + [f"{m}_{s}" for m in THRESHOLDS for s in ("below", "above")]
+    + ["Content_SHA256"]
+)
+
+
+class SessionSummary:
+    """
+    Running summary of one session CSV. Rows are added batch by batch, so the
+    logger never re-reads a file; the hash covers every byte of the file.
+    """
+
+    def __init__(self, csv_filename, start_time="", location=""):
+        self.csv_filename = csv_filename
+        self.start_time = start_time
+        self.location = location
+        self.rows = 0
+        self.first_elapsed = None
+        self.last_elapsed = None
+        self.min = [math.inf] * len(METRICS)
+        self.max = [-math.inf] * len(METRICS)
+        self.sum = [0.0] * len(METRICS)
+        self.below = dict.fromkeys(THRESHOLDS, 0)
+        self.above = dict.fromkeys(THRESHOLDS, 0)
+        self.hash = hashlib.sha256()
+
+    def update(self, rows, data=b""):
+        """Adds logger rows, and the bytes they were written as, to the summary."""
+        self.hash.update(data)
+        if not rows:
+            return
+
+        columns = list(zip(*rows))
+        if self.first_elapsed is None:
+            self.first_elapsed = columns[0][0]
+        self.last_elapsed = columns[0][-1]
+        self.rows += len(rows)
+
+        for i, metric in enumerate(METRICS):
+            values = columns[FIRST_METRIC + i]
+            self.min[i] = min(self.min[i], min(values))
+            self.max[i] = max(self.max[i], max(values))
+            self.sum[i] += math.fsum(values)
+            if metric in THRESHOLDS:
+                low, high = THRESHOLDS[metric]
+                self.below[metric] += sum(v < low for v in values)
+                self.above[metric] += sum(v > high for v in values)
+
+    def to_row(self):
+        row = {
+            "Session_Start_Time": self.start_time,
+            "Location": self.location,
+            "CSV_Filename": self.csv_filename,
+            "Rows": self.rows,
+            "Duration_s": self.last_elapsed - self.first_elapsed if self.rows else 0,
+            "Content_SHA256": self.hash.hexdigest(),
+        }
+        for i, metric in enumerate(METRICS):
+            if self.rows:
+                # float() so a live summary and a rebuilt one write identical text
+                row[f"{metric}_min"] = float(self.min[i])
+                row[f"{metric}_max"] = float(self.max[i])
+                row[f"{metric}_mean"] = round(self.sum[i] / self.rows, 3)
+        for metric in THRESHOLDS:
+            row[f"{metric}_below"] = self.below[metric]
+            row[f"{metric}_above"] = self.above[metric]
+        return row
+
+
+def summarise_csv(csv_path):
+    """Builds a SessionSummary from a session CSV already on disk (metadata block + data table)."""
+    with open(csv_path, "rb") as f:
+        data = f.read()
+
+    metadata = {}
+    rows = []
+    reader = csv.reader(io.StringIO(data.decode("utf-8"), newline=""))
+    for line in reader:
+        if line and line[0] == "Elapsed_Seconds":
+            break
+        if len(line) > 1:
+            metadata[line[0].lstrip("# ").strip()] = line[1].strip()
+
+    for line in reader:
+        try:
+            rows.append([int(line[0]), line[1]] + [float(v) for v in line[FIRST_METRIC:]])
+        except (ValueError, IndexError):
+            continue  # Blank or truncated line (e.g. a write cut short by a crash)
+
+    summary = SessionSummary(os.path.basename(csv_path), metadata.get("Start Time", ""),
+                             metadata.get("Location", ""))
+    summary.update(rows, data)
+    return summary
+
+
+def read_index(index_path):
+    """Returns the rows of an existing index as {CSV_Filename: row dict}, in file order."""
+    if not os.path.exists(index_path):
+        return {}
+    with open(index_path, newline="") as f:
+        return {row["CSV_Filename"]: row for row in csv.DictReader(f)}
+
+
+class SessionIndex:
+    """
+    The index file plus the live summaries of the sessions being recorded.
+    Only used from the logger's writer thread. A finished session keeps only
+    its index row, so memory does not grow with the number of sessions.
+    """
+
+    def __init__(self, index_path=INDEX_FILENAME, write_interval_s=INDEX_WRITE_INTERVAL_S):
+        self.index_path = index_path
+        self.write_interval_s = write_interval_s
+        # Summaries of earlier sessions are kept as read and written back unchanged
+        self.entries = read_index(index_path)
+        self.summaries = {}
+        self.dirty = False
+        self.next_write = 0.0
+
+    def __contains__(self, csv_filename):
+        return csv_filename in self.summaries
+
+    def open_session(self, csv_path):
+        """Starts tracking a session from what its CSV already holds (normally just the header)."""
+        summary = summarise_csv(csv_path)
+        self.summaries[summary.csv_filename] = summary
+        self.entries[summary.csv_filename] = summary
+        self.dirty = True
+
+    def update(self, csv_path, rows, data):
+        self.summaries[os.path.basename(csv_path)].update(rows, data)
+        self.dirty = True
+
+    def close_session(self, csv_path):
+        """Stops tracking a finished session; its final summary stays in the index as a row."""
+        summary = self.summaries.pop(os.path.basename(csv_path), None)
+        if summary is not None:
+            self.entries[summary.csv_filename] = summary.to_row()
+
+    def save(self, force=False):
+        """Rewrites the index if anything changed, at most every write_interval_s unless forced."""
+        if not self.dirty or (not force and time.monotonic() < self.next_write):
+            return
+        write_index(self.index_path, self.entries.values())
+        self.dirty = False
+        self.next_write = time.monotonic() + self.write_interval_s
+
+
+def write_index(index_path, entries):
+    """Writes summary rows (dicts or SessionSummary objects) to the index file."""
+    # Write to a temporary name first so readers never see a half-written file
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=INDEX_COLUMNS, extrasaction="ignore")
+        writer.writeheader()
+        for entry in entries:
+            writer.writerow(entry.to_row() if isinstance(entry, SessionSummary) else entry)
+    os.replace(tmp_path, index_path)
+
+
+def rebuild_index(csv_paths, index_path=INDEX_FILENAME):
+    """
+    Recomputes the summaries of the given session CSVs. Entries for other
+    sessions are kept while their CSV still exists next to the index.
+    """
+    entries = read_index(index_path)
+    folder = os.path.dirname(os.path.abspath(index_path))
+    entries = {name: row for name, row in entries.items()
+               if os.path.exists(os.path.join(folder, name))}
+
+    for csv_path in csv_paths:
+        summary = summarise_csv(csv_path)
+        entries[summary.csv_filename] = summary
+        print(f"INDEXED: {csv_path} ({summary.rows} rows)")
+
+    write_index(index_path, sorted(entries.values(), key=lambda e: (
+        e.start_time if isinstance(e, SessionSummary) else e["Session_Start_Time"])))
+    return len(csv_paths)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild the Stuffy Study session summary index")
+    parser.add_argument("paths", nargs="*", help="Session CSV files (default: all session CSVs here)")
+    parser.add_argument("--index", default=INDEX_FILENAME, help="Index file to update")
+    args = parser.parse_args()
+
+    count = rebuild_index(args.paths or sorted(glob.glob("Stuffy_Study_*.csv")), args.index)
+    print(f"STATUS: {count} sessions summarised in {args.index}")
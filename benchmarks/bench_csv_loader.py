@@ -0,0 +1,76 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: CSV Loader Benchmark | Role: Typed Loader vs String Round-Trip on the Shipped Sessions
+Description:
+    Loads each session CSV shipped in Python_Data_Logger (or the files given)
+    with the original loader - pandas type inference, then a str/strip/
+    to_numeric round-trip per column - and with the dashboard's typed loader
+    (data_utils.load_and_standardise_csv). Prints the best of several runs and
+    the in-memory size of each result, and checks both give the same values.
+    Usage:
+        python benchmarks/bench_csv_loader.py [files...] [--repeat N]
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from Dashboard_App.data_utils import load_and_standardise_csv
+
+NUMERIC_COLUMNS = [
+    "Time (s)", "CO2_ppm", "VOC_ppm", "IAQ", "Gas_Res_Ohms",
+    "Temp_Raw_C", "Temp_Comp_C", "Hum_Raw_pct", "Hum_Comp_pct", "Accuracy"
+]
+
+
+def string_round_trip_loader(path):
+    """The loader the typed schema replaced (fixed skiprows, per-column string round-trip)."""
+    df = pd.read_csv(path, skiprows=4)
+    df = df.rename(columns={"Elapsed_Seconds": "Time (s)"})
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().replace("", pd.NA)
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+    return df
+
+
+def best_time(load, path, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        df = load(path)
+        best = min(best, time.perf_counter() - started)
+    return best, df
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the typed session CSV loader")
+    parser.add_argument("paths", nargs="*", help="Session CSV files (default: the shipped sessions)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per file; the best is reported")
+    args = parser.parse_args()
+
+    paths = args.paths or sorted(glob.glob(os.path.join(ROOT, "Python_Data_Logger", "Stuffy_Study_*.csv")))
+    for path in paths:
+        old_s, old_df = best_time(string_round_trip_loader, path, args.repeat)
+        new_s, new_df = best_time(load_and_standardise_csv, path, args.repeat)
+
+        same = all(
+            ((old_df[c].astype(float) - new_df[c].astype(float)).abs() < 1e-4).all()
+            for c in NUMERIC_COLUMNS
+        )
+        print(
+            f"{os.path.basename(path)} ({len(new_df)} rows): "
+            f"{old_s * 1000:.1f} ms -> {new_s * 1000:.1f} ms, "
+            f"{old_df.memory_usage(deep=True).sum() / 1e3:.0f} KB -> "
+            f"{new_df.memory_usage(deep=True).sum() / 1e3:.0f} KB"
+            f"{'' if same else '  (VALUES DIFFER)'}"
+        )
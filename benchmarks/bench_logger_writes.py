@@ -0,0 +1,103 @@
+"""
+Project: THE STUFFY STUDY (CHEM501)
+Module: Logger Write Benchmark | Role: Rows/sec Before and After Write-Behind Buffering
+Description:
+    Writes the same synthetic readings to a fresh session CSV and master
+    database in a temporary folder, two ways:
+        per-row:  the original save_and_display pattern - reopen the CSV in
+                  append mode and commit to SQLite for every reading
+        batched:  the logger's BufferedSessionWriter (FLUSH_EVERY_ROWS rows
+                  per CSV write and executemany transaction)
+    and prints the rows/sec of each. Console output of the writer is discarded.
+    Usage:
+        python benchmarks/bench_logger_writes.py [--rows N]
+System Requirements:
+    pip install paho-mqtt
+Authors: Josh and Kinga
+License: MIT
+"""
+
+import argparse
+import contextlib
+import csv
+import os
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "Python_Data_Logger"))
+
+import db_schema
+import Stuffy_Study_Data_Logger as logger
+
+
+def reading(t, location):
+    return (t, location, 800 + t % 400, 0.5, 60, 50000, 22.5, 21.5, 45.0, 44.0, 3)
+
+
+def fresh_storage(folder):
+    os.chdir(folder)
+    with sqlite3.connect(logger.DB_FILENAME) as conn:
+        db_schema.ensure_schema(conn)
+
+
+def per_row(n_rows):
+    """One CSV open/append and one commit per reading."""
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+    session = logger.DeviceSession("bench", "Benchmark Pod")
+    conn = sqlite3.connect(logger.DB_FILENAME)
+    session_id = conn.execute(
+        "INSERT INTO session_metadata (start_time, location, device_id, csv_filename) VALUES (?, ?, ?, ?)",
+        (session.start_str, session.location_label, session.device_id, session.csv_filename)
+    ).lastrowid
+    conn.commit()
+
+    started = time.perf_counter()
+    for t in range(n_rows):
+        row = reading(t, session.location_label)
+        with open(session.csv_filename, mode='a', newline='') as f:
+            csv.writer(f).writerow(row)
+        conn.execute(logger.SENSOR_DATA_INSERT, (session_id, stamp) + row)
+        conn.commit()
+    elapsed = time.perf_counter() - started
+    conn.close()
+    return n_rows / elapsed
+
+
+def batched(n_rows):
+    """The logger's write-behind writer thread, from first submit to close()."""
+    stamp = time.strftime('%Y-%m-%d %H:%M:%S')
+    storage = logger.StudySpaceLogger.__new__(logger.StudySpaceLogger)
+    writer = logger.BufferedSessionWriter(logger.DB_FILENAME, storage.open_session_storage,
+                                          max_queued_rows=n_rows + 1)
+    session = logger.DeviceSession("bench", "Benchmark Pod")
+    writer.open_session(session)
+
+    started = time.perf_counter()
+    for t in range(n_rows):
+        writer.submit(session, reading(t, session.location_label), time.monotonic(), stamp)
+    writer.close()
+    elapsed = time.perf_counter() - started
+    assert writer.rows_written == n_rows
+    return n_rows / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark per-row and batched logger writes")
+    parser.add_argument("--rows", type=int, default=3000, help="Readings to write in each mode")
+    args = parser.parse_args()
+
+    results = {}
+    for name, run in (("per-row", per_row), ("batched", batched)):
+        with tempfile.TemporaryDirectory() as folder:
+            cwd = os.getcwd()
+            try:
+                fresh_storage(folder)
+                with open(os.devnull, "w") as null, contextlib.redirect_stdout(null):
+                    results[name] = run(args.rows)
+            finally:
+                os.chdir(cwd)
+        print(f"{name:>8}: {results[name]:>10,.0f} rows/s")
+
+    print(f"speed-up: {results['batched'] / results['per-row']:.1f}x ({args.rows} rows)")
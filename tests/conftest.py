@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# The dashboard is imported as the Dashboard_App package; the logger modules
+# import each other by plain name from their own folder.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, "Python_Data_Logger"))
+
+# Metadata block and table header of a session CSV, as the logger writes them
+SESSION_CSV_HEADER = (
+    "# SESSION METADATA\r\n# Start Time,2025-12-04 12:36:44\r\n# Location,Test Pod\r\n\r\n"
+    "Elapsed_Seconds,Location_Note,CO2_ppm,VOC_ppm,IAQ,Gas_Res_Ohms,"
+    "Temp_Raw_C,Temp_Comp_C,Hum_Raw_pct,Hum_Comp_pct,Accuracy\r\n"
+)
+
+
+@pytest.fixture
+def session_header():
+    return SESSION_CSV_HEADER
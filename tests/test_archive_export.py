@@ -0,0 +1,53 @@
+import sqlite3
+
+import pytest
+
+pytest.importorskip("pyarrow")
+
+import archive_export
+import db_schema
+
+
+def add_rows(conn, session_id, elapsed):
+    conn.executemany(
+        "INSERT INTO sensor_data (session_id, timestamp, elapsed_seconds, location_note, co2_ppm, voc_ppm, iaq, "
+        "gas_res_ohms, temp_raw_c, temp_comp_c, hum_raw_pct, hum_comp_pct, accuracy) "
+        "VALUES (?, datetime('2025-12-04 12:00:00', '+' || ? || ' seconds'), ?, 'Room A', 800, 0.5, 60, "
+        "50000, 22.5, 21.5, 45.0, 44.0, 3)",
+        [(session_id, t, t) for t in elapsed]
+    )
+    conn.commit()
+
+
+def test_db_export_skips_sessions_already_archived(tmp_path):
+    db_path = str(tmp_path / "master.db")
+    archive_dir = str(tmp_path / "archive")
+    conn = sqlite3.connect(db_path)
+    db_schema.ensure_schema(conn)
+    for session_id in (1, 2):
+        conn.execute("INSERT INTO session_metadata (session_id, start_time, location, csv_filename) "
+                     "VALUES (?, '2025-12-04 12:00:00', 'Room A', ?)", (session_id, f"session_{session_id}.csv"))
+        add_rows(conn, session_id, range(10))
+
+    assert archive_export.export_db_sessions(db_path, archive_dir) == 2
+    assert archive_export.export_db_sessions(db_path, archive_dir) == 0
+
+    # A session that gained rows is archived again
+    add_rows(conn, 2, range(10, 15))
+    conn.close()
+    assert archive_export.export_db_sessions(db_path, archive_dir) == 1
+
+
+@pytest.mark.parametrize("header", [True, False])
+def test_read_session_csv(tmp_path, header):
+    path = tmp_path / "session.csv"
+    lines = ["# SESSION METADATA", "# Start Time,2025-12-04 12:36:44", "# Location,Room A", ""]
+    if header:
+        lines.append(",".join(archive_export.CSV_COLUMNS))
+    lines += [f"{t},Room A,800,0.5,60,50000,22.5,21.5,45.0,44.0,3" for t in range(5)]
+    path.write_text("\r\n".join(lines) + "\r\n")
+
+    df, metadata = archive_export.read_session_csv(str(path))
+    assert metadata == {"Start Time": "2025-12-04 12:36:44", "Location": "Room A"}
+    assert list(df.columns) == archive_export.CSV_COLUMNS
+    assert df["Elapsed_Seconds"].tolist() == list(range(5))
@@ -0,0 +1,50 @@
+import csv
+
+import binary_log
+from Dashboard_App import data_utils, live_feed
+
+
+def test_bin_and_csv_readers_give_the_same_values(tmp_path, session_header):
+    # Readings as the logger receives them: floats parsed from MQTT payload text
+    rows = [
+        [t, "Test Pod", 800 + t, 0.58, 60, 50000, 22.47, 21.9123456, 40.1, 44.03, 3]
+        for t in range(20)
+    ]
+
+    csv_path = tmp_path / "live.csv"
+    with open(csv_path, "w", newline="") as f:
+        f.write(session_header)
+        csv.writer(f).writerows(rows)
+
+    bin_path = tmp_path / "live.bin"
+    writer = binary_log.BinaryRecordWriter(str(bin_path), 0.0, "Test Pod")
+    writer.append(rows)
+    writer.close()
+
+    from_csv = data_utils.read_latest_csv(str(csv_path))
+    from_bin = data_utils.read_latest_binary(str(bin_path))
+    assert from_bin["Hum_Raw_pct"].iloc[-1] == 40.1
+    for col in from_csv.columns[2:]:
+        assert from_bin[col].tolist() == from_csv[col].tolist(), col
+
+
+def test_growing_file_keeps_the_live_window(tmp_path):
+    rows = [[t, "Test Pod", 800, 0.5, 60, 50000, 22.5, 21.5, 45.0, 44.0, 3] for t in range(30)]
+    bin_path = str(tmp_path / "live.bin")
+    writer = binary_log.BinaryRecordWriter(bin_path, 0.0, "Test Pod")
+    tailer = live_feed.BinaryTailer(bin_path)
+
+    writer.append(rows[:10])
+    tailer.read(1)
+    window = tailer.window
+
+    # Each append grows the file past the mapped length, so the tailer remaps it
+    writer.append(rows[10:20])
+    tailer.read(1)
+    writer.append(rows[20:])
+    tailer.read(1)
+    writer.close()
+
+    assert tailer.window is window
+    assert window.stats["CO2_ppm"].count == 30
+    assert window.frame(300)["Time (s)"].tolist() == list(range(30))
@@ -0,0 +1,37 @@
+import os
+import shutil
+
+from Dashboard_App import data_utils
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SESSION_CSV = os.path.join(ROOT, "Python_Data_Logger", "Stuffy_Study_2025-12-04_15-14-48.csv")
+
+
+def test_compared_sessions_are_parsed_once_across_reruns(tmp_path, monkeypatch):
+    data_utils._load_compared_session.clear()
+    data_utils._load_dataset.clear()
+    parses = []
+    load_csv = data_utils.load_and_standardise_csv
+    monkeypatch.setattr(data_utils, "load_and_standardise_csv", lambda src: parses.append(src) or load_csv(src))
+
+    paths = []
+    for i in range(data_utils.DATASET_CACHE_SIZE + 10):
+        paths.append(str(tmp_path / f"session_{i}.csv"))
+        shutil.copy(SESSION_CSV, paths[-1])
+    compared, others = paths[:10], paths[10:]
+
+    data_utils.load_sessions(compared[:9])
+    assert len(parses) == 9
+    # Adding a tenth session parses only that one
+    data_utils.load_sessions(compared)
+    assert len(parses) == 10
+
+    # Reruns, narrowing the selection and browsing other files parse nothing again
+    for _ in range(3):
+        data_utils.load_sessions(compared)
+    data_utils.load_sessions(compared[:9])
+    for path in others:
+        data_utils.load_dataset(path)
+    parses.clear()
+    data_utils.load_sessions(compared)
+    assert parses == []
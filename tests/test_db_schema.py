@@ -0,0 +1,94 @@
+import csv
+import sqlite3
+
+import numpy as np
+import pytest
+
+import db_schema
+
+SESSIONS = [
+    ("2025-12-04 12:36:44", "MIF Pod 1", "Stuffy_Study_2025-12-04_12-36-44.csv"),
+    ("2025-12-04 13:58:23", "MIF Lobby", "Stuffy_Study_2025-12-04_13-58-23.csv"),
+]
+
+
+def write_catalog(folder):
+    with open(folder / db_schema.CATALOG_FILENAME, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["Session_Start_Time", "Location", "CSV_Filename", "Master_Database"])
+        writer.writerows(s + ("Stuffy_Study_Master.db",) for s in SESSIONS)
+
+
+def test_migration_fills_csv_filenames_from_the_catalog(tmp_path):
+    write_catalog(tmp_path)
+    conn = sqlite3.connect(tmp_path / "Stuffy_Study_Master.db")
+    # The original layout: no session key, no file name
+    conn.execute("CREATE TABLE session_metadata (start_time TEXT, location TEXT)")
+    conn.execute(db_schema.SENSOR_DATA_TABLE.replace(
+        "session_id INTEGER REFERENCES session_metadata(session_id),", "").replace("timestamp TEXT,", ""))
+    conn.executemany("INSERT INTO session_metadata VALUES (?, ?)", [s[:2] for s in SESSIONS])
+    conn.executemany("INSERT INTO sensor_data (elapsed_seconds, location_note, co2_ppm) VALUES (?, ?, 800)",
+                     [(t, s[1]) for s in SESSIONS for t in range(3)])
+    conn.commit()
+
+    assert db_schema.ensure_schema(conn) == 0
+    assert conn.execute(
+        "SELECT start_time, location, csv_filename FROM session_metadata ORDER BY session_id"
+    ).fetchall() == SESSIONS
+
+
+def test_databases_migrated_without_file_names_are_filled_in(tmp_path):
+    write_catalog(tmp_path)
+    conn = sqlite3.connect(tmp_path / "Stuffy_Study_Master.db")
+    db_schema.ensure_schema(conn)
+    conn.executemany("INSERT INTO session_metadata (start_time, location) VALUES (?, ?)",
+                     [s[:2] for s in SESSIONS])
+    conn.execute("PRAGMA user_version = 1")
+    conn.commit()
+
+    db_schema.ensure_schema(conn)
+    assert [r[0] for r in conn.execute("SELECT csv_filename FROM session_metadata")] == \
+        [s[2] for s in SESSIONS]
+
+
+def rollup_rows(conn):
+    return {
+        r: conn.execute(f"SELECT * FROM {db_schema.rollup_table(r)} ORDER BY session_id, bucket_start").fetchall()
+        for r in db_schema.ROLLUP_RESOLUTIONS
+    }
+
+
+def test_incremental_rollups_match_a_rebuild(tmp_path):
+    conn = sqlite3.connect(tmp_path / "Stuffy_Study_Master.db")
+    db_schema.ensure_schema(conn)
+    rng = np.random.default_rng(0)
+
+    # Two sessions written in batches of 1 Hz rows that straddle minute, 15 min and hour boundaries
+    elapsed = {1: 0, 2: 0}
+    for batch_size in (37, 600, 1, 1500, 2900, 263):
+        with conn:
+            after_id = db_schema.last_row_id(conn)
+            for session_id, location in ((1, "Room A"), (2, "Room B")):
+                t = np.arange(elapsed[session_id], elapsed[session_id] + batch_size)
+                elapsed[session_id] += batch_size
+                conn.executemany(
+                    "INSERT INTO sensor_data (session_id, timestamp, elapsed_seconds, location_note, co2_ppm, "
+                    "voc_ppm, iaq, gas_res_ohms, temp_raw_c, temp_comp_c, hum_raw_pct, hum_comp_pct, accuracy) "
+                    "VALUES (?, datetime('2025-12-04 12:59:20', '+' || ? || ' seconds'), ?, ?, ?, ?, ?, ?, ?, ?, "
+                    "?, ?, ?)",
+                    [(session_id, int(s), int(s), location, int(rng.integers(400, 1600)), float(rng.random()),
+                      int(rng.integers(0, 300)), 50000, 22.5, float(20 + rng.random()), None if s % 97 == 0 else 45.0,
+                      float(40 + rng.random()), 3) for s in t]
+                )
+            db_schema.update_rollups(conn, after_id)
+
+    incremental = rollup_rows(conn)
+    db_schema.rebuild_rollups(conn)
+    rebuilt = rollup_rows(conn)
+
+    for resolution in db_schema.ROLLUP_RESOLUTIONS:
+        assert len(incremental[resolution]) == len(rebuilt[resolution]) > 1
+        for got, expected in zip(incremental[resolution], rebuilt[resolution]):
+            assert got == pytest.approx(expected, rel=1e-12), resolution
+    counts = conn.execute(f"SELECT SUM(row_count) FROM {db_schema.rollup_table(3600)}").fetchone()[0]
+    assert counts == sum(elapsed.values())
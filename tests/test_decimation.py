@@ -0,0 +1,67 @@
+import numpy as np
+import pytest
+
+from Dashboard_App import data_utils
+
+
+def series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    x = np.arange(n, dtype=float)
+    y = 800 + 100 * np.sin(x / 500) + rng.normal(0, 5, n)
+    y[n // 3] = 5000   # one spike up
+    y[2 * n // 3] = -5000  # and one down
+    return x, y
+
+
+@pytest.mark.parametrize("n, n_out", [(10_000, 800), (1_001, 100), (50, 10)])
+def test_lttb_keeps_the_ends_and_returns_n_out_points(n, n_out):
+    x, y = series(n)
+    idx = data_utils.lttb_indices(x, y, n_out)
+    assert len(idx) == n_out
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert np.all(np.diff(idx) > 0)
+    assert {n // 3, 2 * n // 3} <= set(idx)
+
+
+def test_short_series_are_not_decimated():
+    x, y = series(100)
+    np.testing.assert_array_equal(data_utils.lttb_indices(x, y, 100), np.arange(100))
+    np.testing.assert_array_equal(data_utils.minmax_indices(y, 50), np.arange(100))
+
+
+@pytest.mark.parametrize("n, n_buckets", [(10_000, 400), (9_999, 7), (1_000, 499)])
+def test_minmax_keeps_every_buckets_extremes(n, n_buckets):
+    x, y = series(n)
+    idx = data_utils.minmax_indices(y, n_buckets)
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert len(idx) <= 2 * n_buckets + 2
+    kept = y[idx]
+    for bucket in np.array_split(np.arange(n), n_buckets):
+        # The bucket's extremes are kept whatever its exact boundaries
+        assert kept.max() >= y[bucket].max() and kept.min() <= y[bucket].min()
+    assert y[idx].max() == y.max() and y[idx].min() == y.min()
+
+
+@pytest.mark.parametrize("method", ["lttb", "minmax"])
+def test_decimate_indices_is_bounded_and_keeps_flagged_points(method):
+    n, n_out = 20_000, 600
+    x, y = series(n)
+    y[5000:5010] = np.nan
+
+    idx = data_utils.decimate_indices(x, y, n_out, method=method)
+    assert len(idx) <= n_out + 2
+    assert idx[0] == 0 and idx[-1] == n - 1
+    assert y[idx].max() == np.nanmax(y) and y[idx].min() == np.nanmin(y)
+    if method == "lttb":
+        assert not np.isnan(y[idx]).any()
+
+    # A few flagged points are all kept
+    few = np.zeros(n, dtype=bool)
+    few[[10, 777, 12_345]] = True
+    assert set(np.flatnonzero(few)) <= set(data_utils.decimate_indices(x, y, n_out, method, keep_mask=few))
+
+    # More flagged points than pixels: still bounded, the flagged extremes kept
+    many = y > 800
+    idx = data_utils.decimate_indices(x, y, n_out, method, keep_mask=many)
+    assert len(idx) <= 2 * n_out + 4
+    assert y[idx].max() == np.nanmax(y)
@@ -0,0 +1,65 @@
+import time
+
+from Dashboard_App import data_utils, live_feed, live_tracking
+
+
+def reading(t, co2=800):
+    return f"{t},Test Pod,{co2},0.5,60,50000,22.5,21.5,45.0,44.0,3\r\n"
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+def test_one_watcher_feeds_the_sidebar_and_the_charts(tmp_path, monkeypatch, session_header):
+    monkeypatch.setattr(live_feed, "LIVE_WATCH_INTERVAL_S", 0.01)
+    reads = []
+    read_latest_csv = live_feed.read_latest_csv
+    monkeypatch.setattr(live_feed, "read_latest_csv", lambda *a: reads.append(a) or read_latest_csv(*a))
+
+    path = tmp_path / "live.csv"
+    path.write_text(session_header + "".join(reading(t) for t in range(10)), newline="")
+    path = str(path)
+
+    version = data_utils.live_version(path)
+    assert data_utils.latest_readings(path)["time"] == 9
+
+    with open(path, "a", newline="") as f:
+        f.write(reading(10, co2=1500))
+    wait_for(lambda: data_utils.live_version(path) != version)
+
+    # The watcher parsed the new row; the sidebar and the chart read the shared state.
+    # Past the poll interval, a viewer without a watcher would read the file again.
+    time.sleep(data_utils.LIVE_POLL_INTERVAL_S)
+    parsed = len(reads)
+    for _ in range(5):
+        latest = live_tracking.data_utils.latest_readings(path)
+        assert latest["time"] == 10
+        assert latest["readings"]["CO2_ppm"]["anomaly"]
+    assert len(reads) == parsed
+    assert data_utils.read_live_window(path, 300)["Time (s)"].iloc[-1] == 10
+
+
+def test_tailer_waits_for_a_half_written_row(tmp_path, session_header):
+    path = tmp_path / "live.csv"
+    head, rest = session_header[:-20], session_header[-20:]
+    path.write_bytes(head.encode("utf-8"))
+    tailer = live_feed.CsvTailer(str(path), 200)
+    # The table header itself is cut short
+    assert tailer.read(10) is None
+
+    with open(path, "ab") as f:
+        f.write((rest + reading(0) + reading(1) + "2,Test Pod,8").encode("utf-8"))
+    rows = tailer.read(10)
+    assert rows["Time (s)"].tolist() == [0, 1]
+
+    # The logger finishes the row: CO2 is 800, not the 8 that was on disk before
+    with open(path, "ab") as f:
+        f.write(b"00,0.5,60,50000,22.5,21.5,45.0,44.0,3\r\n" + reading(3).encode("utf-8"))
+    rows = tailer.read(10)
+    assert rows["Time (s)"].tolist() == [0, 1, 2, 3]
+    assert rows["CO2_ppm"].tolist() == [800] * 4
+    assert tailer.window.frame(300)["CO2_ppm"].tolist() == [800] * 4
@@ -0,0 +1,12 @@
+import sys
+
+from Dashboard_App import data_utils, live_tracking, plot_utils, reporting_data, stats_util
+
+
+def test_dashboard_modules_share_one_data_utils():
+    # One module object means one set of tailers, latest-reading caches and watchers
+    assert live_tracking.data_utils is data_utils
+    assert plot_utils.frame_fingerprint is data_utils.frame_fingerprint
+    assert stats_util.dataset_stats is data_utils.dataset_stats
+    assert reporting_data.dataset_stats is data_utils.dataset_stats
+    assert "data_utils" not in sys.modules
@@ -0,0 +1,140 @@
+import os
+import sqlite3
+import threading
+import time
+
+import pytest
+
+pytest.importorskip("paho.mqtt.client")
+
+import db_schema
+import Stuffy_Study_Data_Logger as logger
+
+
+def row(t, location):
+    return (t, location, 800, 0.5, 60, 50000, 22.5, 21.5, 45.0, 44.0, 3)
+
+
+@pytest.fixture
+def storage(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    with sqlite3.connect(logger.DB_FILENAME) as conn:
+        db_schema.ensure_schema(conn)
+    # Session set-up as the logger does it (CSV header, metadata row, catalog entry)
+    return logger.StudySpaceLogger.__new__(logger.StudySpaceLogger)
+
+
+def test_session_setup_and_close_do_not_block_on_a_full_queue(storage):
+    setup_done = threading.Event()
+    release = threading.Event()
+
+    def slow_setup(conn, session):
+        storage.open_session_storage(conn, session)
+        setup_done.set()
+        release.wait()  # a stalled disk
+
+    writer = logger.BufferedSessionWriter(logger.DB_FILENAME, slow_setup, max_queued_rows=5,
+                                          enqueue_timeout_ms=1)
+    first = logger.DeviceSession("pod_a", "Room A")
+    writer.open_session(first)
+    assert setup_done.wait(5)
+
+    accepted = [writer.submit(first, row(t, "Room A"), time.monotonic(), "2025-01-01 00:00:00")
+                for t in range(10)]
+    assert not all(accepted)
+
+    # Neither may wait for space in the row queue
+    opener = threading.Thread(target=writer.open_session, args=(logger.DeviceSession("pod_b", "Room B"),),
+                              daemon=True)
+    opener.start()
+    opener.join(0.5)
+    assert not opener.is_alive()
+
+    closer = threading.Thread(target=writer.close, daemon=True)
+    closer.start()
+    release.set()
+    closer.join(10)
+    assert not closer.is_alive()
+    assert writer.rows_written == sum(accepted)
+
+
+def test_csv_errors_do_not_stop_the_writer(storage):
+    writer = logger.BufferedSessionWriter(logger.DB_FILENAME, storage.open_session_storage,
+                                          flush_every_rows=1)
+    broken = logger.DeviceSession("pod_a", "Room A")
+    broken.csv_filename = "missing_folder/session.csv"
+    good = logger.DeviceSession("pod_b", "Room B")
+    writer.open_session(broken)
+    writer.open_session(good)
+
+    for t in range(3):
+        writer.submit(broken, row(t, "Room A"), time.monotonic(), "2025-01-01 00:00:00")
+        writer.submit(good, row(t, "Room B"), time.monotonic(), "2025-01-01 00:00:00")
+    writer.close()
+
+    # Every row still reached the database; the good session's CSV has its rows
+    assert writer.rows_written == 6
+    with open(good.csv_filename) as f:
+        assert sum(line.startswith(("0,", "1,", "2,")) for line in f) == 3
+
+
+def open_files():
+    names = set()
+    for fd in os.listdir("/proc/self/fd"):
+        try:
+            names.add(os.path.basename(os.readlink(f"/proc/self/fd/{fd}")))
+        except OSError:
+            pass
+    return names
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "timed out"
+        time.sleep(0.01)
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc/self/fd"), reason="needs /proc")
+def test_replaced_sessions_close_their_files(storage):
+    writer = logger.BufferedSessionWriter(logger.DB_FILENAME, storage.open_session_storage,
+                                          flush_every_rows=1)
+    old = logger.DeviceSession("pod_a", "Room A")
+    writer.open_session(old)
+    for t in range(2):
+        writer.submit(old, row(t, "Room A"), time.monotonic(), "2025-01-01 00:00:00")
+    wait_for(lambda: writer.rows_written == 2)
+    assert {old.csv_filename, old.bin_filename} <= open_files()
+
+    # The pod comes back after a long silence
+    new = logger.DeviceSession("pod_a", "Room A")
+    new.csv_filename, new.bin_filename = "new_session.csv", "new_session.bin"
+    writer.open_session(new)
+    writer.submit(new, row(0, "Room A"), time.monotonic(), "2025-01-01 00:00:00")
+    wait_for(lambda: writer.rows_written == 3)
+
+    files = open_files()
+    writer.close()
+    assert not {old.csv_filename, old.bin_filename} & files
+    assert {new.csv_filename, new.bin_filename} <= files
+
+
+def test_rows_wait_for_a_failed_session_setup(storage):
+    failures = [sqlite3.OperationalError("database is locked")]
+
+    def flaky_setup(conn, session):
+        if failures:
+            raise failures.pop()
+        storage.open_session_storage(conn, session)
+
+    writer = logger.BufferedSessionWriter(logger.DB_FILENAME, flaky_setup, flush_every_rows=1)
+    session = logger.DeviceSession("pod_a", "Room A")
+    writer.open_session(session)
+    for t in range(3):
+        writer.submit(session, row(t, "Room A"), time.monotonic(), "2025-01-01 00:00:00")
+    writer.close()
+
+    with sqlite3.connect(logger.DB_FILENAME) as conn:
+        keys = [r[0] for r in conn.execute("SELECT session_id FROM sensor_data")]
+    assert keys == [session.session_id] * 3
+    assert session.session_id is not None
@@ -0,0 +1,86 @@
+import numpy as np
+import pytest
+
+from Dashboard_App import data_utils
+
+HAMPEL = "Hampel (rolling median/MAD)"
+
+
+def spiky_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    y = 800 + 100 * np.sin(np.arange(n) / 30) + rng.normal(0, 10, n)
+    spikes = rng.choice(n, n // 25, replace=False)
+    y[spikes] += rng.choice([-1, 1], len(spikes)) * rng.uniform(80, 300, len(spikes))
+    # A flat stretch of whole-number readings (zero MAD) and a missing reading
+    y[200:240] = 800
+    y[220] = 805
+    y[300] = np.nan
+    return y
+
+
+def feed(stream, y, tail=200, seed=1):
+    """Feed overlapping live tails growing by a few rows; yields (start, end, flags)."""
+    rng = np.random.default_rng(seed)
+    t = np.arange(len(y))
+    end = 0
+    while end < len(y):
+        end = min(len(y), end + int(rng.integers(1, 40)))
+        start = max(0, end - tail)
+        yield start, end, stream.update(t[start:end], y[start:end])
+
+
+def test_hampel_mask_matches_its_definition():
+    y, window, threshold = spiky_series(600), 11, 3.0
+    half = window // 2
+    spans = [slice(max(0, i - half), i + half + 1) for i in range(len(y))]
+    with np.errstate(invalid="ignore"):
+        deviation = np.abs(y - np.array([np.nanmedian(y[s]) for s in spans]))
+        mad = np.array([np.nanmedian(deviation[s]) for s in spans])
+        mean_ad = np.array([np.nanmean(deviation[s]) for s in spans])
+        scale = np.where(mad > 0, data_utils.MAD_SCALE * mad, data_utils.MEAN_AD_SCALE * mean_ad)
+        expected = (scale > 0) & (deviation > threshold * scale)
+
+    mask = data_utils.hampel_mask(y, window, threshold)
+    np.testing.assert_array_equal(mask, expected)
+    assert mask[220] and not mask[300]
+
+
+def test_iqr_and_zscore_masks():
+    y = spiky_series(600)
+    q1, q3 = np.nanpercentile(y, [25, 75])
+    with np.errstate(invalid="ignore"):
+        iqr = (y < q1 - 1.5 * (q3 - q1)) | (y > q3 + 1.5 * (q3 - q1))
+        zscore = np.abs(y - np.nanmean(y)) > 3.0 * np.nanstd(y)
+    np.testing.assert_array_equal(data_utils.outlier_mask(y, "IQR"), iqr)
+    np.testing.assert_array_equal(data_utils.outlier_mask(y, "Z-score"), zscore)
+
+
+def test_streaming_hampel_matches_the_batch_mask():
+    y = spiky_series(1500)
+    stream = data_utils.OutlierStream(HAMPEL, window=11, keep_rows=300)
+    for start, end, flags in feed(stream, y):
+        np.testing.assert_array_equal(flags, data_utils.hampel_mask(y[:end], 11, 3.0)[start:end],
+                                      err_msg=f"rows {start}:{end}")
+
+
+@pytest.mark.parametrize("method", ["IQR", "Z-score"])
+def test_streaming_flags_judge_each_reading_against_the_window_before_it(method):
+    y, window = spiky_series(1500), 25
+    threshold = data_utils.OUTLIER_THRESHOLDS[method]
+    expected = np.zeros(len(y), dtype=bool)
+    for i in range(len(y)):
+        before = y[max(0, i - window):i]
+        before = before[~np.isnan(before)]
+        if len(before) < 3 or np.isnan(y[i]):
+            continue
+        if method == "IQR":
+            q1, q3 = np.percentile(before, [25, 75])
+            spread = threshold * (q3 - q1)
+            expected[i] = spread > 0 and not q1 - spread <= y[i] <= q3 + spread
+        else:
+            std = before.std()
+            expected[i] = std > 0 and abs(y[i] - before.mean()) > threshold * std
+
+    stream = data_utils.OutlierStream(method, window=window, keep_rows=300)
+    for start, end, flags in feed(stream, y):
+        np.testing.assert_array_equal(flags, expected[start:end], err_msg=f"rows {start}:{end}")
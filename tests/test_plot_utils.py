@@ -0,0 +1,72 @@
+import threading
+
+import matplotlib as mt
+import numpy as np
+import pandas as pd
+
+from Dashboard_App import plot_utils, theme_toggle
+
+
+def window(t0, t1, co2=None):
+    t = np.arange(t0, t1, dtype=float)
+    values = 800 + 300 * np.sin(t / 50) if co2 is None else np.full(len(t), float(co2))
+    return pd.DataFrame({"Time (s)": t, "CO2_ppm": values})
+
+
+def line_x(chart):
+    return np.asarray(chart.lines["CO2_ppm"].get_xdata())
+
+
+def test_live_chart_appends_only_new_rows():
+    chart = plot_utils.LiveChart("CO2_ppm", "CO2_ppm", ["Time (s)", "CO2_ppm"], "Light", window="1 h")
+    chart.render(window(0, 3600))
+    first = line_x(chart)
+    assert len(first) < 3600  # the first window is decimated
+
+    # Five new rows: the window slides by five seconds
+    chart.render(window(5, 3605))
+    x = line_x(chart)
+    np.testing.assert_array_equal(x[-5:], np.arange(3600, 3605))
+    np.testing.assert_array_equal(x[:-5], first[first >= 5])
+
+    # Nothing new: the artists are left as they are
+    chart.render(window(5, 3605))
+    np.testing.assert_array_equal(line_x(chart), x)
+
+
+def test_live_chart_appends_anomalies():
+    chart = plot_utils.LiveChart("CO2_ppm", "CO2_ppm", ["Time (s)", "CO2_ppm"], "Light", window="5 min")
+    chart.render(window(0, 300, co2=800))
+    assert len(chart.anomalies.get_offsets()) == 0
+
+    data = window(1, 301, co2=800)
+    data.loc[data.index[-1], "CO2_ppm"] = 1500
+    chart.render(data)
+    np.testing.assert_array_equal(chart.anomalies.get_offsets(), [[300, 1500]])
+
+
+def test_live_chart_redraws_a_window_that_does_not_continue():
+    chart = plot_utils.LiveChart("CO2_ppm", "CO2_ppm", ["Time (s)", "CO2_ppm"], "Light", window="5 min")
+    chart.render(window(1000, 1300))
+    # The elapsed counter restarted (a new session)
+    chart.render(window(0, 10))
+    np.testing.assert_array_equal(line_x(chart), np.arange(0, 10))
+
+
+def test_concurrent_renders_keep_their_own_theme():
+    before = mt.rcParams["axes.facecolor"]
+    seen = {"Dark": set(), "Light": set()}
+
+    def draw(theme):
+        for _ in range(200):
+            with theme_toggle.mpl_theme(theme):
+                seen[theme].add(mt.rcParams["axes.facecolor"])
+
+    threads = [threading.Thread(target=draw, args=(theme,)) for theme in seen]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert seen == {theme: {theme_toggle.MPL_THEMES[theme]["axes.facecolor"]} for theme in seen}
+    assert mt.rcParams["axes.facecolor"] == before
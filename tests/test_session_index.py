@@ -0,0 +1,58 @@
+import numpy as np
+
+import session_index
+from Dashboard_App import data_utils
+
+
+def test_breach_counts_match_the_dashboards_anomalies():
+    assert session_index.THRESHOLDS == {
+        m: data_utils.anomaly_range(m) for m in session_index.METRICS if data_utils.anomaly_range(m)
+    }
+
+    # Every metric the dashboard can flag is counted, and nothing else
+    flagged = [m for m in session_index.METRICS if data_utils.anomaly_mask(m, [-1e9, 1e9]).any()]
+    assert sorted(session_index.THRESHOLDS) == sorted(flagged)
+
+    values = np.arange(-50.0, 2500.0, 0.5)
+    for metric, (low, high) in session_index.THRESHOLDS.items():
+        np.testing.assert_array_equal(
+            (values < low) | (values > high), data_utils.anomaly_mask(metric, values), err_msg=metric
+        )
+
+
+def test_rebuilt_summary_matches_the_live_one(tmp_path, session_header):
+    path = tmp_path / "session.csv"
+    path.write_bytes(session_header.encode("utf-8"))
+
+    live = session_index.summarise_csv(str(path))
+    rng = np.random.default_rng(0)
+    for start in range(0, 300, 50):
+        rows = [(t, "Test Pod", int(rng.integers(400, 1600)), float(rng.random() * 6), int(rng.integers(20, 1200)),
+                 50000, 22.5, float(15 + rng.random() * 15), 45.0, float(25 + rng.random() * 40), 3)
+                for t in range(start, start + 50)]
+        data = "".join(",".join(map(str, r)) + "\r\n" for r in rows).encode("utf-8")
+        with open(path, "ab") as f:
+            f.write(data)
+        live.update(rows, data)
+
+    assert session_index.summarise_csv(str(path)).to_row() == live.to_row()
+
+
+def test_finished_sessions_keep_only_their_index_row(tmp_path):
+    index = session_index.SessionIndex(str(tmp_path / "index.csv"))
+    expected = {}
+    for i in range(3):
+        path = tmp_path / f"session_{i}.csv"
+        path.write_bytes(b"")
+        index.open_session(str(path))
+        rows = [(t, "Test Pod", 800 + i, 0.5, 60, 50000, 22.5, 21.5, 45.0, 44.0, 3) for t in range(10)]
+        index.update(str(path), rows, b"data")
+        expected[path.name] = index.summaries[path.name].to_row()
+        index.close_session(str(path))
+
+    assert index.summaries == {}
+    index.save(force=True)
+    saved = session_index.read_index(index.index_path)
+    assert list(saved) == list(expected)
+    for name, row in expected.items():
+        assert saved[name] == {k: str(v) for k, v in row.items()}
@@ -0,0 +1,49 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Dashboard_App import data_utils
+
+
+def noisy_series(n, seed=0):
+    rng = np.random.default_rng(seed)
+    t = np.arange(n, dtype=float)
+    return 800 + 200 * np.sin(t / 40) + rng.normal(0, 15, n)
+
+
+@pytest.mark.parametrize("window, polyorder", [(5, 2), (7, 3), (11, 2), (21, 4)])
+def test_savgol_matches_scipy(window, polyorder):
+    signal = pytest.importorskip("scipy.signal")
+    y = noisy_series(500)
+    np.testing.assert_allclose(
+        data_utils.savgol_values(y, window, polyorder), signal.savgol_filter(y, window, polyorder),
+        rtol=0, atol=1e-9
+    )
+
+
+def test_moving_average_matches_pandas():
+    y = noisy_series(500)
+    y[[3, 50, 51, 499]] = np.nan
+    for window in (2, 5, 10, 31):
+        expected = pd.Series(y).rolling(window, center=True, min_periods=1).mean().to_numpy()
+        np.testing.assert_allclose(data_utils.moving_average_values(y, window), expected, rtol=0, atol=1e-9)
+
+
+@pytest.mark.parametrize("method", list(data_utils.SMOOTHING_METHODS))
+def test_incremental_smoother_matches_the_batch_smoother(method):
+    y = noisy_series(1500, seed=1)
+    t = np.arange(len(y))
+    smooth = data_utils.SMOOTHING_METHODS[method]
+    window, polyorder, tail = 9, 2, 200
+    # keep_rows below the series length, so old rows are dropped along the way
+    smoother = data_utils.IncrementalSmoother(method, window, polyorder, keep_rows=300)
+
+    # The live view passes the latest `tail` rows, growing by a few rows per refresh
+    rng = np.random.default_rng(2)
+    end = 0
+    while end < len(y):
+        end = min(len(y), end + int(rng.integers(1, 40)))
+        start = max(0, end - tail)
+        result = smoother.update(t[start:end], y[start:end])
+        expected = smooth(y[:end], window, polyorder)[start:end]
+        np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9, err_msg=f"rows {start}:{end}")
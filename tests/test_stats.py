@@ -0,0 +1,25 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from Dashboard_App import data_utils
+
+
+def test_stats_of_the_simulated_data():
+    # generate_data's keys are not its value columns ("CO2 Levels (ppm)" holds "CO2 (ppm)")
+    data_dict = data_utils.generate_data()
+    for var, df in data_dict.items():
+        stats = data_utils.dataset_stats(data_dict, var)
+        assert stats.count == len(df)
+        assert stats.mean == pytest.approx(df.iloc[:, 1].mean())
+
+
+def test_time_outside_range_counts_the_flagged_readings():
+    values = np.arange(-50.0, 2500.0, 5.0)
+    df = pd.DataFrame({"Time (s)": np.arange(len(values))})
+    for var in ["CO2_ppm", "VOC_ppm", "Temp_Comp_C", "Hum_Comp_pct", "IAQ"]:
+        df[var] = values
+        stats = data_utils.column_stats(df, var)
+        # Each reading lasts one second, until the next
+        flagged = data_utils.anomaly_mask(var, values[:-1]).sum()
+        assert stats.seconds_below + stats.seconds_above == flagged, var